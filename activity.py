@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import bindparam, update
+
+from database import SessionLocal
+from models import Student
+
+logger = logging.getLogger("ureeka.activity")
+
+# Timestamp aktivitas ditampung di memori lalu ditulis sekaligus tiap
+# ACTIVITY_FLUSH_INTERVAL detik, jadi request tidak menambah UPDATE sendiri
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "10"))
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "50000"))
+
+
+class ActivityBuffer:
+    """Write-behind buffer for Student.last_active / last_login.
+
+    Holds at most one entry per student (the latest timestamps) and at most
+    `max_pending` students; when full, new students are dropped (and counted)
+    until the next flush."""
+
+    def __init__(self, session_factory=SessionLocal, interval=ACTIVITY_FLUSH_INTERVAL,
+                 max_pending=ACTIVITY_MAX_PENDING):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def record(self, student_id, login=False, when=None):
+        when = when or datetime.utcnow()
+        with self._lock:
+            entry = self._pending.get(student_id)
+            if entry is None:
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    self._wake.set()
+                    return
+                entry = self._pending[student_id] = {"student_id": student_id}
+            entry["last_active"] = when
+            if login:
+                entry["last_login"] = when
+        if self._thread is None:
+            self.start()
+
+    def flush(self):
+        """Write everything pending as executemany UPDATEs (one for plain activity,
+        one for logins); returns the number of entries written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = list(pending.values())
+        # Core executemany, bukan ORM bulk UPDATE by primary key: student yang sudah
+        # dihapus cukup tidak ter-update (0 baris), bukan StaleDataError untuk seluruh batch
+        logins = [row for row in rows if "last_login" in row]
+        actives = [row for row in rows if "last_login" not in row]
+        try:
+            with self.session_factory() as db:
+                for batch, values in ((actives, {"last_active": bindparam("b_active")}),
+                                      (logins, {"last_active": bindparam("b_active"), "last_login": bindparam("b_login")})):
+                    if batch:
+                        db.execute(
+                            update(Student.__table__).where(Student.student_id == bindparam("b_id")).values(**values),
+                            [{"b_id": row["student_id"], "b_active": row["last_active"], "b_login": row.get("last_login")}
+                             for row in batch],
+                        )
+                db.commit()
+        except Exception:
+            logger.exception("Flushing %d activity timestamps failed, retrying next interval", len(rows))
+            with self._lock:
+                # Entry yang lebih baru (masuk saat flush) tetap menang
+                for row in rows:
+                    if row["student_id"] not in self._pending and len(self._pending) < self.max_pending:
+                        self._pending[row["student_id"]] = row
+            return 0
+        self.flushed += len(rows)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write what is still pending (app shutdown)."""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        return {"pending": len(self._pending), "flushed": self.flushed, "dropped": self.dropped,
+                "interval_s": self.interval, "max_pending": self.max_pending}
+
+
+activity_buffer = ActivityBuffer()
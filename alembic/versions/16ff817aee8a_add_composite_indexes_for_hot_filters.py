@@ -0,0 +1,121 @@
+"""add composite indexes for hot filters
+
+Revision ID: 16ff817aee8a
+Revises: 69da3ba47d4f
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '16ff817aee8a'
+down_revision: Union[str, None] = '69da3ba47d4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns); kolom pertama selalu kolom FK
+INDEXES = [
+    ('ix_test_attempts_student_test', 'test_attempts', ['student_id', 'test_id']),
+    ('ix_student_answers_attempt_question', 'student_answers', ['attempt_id', 'question_id']),
+    ('ix_forum_replies_topic_created', 'forum_replies', ['topic_id', 'created_at']),
+    ('ix_forum_topics_course_pinned_created', 'forum_topics', ['course_id', 'is_pinned', 'created_at']),
+    ('ix_questions_test_sequence', 'questions', ['test_id', 'sequence']),
+    ('ix_answers_question_correct', 'answers', ['question_id', 'is_correct']),
+]
+
+
+enrollments = sa.table(
+    'enrollments',
+    sa.column('enrollment_id', sa.Integer),
+    sa.column('student_id', sa.Integer),
+    sa.column('course_id', sa.Integer),
+    sa.column('enrolled_at', sa.TIMESTAMP),
+    sa.column('progress', sa.Float),
+    sa.column('completed_at', sa.TIMESTAMP),
+    sa.column('certificate_issued', sa.Boolean),
+)
+
+
+# Nilai gabungan per pasangan (student, course) yang punya lebih dari satu enrollment
+merged = sa.table(
+    'enrollment_merge',
+    sa.column('keep_id', sa.Integer),
+    sa.column('student_id', sa.Integer),
+    sa.column('course_id', sa.Integer),
+    sa.column('enrolled_at', sa.TIMESTAMP),
+    sa.column('progress', sa.Float),
+    sa.column('completed_at', sa.TIMESTAMP),
+    sa.column('certificate_issued', sa.Integer),
+)
+
+
+def merge_duplicate_enrollments():
+    """Unique index tidak bisa dibuat selama ada enrollment ganda (student, course).
+    Per pasangan disisakan enrollment_id terkecil dengan nilai gabungan: enrolled_at
+    paling awal, progress tertinggi, completed_at paling awal, sertifikat kalau
+    salah satunya sudah. Tidak ada FK ke enrollment_id, jadi sisanya aman dihapus.
+
+    Semua langkah berupa statement SQL biasa (tanpa membaca hasil query), jadi juga
+    jalan dengan `alembic upgrade --sql`. Hasil GROUP BY ditaruh di tabel bantu karena
+    MySQL tidak mengizinkan subquery ke tabel yang sedang di-UPDATE/DELETE (dan tabel
+    TEMPORARY tidak boleh dipakai lebih dari sekali dalam satu statement)."""
+    op.execute(
+        'CREATE TABLE enrollment_merge AS '
+        'SELECT MIN(enrollment_id) AS keep_id, student_id, course_id, '
+        'MIN(enrolled_at) AS enrolled_at, MAX(progress) AS progress, MIN(completed_at) AS completed_at, '
+        'MAX(CASE WHEN certificate_issued THEN 1 ELSE 0 END) AS certificate_issued '
+        'FROM enrollments WHERE student_id IS NOT NULL AND course_id IS NOT NULL '
+        'GROUP BY student_id, course_id HAVING COUNT(*) > 1'
+    )
+
+    def merged_value(column):
+        return sa.select(column).where(merged.c.keep_id == enrollments.c.enrollment_id).scalar_subquery()
+
+    op.execute(
+        enrollments.update()
+        .where(enrollments.c.enrollment_id.in_(sa.select(merged.c.keep_id)))
+        .values(
+            enrolled_at=merged_value(merged.c.enrolled_at),
+            progress=merged_value(merged.c.progress),
+            completed_at=merged_value(merged.c.completed_at),
+            certificate_issued=merged_value(merged.c.certificate_issued),
+        )
+    )
+    op.execute(
+        enrollments.delete().where(
+            sa.exists().where(
+                merged.c.student_id == enrollments.c.student_id,
+                merged.c.course_id == enrollments.c.course_id,
+                merged.c.keep_id != enrollments.c.enrollment_id,
+            )
+        )
+    )
+    op.execute('DROP TABLE enrollment_merge')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    merge_duplicate_enrollments()
+    op.create_index('uq_enrollments_student_course', 'enrollments', ['student_id', 'course_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # MySQL membuang index FK implisit (bernama sesuai kolomnya) begitu ada index
+    # komposit yang bisa menggantikannya. Index itu dibuat ulang dengan nama yang
+    # sama sebelum drop, supaya skema kembali persis seperti sebelum upgrade.
+    is_mysql = op.get_context().dialect.name == 'mysql'
+    if is_mysql:
+        op.create_index('student_id', 'enrollments', ['student_id'])
+    op.drop_index('uq_enrollments_student_course', table_name='enrollments')
+    for name, table, columns in reversed(INDEXES):
+        if is_mysql:
+            op.create_index(columns[0], table, [columns[0]])
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,28 @@
+"""add student last_active
+
+Revision ID: b7d2e4a1c9f3
+Revises: 16ff817aee8a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4a1c9f3'
+down_revision: Union[str, None] = '16ff817aee8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('student', sa.Column('last_active', sa.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('student', 'last_active')
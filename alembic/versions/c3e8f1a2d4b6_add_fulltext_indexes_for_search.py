@@ -0,0 +1,41 @@
+"""add fulltext indexes for search
+
+Revision ID: c3e8f1a2d4b6
+Revises: b7d2e4a1c9f3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f1a2d4b6'
+down_revision: Union[str, None] = 'b7d2e4a1c9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Hanya MySQL; database lain memakai inverted index di memori (search_index.py)
+INDEXES = [
+    ('ft_courses_title_description', 'courses', ['title', 'description']),
+    ('ft_materials_title_description', 'materials', ['title', 'description']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, mysql_prefix='FULLTEXT')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,31 @@
+"""add materials course type index
+
+Revision ID: d5a9c2e7f1b3
+Revises: c3e8f1a2d4b6
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9c2e7f1b3'
+down_revision: Union[str, None] = 'c3e8f1a2d4b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_materials_course_type', 'materials', ['course_id', 'enum'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Lihat 16ff817aee8a: index FK implisit course_id dibuat ulang dulu di MySQL
+    if op.get_context().dialect.name == 'mysql':
+        op.create_index('course_id', 'materials', ['course_id'])
+    op.drop_index('ix_materials_course_type', table_name='materials')
@@ -0,0 +1,38 @@
+"""add cache invalidations
+
+Revision ID: e1f4b8c6a2d7
+Revises: d5a9c2e7f1b3
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f4b8c6a2d7'
+down_revision: Union[str, None] = 'd5a9c2e7f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'cache_invalidations',
+        sa.Column('invalidation_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('origin', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('invalidation_id'),
+    )
+    op.create_index('ix_cache_invalidations_created', 'cache_invalidations', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_cache_invalidations_created', table_name='cache_invalidations')
+    op.drop_table('cache_invalidations')
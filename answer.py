@@ -3,19 +3,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import SessionLocal
+from auth import require_admin
+from database import get_db
 from models import Answers, Materials
+from test_snapshot import invalidate_question
 from pydantic import BaseModel
 
 answer_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class AnswerCreate(BaseModel):
     answer_id: int
     question_id: int
@@ -40,7 +35,7 @@ class AnswerOut(BaseModel):
     class Config:
         orm_mode: True
 
-@answer_router.post("/create/", response_model=AnswerOut, status_code=status.HTTP_201_CREATED)
+@answer_router.post("/create/", response_model=AnswerOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
 def create_answer(answer: AnswerCreate, db: Session = Depends(get_db)):
     new_answer = Answers(
         answer_id=answer.answer_id,
@@ -52,6 +47,7 @@ def create_answer(answer: AnswerCreate, db: Session = Depends(get_db)):
     db.add(new_answer)
     db.commit()
     db.refresh(new_answer)
+    invalidate_question(db, new_answer.question_id)
     return new_answer
 
 @answer_router.get("/", response_model=List[AnswerOut])
@@ -66,7 +62,7 @@ def read_answer(answer_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Answer not found")
     return answer
 
-@answer_router.put("/update/{answer_id}", response_model=AnswerOut)
+@answer_router.put("/update/{answer_id}", response_model=AnswerOut, dependencies=[Depends(require_admin)])
 def update_answer(answer_id: int, answer: AnswerUpdate, db: Session = Depends(get_db)):
     db_answer = db.query(Answers).filter(Answers.answer_id == answer_id).first()
     if db_answer is None:
@@ -76,14 +72,17 @@ def update_answer(answer_id: int, answer: AnswerUpdate, db: Session = Depends(ge
     db_answer.explanation = answer.explanation
     db.commit()
     db.refresh(db_answer)
+    invalidate_question(db, db_answer.question_id)
     return db_answer
 
-@answer_router.delete("/delete/{answer_id}", status_code=status.HTTP_204_NO_CONTENT)
+@answer_router.delete("/delete/{answer_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
 def delete_answer(answer_id: int, db: Session = Depends(get_db)):
     db_answer = db.query(Answers).filter(Answers.answer_id == answer_id).first()
     if db_answer is None:
         raise HTTPException(status_code=404, detail="Answer not found")
     
+    question_id = db_answer.question_id
     db.delete(db_answer)
     db.commit()
+    invalidate_question(db, question_id)
     return {"message": "Answer deleted successfully"}
\ No newline at end of file
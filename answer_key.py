@@ -0,0 +1,84 @@
+import asyncio
+from collections import namedtuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from cache import KeyedLocks, LRUCache, test_versions
+from models import Answers, Questions, Tests
+from routing import reads_primary
+
+# correct/options = frozenset answer_id; essay tidak punya options
+QuestionKey = namedtuple("QuestionKey", "points question_type correct options")
+AnswerKey = namedtuple("AnswerKey", "test_id pass_percentage questions")
+
+# Key = (test_id, version) dari cache.test_versions, jadi write di quiz.py dan
+# answer.py (lewat test_snapshot.invalidate_test) otomatis membuat entry lama tidak terpakai.
+# Worker lain ikut membuang versinya lewat cache_sync (paling lambat ~CACHE_SYNC_INTERVAL).
+_answer_keys = LRUCache(maxsize=1024, ttl=300)
+_build_locks = KeyedLocks()
+_async_build_locks = KeyedLocks(asyncio.Lock)
+
+
+def answer_key_statement(test_id: int):
+    return (
+        select(
+            Tests.pass_percentage,
+            Questions.question_id,
+            Questions.points,
+            Questions.question_type,
+            Answers.answer_id,
+            Answers.is_correct,
+        )
+        .select_from(Tests)
+        .outerjoin(Questions, Questions.test_id == Tests.test_id)
+        .outerjoin(Answers, Answers.question_id == Questions.question_id)
+        .where(Tests.test_id == test_id)
+    )
+
+
+@reads_primary
+def build_answer_key(db: Session, test_id: int):
+    rows = db.execute(answer_key_statement(test_id)).all()
+    if not rows:
+        return None
+
+    meta = {}
+    correct = {}
+    options = {}
+    for _, question_id, points, question_type, answer_id, is_correct in rows:
+        if question_id is None:
+            continue
+        meta[question_id] = (points or 0, question_type)
+        correct.setdefault(question_id, set())
+        options.setdefault(question_id, set())
+        if answer_id is not None:
+            options[question_id].add(answer_id)
+            if is_correct:
+                correct[question_id].add(answer_id)
+
+    questions = {
+        question_id: QuestionKey(points, question_type, frozenset(correct[question_id]), frozenset(options[question_id]))
+        for question_id, (points, question_type) in meta.items()
+    }
+    return AnswerKey(test_id, rows[0].pass_percentage, questions)
+
+
+def get_answer_key(db: Session, test_id: int):
+    """Return the AnswerKey for a test (None if the test doesn't exist), building it at most once per version."""
+    version = test_versions.get(test_id)
+    return _answer_keys.get_or_build(
+        (test_id, version),
+        lambda: build_answer_key(db, test_id),
+        _build_locks(test_id),
+    )
+
+
+async def get_answer_key_async(db: AsyncSession, test_id: int):
+    version = test_versions.get(test_id)
+
+    async def build():
+        return await db.run_sync(build_answer_key, test_id)
+
+    return await _answer_keys.get_or_build_async((test_id, version), build, _async_build_locks(test_id))
@@ -1,13 +1,21 @@
+import time
+from collections import namedtuple
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 
-from database import SessionLocal
+from activity import activity_buffer
+from cache import KeyedLocks, LRUCache
+from database import get_db
 from models import Admin, Student
-from pydantic import BaseModel
-from typing import Optional
+from password_pool import HashPoolBusy, password_pool
+from student_import import ImportFormatError, import_students, parse_rows
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 
@@ -15,17 +23,21 @@ from typing import Optional
 SECRET_KEY = "iloveureeka"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Baris user di-cache sebentar; user yang dinonaktifkan tertolak paling lambat setelah TTL ini
+USER_CACHE_TTL = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+CurrentUser = namedtuple("CurrentUser", "user_id username role")
 
-auth_router = APIRouter()
+# Batas baris per request import
+IMPORT_MAX_ROWS = 50000
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Token yang sudah diverifikasi -> (username, role), disimpan sampai token kedaluwarsa
+_verified_tokens = LRUCache(maxsize=10000)
+_users = LRUCache(maxsize=10000, ttl=USER_CACHE_TTL)
+_user_locks = KeyedLocks()
+_bearer = HTTPBearer(auto_error=False)
+
+auth_router = APIRouter()
 
 class UserCreate(BaseModel):
     username: str
@@ -37,6 +49,8 @@ class UserCreate(BaseModel):
 class UserLogin(BaseModel):
     username: str
     password: str
+    # Hanya perlu kalau username yang sama dipakai student dan admin
+    role: Optional[str] = Field(None, pattern="^(student|admin)$")
 
 class Token(BaseModel):
     access_token: str
@@ -45,11 +59,51 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Optional[str] = None
 
+class ImportRowResult(BaseModel):
+    row: int
+    status: str
+    username: Optional[str] = None
+    student_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class ImportReport(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    rows: List[ImportRowResult]
+
+# bcrypt lewat process pool; kalau antrean penuh langsung 503 + Retry-After
+def _busy(e: HashPoolBusy):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login requests, try again later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_pool.verify(plain_password, hashed_password)
+    except HashPoolBusy as e:
+        raise _busy(e)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    try:
+        return password_pool.hash(password)
+    except HashPoolBusy as e:
+        raise _busy(e)
+
+# Versi async untuk handler async: event loop menunggu future pool, bukan thread
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await password_pool.verify_async(plain_password, hashed_password)
+    except HashPoolBusy as e:
+        raise _busy(e)
+
+async def get_password_hash_async(password):
+    try:
+        return await password_pool.hash_async(password)
+    except HashPoolBusy as e:
+        raise _busy(e)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -61,47 +115,155 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_token(token: str):
+    """(username, role) for a valid token, None otherwise."""
+    claims = _verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if not payload.get("sub"):
+        return None
+    # Token lama tanpa claim role adalah token student
+    claims = (payload["sub"], payload.get("role", "student"))
+    ttl = payload["exp"] - time.time() if "exp" in payload else None
+    _verified_tokens.set(token, claims, ttl)
+    return claims
+
+def load_user(db: Session, username: str, role: str):
+    model, id_column = (Admin, Admin.admin_id) if role == "admin" else (Student, Student.student_id)
+
+    def build():
+        row = db.execute(
+            select(id_column, model.is_active).where(model.username == username)
+        ).first()
+        if row is None or row.is_active is False:
+            return None
+        return CurrentUser(row[0], username, role)
+
+    key = (role, username)
+    return _users.get_or_build(key, build, _user_locks(key))
+
+def invalidate_user(username: str, role: str = "student"):
+    _users.delete((role, username))
+
+def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer), db: Session = Depends(get_db)):
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    claims = decode_token(credentials.credentials)
+    user = load_user(db, *claims) if claims else None
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials",
+                            headers={"WWW-Authenticate": "Bearer"})
+    if user.role == "student":
+        activity_buffer.record(user.user_id)
+    return user
+
+def require_admin(user: CurrentUser = Depends(get_current_user)):
+    if user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return user
+
+# student_id diambil dari path: student hanya boleh mengakses datanya sendiri
+def require_student(student_id: int, user: CurrentUser = Depends(get_current_user)):
+    if user.role != "student" or user.user_id != student_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this student")
+    return user
+
+def require_student_or_admin(student_id: int, user: CurrentUser = Depends(get_current_user)):
+    if user.role == "admin":
+        return user
+    return require_student(student_id, user)
+
 @auth_router.post("/register", response_model=Token)
-def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(Student).filter(Student.email == user.email).first()
-    if db_user:
+async def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
+    def exists():
+        found = db.query(Student.student_id).filter(Student.email == user.email).first()
+        # Lepas koneksi selama hashing
+        db.rollback()
+        return found
+
+    if await run_in_threadpool(exists):
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = get_password_hash(user.password)
-    new_user = Student(
-        username=user.username,
-        email=user.email,
-        password_hash=hashed_password,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        created_at=datetime.utcnow(),
-        is_active=True,
-        join_date = datetime.utcnow()
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    hashed_password = await get_password_hash_async(user.password)
+
+    def create():
+        new_user = Student(
+            username=user.username,
+            email=user.email,
+            password_hash=hashed_password,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            created_at=datetime.utcnow(),
+            is_active=True,
+            join_date = datetime.utcnow()
+        )
+        db.add(new_user)
+        db.commit()
+        return new_user.student_id
+
+    student_id = await run_in_threadpool(create)
+    activity_buffer.record(student_id, login=True)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": new_user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "role": "student"}, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
 @auth_router.post("/login", response_model=Token)
-def login(request: Request, user: UserLogin, db: Session = Depends(get_db)):
+async def login(request: Request, user: UserLogin, db: Session = Depends(get_db)):
+    # Username hanya unik per tabel, jadi kedua tabel dicek dulu lalu hanya satu kandidat
+    # yang diverifikasi: password salah tidak boleh memicu bcrypt kedua
+    def candidates():
+        found = {}
+        for role, model, key in (("student", Student, Student.student_id), ("admin", Admin, Admin.admin_id)):
+            row = db.execute(select(key, model.password_hash).where(model.username == user.username)).first()
+            if row:
+                found[role] = row
+        db.rollback()
+        return found
 
-    print("User data received:", user.dict())
-    
-    db_user = db.query(Student).filter(Student.username == user.username).first()
-    if not db_user:
-        raise HTTPException(status_code=400, detail="Invalid username or password")
-    if not verify_password(user.password, db_user.password_hash):
+    found = await run_in_threadpool(candidates)
+    role = user.role or ("student" if "student" in found else "admin")
+    candidate = found.get(role)
+    if candidate is None or not await verify_password_async(user.password, candidate.password_hash):
         raise HTTPException(status_code=400, detail="Invalid username or password")
+    if role == "student":
+        activity_buffer.record(candidate[0], login=True)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "role": role}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@auth_router.post("/import", response_model=ImportReport, dependencies=[Depends(require_admin)])
+async def import_students_bulk(request: Request, db: Session = Depends(get_db)):
+    """Bulk-create students from CSV (header: username,email,first_name,last_name,password)
+    or NDJSON. `password_hash` (bcrypt) may replace `password`. Returns one result per row."""
+    try:
+        rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {IMPORT_MAX_ROWS} rows per import")
+
+    def run():
+        results = import_students(db, rows)
+        db.commit()
+        return results
+
+    # Query dan hashing blocking, jadi dijalankan di threadpool
+    try:
+        results = await run_in_threadpool(run)
+    except HashPoolBusy as e:
+        raise _busy(e)
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"created": counts["created"], "duplicates": counts["duplicate"], "invalid": counts["invalid"], "rows": results}
@@ -0,0 +1,239 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from sqlalchemy import func, select
+
+from database import SessionLocal
+from models import Categories, Course, Enrollments
+from routing import reads_primary
+
+logger = logging.getLogger("ureeka.autocomplete")
+
+# Type-ahead untuk judul course dan nama kategori: array key yang sudah diurutkan
+# + bisect, jadi lookup tidak menyentuh database. Key = judul mulai dari setiap
+# awal kata ("data sc" cocok dengan "Course 3: Data Science"). Hasil diurutkan
+# menurut popularitas (jumlah enrollment), yang di-refresh penuh tiap
+# AUTOCOMPLETE_REFRESH detik di background.
+AUTOCOMPLETE_REFRESH = float(os.getenv("AUTOCOMPLETE_REFRESH", "600"))
+# Prefix yang cocok dengan lebih dari SCAN_LIMIT key punya top-k yang sudah dihitung
+SCAN_LIMIT = 128
+MAX_RESULTS = 20
+
+_SPACE = re.compile(r"\s+")
+_WORD_START = re.compile(r"(?:^|(?<=\W))\w", re.UNICODE)
+
+
+def normalize(text):
+    return _SPACE.sub(" ", (text or "").lower()).strip()
+
+
+def _word_suffixes(text):
+    return {text[m.start():] for m in _WORD_START.finditer(text)}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []  # (key, entry_id) urut
+        self._entries = {}  # entry_id -> (label, popularity)
+        self._top = {}  # prefix -> [(popularity, entry_id)] untuk prefix dengan banyak key
+        self._lock = threading.Lock()
+
+    def build(self, items):
+        """items: (entry_id, label, popularity). Replaces the whole index."""
+        entries = {entry_id: (label, popularity) for entry_id, label, popularity in items}
+        keys = sorted(
+            (key, entry_id) for entry_id, (label, _) in entries.items() for key in _word_suffixes(normalize(label))
+        )
+        top = {}
+        self._warm(keys, entries, top, 0, len(keys), "")
+        with self._lock:
+            self._keys, self._entries, self._top = keys, entries, top
+
+    @staticmethod
+    def _rank(keys, entries, lo, hi):
+        ids = {keys[i][1] for i in range(lo, hi)}
+        return heapq.nlargest(MAX_RESULTS, ((entries[entry_id][1], -entry_id) for entry_id in ids))
+
+    def _warm(self, keys, entries, top, lo, hi, prefix):
+        # keys[lo:hi] semua diawali `prefix`; turun per karakter selama rentangnya besar
+        if hi - lo <= SCAN_LIMIT:
+            return
+        if prefix:
+            top[prefix] = self._rank(keys, entries, lo, hi)
+        depth = len(prefix)
+        i = lo
+        while i < hi:
+            key = keys[i][0]
+            if len(key) <= depth:
+                i += 1
+                continue
+            child = prefix + key[depth]
+            j = bisect_left(keys, (child + "\uffff",), i, hi)
+            self._warm(keys, entries, top, i, j, child)
+            i = j
+
+    def upsert(self, entry_id, label, popularity=None):
+        with self._lock:
+            old = self._entries.get(entry_id)
+            if old is not None:
+                self._remove(entry_id, old[0])
+            if popularity is None:
+                popularity = old[1] if old is not None else 0
+            self._entries[entry_id] = (label, popularity)
+            for key in _word_suffixes(normalize(label)):
+                insort(self._keys, (key, entry_id))
+                self._admit(key, entry_id, popularity)
+
+    def remove(self, entry_id):
+        with self._lock:
+            old = self._entries.pop(entry_id, None)
+            if old is not None:
+                self._remove(entry_id, old[0])
+
+    def _remove(self, entry_id, label):
+        for key in _word_suffixes(normalize(label)):
+            i = bisect_left(self._keys, (key, entry_id))
+            if i < len(self._keys) and self._keys[i] == (key, entry_id):
+                del self._keys[i]
+            self._forget(key, entry_id)
+
+    def _admit(self, key, entry_id, popularity):
+        # Course baru biasanya belum populer, jadi top-k yang sudah dihitung jarang berubah
+        item = (popularity, -entry_id)
+        for i in range(1, len(key) + 1):
+            ranked = self._top.get(key[:i])
+            if ranked is not None and item not in ranked and (len(ranked) < MAX_RESULTS or item > ranked[-1]):
+                insort(ranked, item, key=lambda r: (-r[0], -r[1]))
+                del ranked[MAX_RESULTS:]
+
+    def _forget(self, key, entry_id):
+        # Entry yang keluar dari top-k: penggantinya tidak diketahui, hitung ulang saat lookup
+        for i in range(1, len(key) + 1):
+            ranked = self._top.get(key[:i])
+            if ranked is not None and any(-neg_id == entry_id for _, neg_id in ranked):
+                del self._top[key[:i]]
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            ranked = self._top.get(prefix)
+            if ranked is None:
+                lo = bisect_left(self._keys, (prefix,))
+                hi = bisect_left(self._keys, (prefix + "\uffff",), lo)
+                ranked = self._rank(self._keys, self._entries, lo, hi)
+                if hi - lo > SCAN_LIMIT:
+                    self._top[prefix] = ranked
+            return [(-neg_id, self._entries[-neg_id][0], popularity) for popularity, neg_id in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Autocomplete:
+    def __init__(self, session_factory=SessionLocal, refresh=AUTOCOMPLETE_REFRESH):
+        self.session_factory = session_factory
+        self.refresh = refresh
+        self.courses = PrefixIndex()
+        self.categories = PrefixIndex()
+        self._loaded_at = None
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._backlog = None  # write course selama load(), diulang setelah build
+
+    @reads_primary
+    def _query(self):
+        with self.session_factory() as db:
+            enrollments = (
+                select(Enrollments.course_id, func.count(Enrollments.enrollment_id).label("n"))
+                .group_by(Enrollments.course_id)
+                .subquery()
+            )
+            courses = db.execute(
+                select(Course.course_id, Course.title, func.coalesce(enrollments.c.n, 0))
+                .outerjoin(enrollments, enrollments.c.course_id == Course.course_id)
+            ).all()
+            categories = db.execute(
+                select(Categories.category_id, Categories.name, func.coalesce(func.sum(enrollments.c.n), 0))
+                .outerjoin(Course, Course.category_id == Categories.category_id)
+                .outerjoin(enrollments, enrollments.c.course_id == Course.course_id)
+                .group_by(Categories.category_id, Categories.name)
+            ).all()
+        return courses, categories
+
+    def load(self):
+        """Rebuild both indexes from the database (one query each). Course writes
+        made while loading are replayed afterwards."""
+        with self._load_lock:
+            self._backlog = []
+            try:
+                courses, categories = self._query()
+            except BaseException:
+                self._backlog = None
+                raise
+            self.courses.build(courses)
+            self.categories.build(categories)
+            backlog, self._backlog = self._backlog, None
+            for course_id, title in backlog:
+                if title is None:
+                    self.courses.remove(course_id)
+                else:
+                    self.courses.upsert(course_id, title)
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+
+    def _refresh_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            self._refreshing = False
+            logger.exception("Refreshing the autocomplete index failed")
+
+    def start(self):
+        """Load in a background thread (app startup); lookups before that load synchronously."""
+        if self._loaded_at is None and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, name="autocomplete-load", daemon=True).start()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._load_lock:
+                pass  # tunggu load yang sedang berjalan
+            if self._loaded_at is None:
+                self.load()
+        elif not self._refreshing and time.monotonic() - self._loaded_at > self.refresh:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, name="autocomplete-refresh", daemon=True).start()
+
+    def lookup(self, prefix, limit=10):
+        self._ensure_loaded()
+        return {
+            "courses": self.courses.lookup(prefix, limit),
+            "categories": self.categories.lookup(prefix, limit),
+        }
+
+    def course_changed(self, course):
+        self._course_write(course.course_id, course.title)
+
+    def course_deleted(self, course_id):
+        self._course_write(course_id, None)
+
+    def _course_write(self, course_id, title):
+        backlog = self._backlog
+        if backlog is not None:
+            backlog.append((course_id, title))
+        if self._loaded_at is None:
+            return
+        if title is None:
+            self.courses.remove(course_id)
+        else:
+            self.courses.upsert(course_id, title)
+
+
+autocomplete = Autocomplete()
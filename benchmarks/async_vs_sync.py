@@ -0,0 +1,100 @@
+"""Sync vs async (DB_ASYNC=1) handlers under high concurrency, in-process via httpx.
+
+    python -m benchmarks.async_vs_sync --concurrency 200 --requests 5000
+
+Needs httpx and aiosqlite (or aiomysql with --db/--async-db pointing at MySQL).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from datetime import datetime
+
+import httpx
+from sqlalchemy.orm import Session
+
+from benchmarks.common import drive, summarize, use_database
+from benchmarks.grading import seed_exam
+from database import init_async_engine
+from models import Forum_Replies, Forum_Topics
+
+
+def seed_forum(session, topics=20, replies=20):
+    now = datetime(2024, 1, 2, 8, 0)
+    session.bulk_insert_mappings(Forum_Topics, [
+        {"topic_id": t, "course_id": 1, "student_id": 1, "title": f"Topic {t}", "content": "...",
+         "created_at": now, "is_pinned": False, "is_closed": False}
+        for t in range(1, topics + 1)
+    ])
+    session.bulk_insert_mappings(Forum_Replies, [
+        {"topic_id": t, "student_id": 1, "admin_id": 1, "content": "...", "created_at": now, "upvotes": 0}
+        for t in range(1, topics + 1) for _ in range(replies)
+    ])
+    session.commit()
+
+
+def workload(n, attempts, seed=7):
+    rng = random.Random(seed)
+    paths = [
+        lambda: "/course/",
+        lambda: "/course/detail/1",
+        lambda: "/quiz/test/1",
+        lambda: "/quiz/test/1/full",
+        lambda: f"/testAttempt/attempt/{rng.randint(1, attempts)}/1/{rng.randint(1, attempts)}",
+        lambda: f"/forum/replies/{rng.randint(1, 20)}",
+    ]
+    return [("GET", rng.choice(paths)(), None) for _ in range(n)]
+
+
+async def run(app, requests, concurrency):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await drive(client, requests[:50], concurrency)  # warm-up
+        samples, errors, wall = await drive(client, requests, concurrency)
+    result = summarize(samples)
+    result["req_per_s"] = round(len(samples) / wall, 1)
+    result["errors"] = len(errors)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--db", help="sync URL (default: temp SQLite file)")
+    parser.add_argument("--async-db", help="async URL (default: same file via aiosqlite)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    sync_url = args.db or f"sqlite:///{path}"
+    async_url = args.async_db or f"sqlite+aiosqlite:///{path}"
+
+    engine = use_database(sync_url)
+    with Session(engine) as session:
+        seed_exam(session, attempts=args.attempts)
+        seed_forum(session)
+    async_engine = init_async_engine(async_url)
+
+    from main import create_app
+
+    async def run_async():
+        try:
+            return await run(create_app(async_db=True, rate_limit=False), requests, args.concurrency)
+        finally:
+            # Koneksi aiosqlite punya thread sendiri; harus ditutup di loop yang sama
+            await async_engine.dispose()
+
+    requests = workload(args.requests, args.attempts)
+    report = {
+        "concurrency": args.concurrency,
+        "sync": asyncio.run(run(create_app(async_db=False, rate_limit=False), requests, args.concurrency)),
+        "async": asyncio.run(run_async()),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Catalog/exam latency during a login storm: bcrypt inline in the threadpool
+(old behaviour) vs the bounded process pool in password_pool.
+
+    python -m benchmarks.auth_isolation --logins 200 --workers 2 --queue 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from benchmarks.common import summarize, use_database
+from models import Course, Student, Tests
+from password_pool import password_pool
+
+
+async def catalog(client, paths, concurrency, until, rng):
+    """Keep `concurrency` clients busy on catalog/exam reads until `until()` is true."""
+    samples, statuses = [], Counter()
+
+    async def worker():
+        while not until():
+            start = time.perf_counter()
+            response = await client.get(rng.choice(paths)())
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, statuses
+
+
+async def scenario(app, students, paths, args, storm):
+    rng = random.Random(1)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        logins, login_statuses = [], Counter()
+
+        async def login(username):
+            start = time.perf_counter()
+            response = await client.post("/auth/login", json={"username": username, "password": "password"})
+            logins.append((time.perf_counter() - start) * 1000)
+            login_statuses[response.status_code] += 1
+
+        if storm:
+            storm_task = asyncio.ensure_future(asyncio.gather(*(login(u) for u in students[:args.logins])))
+            until = storm_task.done
+        else:
+            deadline = time.perf_counter() + args.duration
+            until = lambda: time.perf_counter() > deadline  # noqa: E731
+        start = time.perf_counter()
+        samples, statuses = await catalog(client, paths, args.concurrency, until, rng)
+        wall = time.perf_counter() - start
+        if storm:
+            await storm_task
+
+    result = {"catalog": summarize(samples), "catalog_req_per_s": round(len(samples) / wall, 1),
+              "catalog_statuses": dict(statuses), "wall_s": round(wall, 2)}
+    if storm:
+        result["login"] = summarize(logins)
+        result["login_statuses"] = {str(k): v for k, v in login_statuses.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="concurrent logins in the storm")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent catalog clients")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds for the no-storm baseline")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=8)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'auth.db')}"
+    from seeder import generate
+
+    generate(url, students=args.logins, courses=20, attempts=0)
+    engine = use_database(url)
+    with Session(engine) as session:
+        students = session.scalars(select(Student.username).order_by(Student.student_id)).all()
+        courses = session.scalars(select(Course.course_id)).all()
+        tests = session.scalars(select(Tests.test_id)).all()
+    paths = [
+        lambda: "/course/",
+        lambda: f"/course/detail/{random.choice(courses)}",
+        lambda: f"/quiz/test/{random.choice(tests)}/full",
+    ]
+
+    from main import create_app
+
+    app = create_app(async_db=False, rate_limit=False)
+    report = {"logins": args.logins, "catalog_concurrency": args.concurrency}
+    report["baseline"] = asyncio.run(scenario(app, students, paths, args, storm=False))
+    password_pool.configure(workers=0, max_queue=None)
+    report["inline"] = asyncio.run(scenario(app, students, paths, args, storm=True))
+    password_pool.configure(workers=args.workers, max_queue=args.queue)
+    report["pool"] = asyncio.run(scenario(app, students, paths, args, storm=True))
+    report["pool"]["hash_pool"] = password_pool.stats()
+    password_pool.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
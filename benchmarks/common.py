@@ -0,0 +1,103 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+
+
+def sqlite_engine(url="sqlite://"):
+    # In-memory SQLite butuh StaticPool supaya semua session pakai koneksi yang sama
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if url == "sqlite://":
+        kwargs["poolclass"] = StaticPool
+    else:
+        # Handler sync memegang koneksi sampai response selesai di-serialize, dan
+        # serialisasi itu butuh thread dari threadpool Starlette (40). Kalau pool
+        # habis, 40 thread menunggu koneksi dan sesi yang memegang koneksi menunggu
+        # thread: deadlock sampai pool_timeout. Overflow tanpa batas untuk benchmark.
+        kwargs["pool_size"] = 50
+        kwargs["max_overflow"] = -1
+    engine = create_engine(url, **kwargs)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class QueryCounter:
+    """Counts statements sent to an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer(samples):
+    start = time.perf_counter()
+    yield
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "n": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def use_database(url):
+    """Point the app's SessionLocal at `url` (created if needed) and return the engine."""
+    from database import SessionLocal, make_engine
+
+    engine = sqlite_engine(url) if url.startswith("sqlite") else make_engine(url)
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+async def drive(client, requests, concurrency, on_response=None):
+    """Send (method, path, json[, headers]) requests with at most `concurrency` in flight.
+    `on_response(response)` is called for every response, e.g. to read headers.
+
+    Returns (latencies_ms, errors, wall_seconds)."""
+    import asyncio
+
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, errors = [], []
+
+    async def one(method, path, body, headers=None):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            samples.append((time.perf_counter() - start) * 1000)
+            if on_response is not None:
+                on_response(response)
+            if response.status_code >= 400:
+                errors.append((path, response.status_code))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*r) for r in requests))
+    return samples, errors, time.perf_counter() - start
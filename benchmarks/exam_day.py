@@ -0,0 +1,254 @@
+"""Exam-day scenario: waves of students log in, open a test, autosave, submit and
+get graded while admins edit the test's answer options.
+
+    python -m benchmarks.exam_day --ramp 50,100,200 --autosaves 3
+    python -m benchmarks.exam_day --db mysql+mysqlconnector://root:@localhost:3306/ureekaBench --no-seed \\
+        --ramp 500,1000,2000 --out exam_day.json
+
+Every phase starts `ramp[i]` students at once. Per phase and step the report
+has latency percentiles, error rate and statuses, plus an overall verdict
+against --max-error-rate and --max-p99-ms.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from benchmarks.common import summarize, use_database
+from models import Admin, Answers, Questions, Student
+
+STEPS = ("login", "start", "fetch_test", "autosave", "submit", "admin_edit")
+
+
+class Exam:
+    """The test everyone sits, with its question/option layout."""
+
+    def __init__(self, session, test_id=None):
+        if test_id is None:
+            # Test dengan soal terbanyak, paling berat untuk dinilai
+            test_id = session.execute(
+                select(Questions.test_id).group_by(Questions.test_id)
+                .order_by(func.count().desc(), Questions.test_id).limit(1)
+            ).scalar_one()
+        self.test_id = test_id
+        self.options = defaultdict(list)
+        self.answers = []
+        rows = session.execute(
+            select(Questions.question_id, Answers.answer_id, Answers.is_correct)
+            .outerjoin(Answers, Answers.question_id == Questions.question_id)
+            .where(Questions.test_id == test_id)
+        )
+        for question_id, answer_id, is_correct in rows:
+            options = self.options[question_id]  # soal essay tetap tercatat walau tanpa opsi
+            if answer_id is not None:
+                options.append(answer_id)
+                self.answers.append((answer_id, question_id, is_correct))
+        self.questions = sorted(self.options)
+        self.admin_username = session.scalar(select(Admin.username).order_by(Admin.admin_id).limit(1))
+
+    def answer(self, rng, question_id):
+        if self.options[question_id]:
+            return {"question_id": question_id, "answer_id": rng.choice(self.options[question_id])}
+        return {"question_id": question_id, "essay_answer": "Exam day essay"}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.throttled = Counter()
+
+    async def call(self, client, step, method, path, retries=0, **kwargs):
+        """Latency is measured from the first try, like a user would see it. A 503 is
+        retried after its Retry-After up to `retries` times and counted as throttled."""
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, "transport_error"
+            if status != 503 or attempt == retries:
+                break
+            self.throttled[step] += 1
+            await asyncio.sleep(min(float(response.headers.get("Retry-After", 1)), 10))
+        self.samples[step].append((time.perf_counter() - start) * 1000)
+        self.statuses[step][status] += 1
+        return response if response is not None and response.status_code < 400 else None
+
+    def report(self):
+        steps = {}
+        for step in STEPS:
+            if not self.samples[step]:
+                continue
+            statuses = self.statuses[step]
+            errors = sum(count for status, count in statuses.items() if status == "transport_error" or status >= 400)
+            steps[step] = summarize(self.samples[step])
+            steps[step]["error_rate"] = round(errors / len(self.samples[step]), 4)
+            steps[step]["statuses"] = {str(status): count for status, count in statuses.items()}
+            steps[step]["throttled"] = self.throttled[step]
+        return steps
+
+
+async def student(client, recorder, exam, student_id, username, args, rng):
+    autosaves, think_ms = args.autosaves, args.think_ms
+    response = await recorder.call(client, "login", "POST", "/auth/login", retries=args.login_retries,
+                                   json={"username": username, "password": "password"})
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    now = datetime.utcnow().isoformat()
+    response = await recorder.call(
+        client, "start", "POST", f"/testAttempt/attempt/create/{student_id}/{exam.test_id}", headers=headers,
+        json={"test_id": exam.test_id, "student_id": student_id, "started_at": now, "completed_at": now,
+              "score": 0, "passed": False, "total_time": 0})
+    if response is None:
+        return
+    attempt_id = response.json()["attempt_id"]
+    base = f"/testAttempt/attempt/{{}}/{student_id}/{exam.test_id}/{attempt_id}"
+
+    if await recorder.call(client, "fetch_test", "GET", f"/quiz/test/{exam.test_id}/full", headers=headers) is None:
+        return
+
+    # Jawaban bertambah sedikit demi sedikit; tiap autosave mengirim semua jawaban sejauh ini
+    answers = [exam.answer(rng, question_id) for question_id in exam.questions]
+    for i in range(1, autosaves + 1):
+        await asyncio.sleep(rng.uniform(0, think_ms) / 1000)
+        partial = answers[:max(1, len(answers) * i // (autosaves + 1))]
+        await recorder.call(client, "autosave", "PUT", base.format("save"), headers=headers,
+                            json={"answers": partial})
+
+    await asyncio.sleep(rng.uniform(0, think_ms) / 1000)
+    await recorder.call(client, "submit", "POST", base.format("submit"), headers=headers,
+                        json={"answers": answers, "completed_at": datetime.utcnow().isoformat()})
+
+
+async def admin(client, recorder, exam, args, stop, rng):
+    interval_ms = args.admin_interval_ms
+    response = await recorder.call(client, "login", "POST", "/auth/login", retries=args.login_retries,
+                                   json={"username": exam.admin_username, "password": "password"})
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # Admin merapikan teks/penjelasan opsi; kunci jawaban tidak diubah supaya nilai tetap konsisten
+    while not stop.is_set() and exam.answers:
+        answer_id, question_id, is_correct = rng.choice(exam.answers)
+        await recorder.call(client, "admin_edit", "PUT", f"/answer/update/{answer_id}", headers=headers, json={
+            "answer_id": answer_id, "question_id": question_id, "answer_text": f"Option {answer_id} (edited)",
+            "is_correct": is_correct, "explanation": f"Edited at {datetime.utcnow().isoformat()}"})
+        try:
+            await asyncio.wait_for(stop.wait(), interval_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def phase(app, exam, students, admins, args, seed):
+    rng = random.Random(seed)
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://exam", limits=limits,
+                                 timeout=args.timeout) as client:
+        stop = asyncio.Event()
+        admin_tasks = [asyncio.create_task(admin(client, recorder, exam, args, stop,
+                                                 random.Random(seed + i)))
+                       for i in range(admins)]
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            student(client, recorder, exam, student_id, username, args, random.Random(rng.getrandbits(32)))
+            for student_id, username in students
+        ))
+        wall = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*admin_tasks)
+    steps = recorder.report()
+    submitted = steps.get("submit", {}).get("n", 0) * (1 - steps.get("submit", {}).get("error_rate", 1))
+    return {
+        "students": len(students),
+        "admins": admins,
+        "wall_s": round(wall, 2),
+        "graded_per_s": round(submitted / wall, 1) if wall else 0.0,
+        "steps": steps,
+    }
+
+
+def verdict(phases, max_error_rate, max_p99_ms):
+    failures = []
+    for phase_report in phases:
+        for step, stats in phase_report["steps"].items():
+            if stats["error_rate"] > max_error_rate:
+                failures.append(f"{phase_report['students']} students: {step} error rate {stats['error_rate']:.2%}")
+            if max_p99_ms and stats["p99_ms"] > max_p99_ms:
+                failures.append(f"{phase_report['students']} students: {step} p99 {stats['p99_ms']:.0f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="sync URL (default: temp SQLite file)")
+    parser.add_argument("--no-seed", action="store_true", help="use the data already in --db")
+    parser.add_argument("--ramp", default="25,50,100", help="students per phase, comma separated")
+    parser.add_argument("--admins", type=int, default=2, help="admins editing answers during each phase")
+    parser.add_argument("--admin-interval-ms", type=int, default=200)
+    parser.add_argument("--autosaves", type=int, default=3)
+    parser.add_argument("--think-ms", type=int, default=200, help="max pause between a student's steps")
+    parser.add_argument("--test-id", type=int, help="test to sit (default: the one with most questions)")
+    parser.add_argument("--login-retries", type=int, default=20, help="retries of a login answered with 503")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p99-ms", type=float, default=0, help="0 = no latency limit")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    ramp = [int(n) for n in args.ramp.split(",")]
+    url = args.db or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'exam.db')}"
+    if not args.no_seed:
+        from seeder import generate
+
+        generate(url, students=max(ramp) * len(ramp), courses=20, attempts=0, questions_per_test=20)
+    engine = use_database(url)
+    with Session(engine) as session:
+        exam = Exam(session, args.test_id)
+        # Tiap fase memakai student yang berbeda
+        pool = session.execute(select(Student.student_id, Student.username).where(Student.is_active.is_(True))
+                               .order_by(Student.student_id).limit(sum(ramp))).all()
+    if len(pool) < sum(ramp):
+        raise SystemExit(f"need {sum(ramp)} students, database has {len(pool)}")
+
+    from main import create_app
+
+    app = create_app(async_db=False, rate_limit=False)
+    phases, offset = [], 0
+    for i, size in enumerate(ramp):
+        report = asyncio.run(phase(app, exam, pool[offset:offset + size], args.admins, args, seed=i))
+        offset += size
+        phases.append(report)
+        print(f"phase {i + 1}: {size} students in {report['wall_s']} s, {report['graded_per_s']} graded/s", flush=True)
+        for step, stats in report["steps"].items():
+            print(f"    {step:<11} n={stats['n']:<6} p50={stats['p50_ms']:9.1f} p95={stats['p95_ms']:9.1f} "
+                  f"p99={stats['p99_ms']:9.1f} err={stats['error_rate']:.2%} throttled={stats['throttled']}", flush=True)
+
+    failures = verdict(phases, args.max_error_rate, args.max_p99_ms)
+    result = {"test_id": exam.test_id, "questions": len(exam.questions), "ramp": ramp, "phases": phases,
+              "passed": not failures, "failures": failures}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""EXPLAIN the queries behind the hot endpoints and check which index each one uses.
+
+    python -m benchmarks.explain                       # in-memory SQLite
+    python -m benchmarks.explain --db mysql+mysqlconnector://root:@localhost:3306/ureekaCourse
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import create_engine, delete, select, text
+from sqlalchemy.orm import Session
+
+from answer_key import answer_key_statement
+from benchmarks.async_vs_sync import seed_forum
+from benchmarks.common import sqlite_engine
+from benchmarks.grading import seed_exam
+from forum import REPLY_KEYSET, TOPIC_KEYSET
+from grading import _attempt_answers
+from pagination import encode_cursor
+from models import Enrollments, Forum_Replies, Forum_Topics, Questions, Student_Answers, Tests_Attempts
+
+# (endpoint, statement, index yang diharapkan)
+CASES = [
+    ("GET /testAttempt/attempts/{student_id}/{test_id}",
+     select(Tests_Attempts).where(Tests_Attempts.student_id == 1, Tests_Attempts.test_id == 1),
+     "ix_test_attempts_student_test"),
+    ("grading: attempt answers",
+     _attempt_answers(1),
+     "ix_student_answers_attempt_question"),
+    ("POST /testAttempt/attempt/submit (replace answers)",
+     delete(Student_Answers).where(Student_Answers.attempt_id == 1),
+     "ix_student_answers_attempt_question"),
+    ("GET /forum/topics/{course_id}",
+     TOPIC_KEYSET.apply(select(Forum_Topics).where(Forum_Topics.course_id == 1)),
+     "ix_forum_topics_course_pinned_created"),
+    ("GET /forum/topics/{course_id}?cursor=...",
+     TOPIC_KEYSET.apply(select(Forum_Topics).where(Forum_Topics.course_id == 1), encode_cursor([False, datetime(2025, 1, 1), 100])),
+     "ix_forum_topics_course_pinned_created"),
+    ("GET /forum/replies/{topic_id}",
+     REPLY_KEYSET.apply(select(Forum_Replies).where(Forum_Replies.topic_id == 1)),
+     "ix_forum_replies_topic_created"),
+    ("GET /forum/replies/{topic_id}?cursor=...",
+     REPLY_KEYSET.apply(select(Forum_Replies).where(Forum_Replies.topic_id == 1), encode_cursor([datetime(2025, 1, 1), 100])),
+     "ix_forum_replies_topic_created"),
+    ("GET /quiz/test/{test_id}/full (selectinload questions)",
+     select(Questions).where(Questions.test_id.in_([1])).order_by(Questions.sequence),
+     "ix_questions_test_sequence"),
+    ("answer key build",
+     answer_key_statement(1),
+     "ix_answers_question_correct"),
+    ("enrollment lookup (student, course)",
+     select(Enrollments).where(Enrollments.student_id == 1, Enrollments.course_id == 1),
+     "uq_enrollments_student_course"),
+]
+
+
+def explain(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    return [" | ".join(f"{k}={v}" for k, v in row._mapping.items() if v is not None)
+            for row in conn.execute(text("EXPLAIN " + sql))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default="sqlite://", help="database that already has the schema and data")
+    args = parser.parse_args()
+
+    if args.db.startswith("sqlite"):
+        engine = sqlite_engine(args.db)
+        with Session(engine) as session:
+            seed_exam(session, questions=10, attempts=20)
+            seed_forum(session)
+    else:
+        engine = create_engine(args.db)
+
+    missing = 0
+    with engine.connect() as conn:
+        for endpoint, statement, index in CASES:
+            plan = explain(conn, statement)
+            used = any(index in line for line in plan)
+            missing += not used
+            print(f"{'OK  ' if used else 'MISS'} {endpoint} -> {index}")
+            for line in plan:
+                print(f"       {line}")
+    raise SystemExit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
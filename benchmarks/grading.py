@@ -0,0 +1,107 @@
+"""Grading benchmark: legacy per-answer lookup vs grading.grade_attempt.
+
+    python -m benchmarks.grading --questions 40 --attempts 200
+"""
+import argparse
+import json
+import random
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from benchmarks.common import QueryCounter, sqlite_engine, summarize, timer
+from grading import grade_attempt
+from models import Admin, Answers, Categories, Course, Questions, Student, Student_Answers, Tests, Tests_Attempts
+
+
+def seed_exam(session, questions=40, choices=4, attempts=200, seed=1):
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1, 8, 0)
+    session.add(Admin(admin_id=1, username="admin", email="admin@example.com", password_hash="x",
+                      first_name="A", last_name="B", created_at=now))
+    session.add(Categories(category_id=1, name="Bench", description="Bench"))
+    session.add(Course(course_id=1, title="Bench", description="Bench", category_id=1, created_at=now, admin_id=1))
+    session.add(Tests(test_id=1, course_id=1, title="Exam", description="Exam", pass_percentage=70,
+                      time_limit=60, created_at=now, admin_id=1))
+    session.flush()
+
+    key = {}
+    answer_id = 1
+    question_rows, answer_rows = [], []
+    for q in range(1, questions + 1):
+        question_rows.append({"question_id": q, "test_id": 1, "question_text": f"Q{q}",
+                              "question_type": "multiple_choice", "points": rng.randint(1, 5), "sequence": q})
+        correct = rng.randrange(choices)
+        key[q] = []
+        for c in range(choices):
+            answer_rows.append({"answer_id": answer_id, "question_id": q, "answer_text": f"A{c}",
+                                "is_correct": c == correct})
+            key[q].append(answer_id)
+            answer_id += 1
+    session.bulk_insert_mappings(Questions, question_rows)
+    session.bulk_insert_mappings(Answers, answer_rows)
+
+    student_rows, attempt_rows, sa_rows = [], [], []
+    for a in range(1, attempts + 1):
+        student_rows.append({"student_id": a, "username": f"s{a}", "email": f"s{a}@example.com",
+                             "password_hash": "x", "first_name": "S", "last_name": str(a),
+                             "join_date": now.date(), "created_at": now})
+        attempt_rows.append({"attempt_id": a, "student_id": a, "test_id": 1, "started_at": now,
+                             "completed_at": now, "score": 0, "passed": False, "total_time": 0})
+        for q in range(1, questions + 1):
+            sa_rows.append({"attempt_id": a, "question_id": q, "answer_id": rng.choice(key[q])})
+    session.bulk_insert_mappings(Student, student_rows)
+    session.bulk_insert_mappings(Tests_Attempts, attempt_rows)
+    session.bulk_insert_mappings(Student_Answers, sa_rows)
+    session.commit()
+
+
+def legacy_grade(db, attempt):
+    # Versi lama: satu SELECT per jawaban student, passing grade hard-coded 60
+    student_answers = db.query(Student_Answers).filter_by(attempt_id=attempt.attempt_id).all()
+    correct_count = sum(
+        1 for ans in student_answers if db.query(Answers)
+        .filter_by(question_id=ans.question_id, is_correct=True, answer_id=ans.answer_id)
+        .first()
+    )
+    attempt.score = round(correct_count / len(student_answers) * 100)
+    attempt.passed = attempt.score >= 60
+    return attempt
+
+
+def run(engine, grade, attempts):
+    samples, queries = [], []
+    for attempt_id in range(1, attempts + 1):
+        with Session(engine) as db:
+            with QueryCounter(engine) as counter, timer(samples):
+                attempt = db.get(Tests_Attempts, attempt_id)
+                grade(db, attempt)
+                db.commit()
+            queries.append(counter.count)
+    result = summarize(samples)
+    # Attempt pertama ikut membangun answer key yang di-cache
+    result["queries_first_attempt"] = queries[0]
+    result["queries_per_attempt"] = queries[-1]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--db", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = sqlite_engine(args.db)
+    with Session(engine) as session:
+        seed_exam(session, questions=args.questions, attempts=args.attempts)
+
+    report = {
+        "legacy": run(engine, legacy_grade, args.attempts),
+        "grade_attempt": run(engine, grade_attempt, args.attempts),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Per-route benchmark for every router in main.py, in-process via httpx.
+
+    python -m benchmarks.routes                                   # temp SQLite, seeded by seeder.generate
+    python -m benchmarks.routes --db mysql+mysqlconnector://root:@localhost:3306/ureekaBench --no-seed
+    python -m benchmarks.routes --save benchmarks/baselines/sqlite.json
+    python -m benchmarks.routes --compare benchmarks/baselines/sqlite.json --threshold 0.2
+
+Reports throughput, p50/p95/p99 and DB statements per call (X-DB-Queries) for
+each route. --compare exits with 1 when a route regressed beyond --threshold.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import tempfile
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from auth import create_access_token
+from benchmarks.common import drive, summarize, use_database
+from pagination import encode_cursor
+from models import (Admin, Answers, Categories, Course, Forum_Replies, Forum_Topics, Materials, Questions,
+                    Student, Tests, Tests_Attempts)
+
+# path: fungsi (rng, data) -> str; body: fungsi (rng, data, path) -> dict; produces: (pool, field) id hasil create
+# yang dipakai lagi oleh route delete (field boleh tuple); student: fungsi (path) -> student_id untuk route
+# yang hanya boleh dipanggil student itu sendiri (default: token admin)
+Case = namedtuple("Case", "name method path body produces requests student", defaults=(None, None, None, None))
+
+NOW = datetime(2025, 1, 1, 8, 0).isoformat()
+_unique = itertools.count(1)
+
+
+class Dataset:
+    """Sample of existing ids, loaded once from the seeded database."""
+
+    def __init__(self, session, limit=1000):
+        def ids(*columns):
+            rows = session.execute(select(*columns).order_by(columns[0]).limit(limit)).all()
+            return [tuple(row) if len(columns) > 1 else row[0] for row in rows]
+
+        self.admins = ids(Admin.admin_id)
+        self.admin_username = session.scalar(select(Admin.username).order_by(Admin.admin_id).limit(1))
+        self.students = ids(Student.student_id, Student.username)
+        self.categories = ids(Categories.category_id)
+        self.courses = ids(Course.course_id)
+        self.materials = ids(Materials.material_id)
+        self.tests = ids(Tests.test_id, Tests.course_id)
+        self.questions = ids(Questions.question_id, Questions.test_id)
+        self.answers = ids(Answers.answer_id, Answers.question_id)
+        self.topics = ids(Forum_Topics.topic_id, Forum_Topics.course_id)
+        self.replies = ids(Forum_Replies.reply_id, Forum_Replies.topic_id)
+        self.attempts = ids(Tests_Attempts.attempt_id, Tests_Attempts.student_id, Tests_Attempts.test_id)
+
+        # Opsi jawaban per soal untuk test yang punya attempt (dipakai route submit)
+        test_ids = {test_id for _, _, test_id in self.attempts[:50]}
+        options = defaultdict(list)
+        for question_id, answer_id in session.execute(
+                select(Questions.question_id, Answers.answer_id)
+                .outerjoin(Answers, Answers.question_id == Questions.question_id)
+                .where(Questions.test_id.in_(test_ids))):
+            options[question_id].append(answer_id)
+        self.test_questions = defaultdict(list)
+        for question_id, test_id in session.execute(
+                select(Questions.question_id, Questions.test_id).where(Questions.test_id.in_(test_ids))):
+            self.test_questions[test_id].append((question_id, [o for o in options[question_id] if o is not None]))
+        # Username untuk token student (route attempt dicek terhadap student_id di path); student
+        # nonaktif ditolak get_current_user, jadi attempt mereka tidak dipakai route student
+        student_ids = {a[1] for a in self.attempts}
+        self.usernames = dict(session.execute(
+            select(Student.student_id, Student.username)
+            .where(Student.student_id.in_(student_ids), Student.is_active.is_not(False))).all())
+        self.tokens = {}
+        self.student_attempts = [a for a in self.attempts if a[1] in self.usernames]
+        self.submittable = [a for a in self.student_attempts if a[2] in self.test_questions]
+
+        # Id yang dibuat route create, dihapus lagi oleh route delete
+        self.created = defaultdict(list)
+
+    def take(self, pool, default=0):
+        return self.created[pool].pop() if self.created[pool] else default
+
+    def student_headers(self, student_id):
+        token = self.tokens.get(student_id)
+        if token is None:
+            token = self.tokens[student_id] = create_access_token(
+                {"sub": self.usernames[student_id], "role": "student"})
+        return {"Authorization": f"Bearer {token}"}
+
+
+def submission(rng, data, path):
+    # Body bergantung pada test di path: .../submit/{student_id}/{test_id}/{attempt_id}
+    test_id = int(path.rsplit("/", 2)[1])
+    answers = []
+    for question_id, options in data.test_questions[test_id]:
+        if options:
+            answers.append({"question_id": question_id, "answer_id": rng.choice(options)})
+        else:
+            answers.append({"question_id": question_id, "essay_answer": "Benchmark essay"})
+    return {"answers": answers, "completed_at": NOW}
+
+
+def _student(rng, data):
+    return rng.choice(data.students)
+
+
+def _path_student(path):
+    # .../{student_id}/{test_id}[/{attempt_id}]
+    parts = path.split("/")
+    return int(parts[4])
+
+
+def _topic_body(rng, data, course_id):
+    return {"course_id": course_id, "student_id": _student(rng, data)[0], "title": "Bench topic",
+            "content": "Benchmark", "created_at": NOW, "is_pinned": False, "is_closed": False}
+
+
+def _reply_body(rng, data, topic_id):
+    return {"topic_id": topic_id, "student_id": _student(rng, data)[0], "admin_id": rng.choice(data.admins),
+            "content": "Benchmark", "created_at": NOW, "upvotes": 0}
+
+
+def _attempt_body(rng, data, student_id, test_id, completed=True):
+    body = {"test_id": test_id, "student_id": student_id, "started_at": NOW}
+    if completed:
+        body.update({"completed_at": NOW, "score": 0, "passed": False, "total_time": 60})
+    return body
+
+
+def _open_attempt(rng, data):
+    # Save dan submit hanya untuk attempt yang belum di-submit (yang dibuat route create);
+    # dengan --only tanpa create, attempt seeder yang sudah selesai dibalas 409
+    return rng.choice(data.created["attempt"] or data.submittable)
+
+
+def _submit_attempt(rng, data):
+    # Tiap attempt hanya bisa di-submit sekali; setelah itu tetap bisa dihapus route delete
+    if not data.created["attempt"]:
+        return rng.choice(data.submittable)
+    attempt = data.created["attempt"].pop()
+    data.created["submitted"].append(attempt)
+    return attempt
+
+
+def _register(rng, data, path):
+    n = next(_unique)
+    return {"username": f"bench{n}_{rng.getrandbits(32)}", "password": "password", "first_name": "Bench",
+            "last_name": str(n), "email": f"bench{n}_{rng.getrandbits(32)}@example.com"}
+
+
+def _course_body(rng, data, **extra):
+    return {"title": "Bench course", "description": "Benchmark", "category_id": rng.choice(data.categories),
+            "admin_id": rng.choice(data.admins), **extra}
+
+
+def _material_body(rng, data, course_id):
+    return {"course_id": course_id, "title": "Bench material", "description": "Benchmark",
+            "material_type": "pdf", "upload_at": NOW, "admin_id": rng.choice(data.admins)}
+
+
+# Urutan penting: create dulu, delete memakai id hasil create. bcrypt mahal,
+# jadi route auth memakai jumlah request sendiri (--auth-requests)
+CASES = [
+    Case("POST /auth/register", "POST", lambda r, d: "/auth/register", _register, requests="auth"),
+    Case("POST /auth/login", "POST", lambda r, d: "/auth/login",
+         lambda r, d, p: {"username": _student(r, d)[1], "password": "password"}, requests="auth"),
+
+    Case("GET /home/home/{student_id}", "GET", lambda r, d: f"/home/home/{_student(r, d)[0]}"),
+
+    # Halaman acak di tengah daftar: cursor = id baris terakhir halaman sebelumnya
+    Case("GET /course/", "GET", lambda r, d: f"/course/?cursor={encode_cursor([r.choice(d.courses)])}&limit=10"),
+    Case("GET /course/?facets", "GET",
+         lambda r, d: f"/course/?category_id={r.choice(d.categories)}&material_type=video&facets=true&limit=10"),
+    Case("GET /course/facets", "GET", lambda r, d: "/course/facets"),
+    Case("GET /course/detail/{course_id}", "GET", lambda r, d: f"/course/detail/{r.choice(d.courses)}"),
+    Case("GET /course/detail/{course_id}/full", "GET", lambda r, d: f"/course/detail/{r.choice(d.courses)}/full"),
+    Case("POST /course/create/{admin_id}", "POST", lambda r, d: f"/course/create/{r.choice(d.admins)}",
+         lambda r, d, p: _course_body(r, d, created_at=NOW), produces=("course", "course_id")),
+    Case("PUT /course/update/{course_id}", "PUT", lambda r, d: f"/course/update/{r.choice(d.courses)}",
+         lambda r, d, p: _course_body(r, d, updated_at=NOW)),
+
+    Case("GET /material/", "GET", lambda r, d: f"/material/?cursor={encode_cursor([r.choice(d.materials)])}&limit=10"),
+    Case("GET /material/detail/{material_id}", "GET", lambda r, d: f"/material/detail/{r.choice(d.materials)}"),
+    Case("POST /material/create/{course_id}", "POST", lambda r, d: f"/material/create/{r.choice(d.courses)}",
+         lambda r, d, p: _material_body(r, d, r.choice(d.courses)), produces=("material", "material_id")),
+    Case("PUT /material/update/{material_id}", "PUT", lambda r, d: f"/material/update/{r.choice(d.materials)}",
+         lambda r, d, p: _material_body(r, d, r.choice(d.courses))),
+
+    Case("GET /answer/", "GET", lambda r, d: "/answer/?limit=10"),
+    Case("GET /answer/detail/{answer_id}", "GET", lambda r, d: f"/answer/detail/{r.choice(d.answers)[0]}"),
+    Case("POST /answer/create/", "POST", lambda r, d: "/answer/create/",
+         lambda r, d, p: {"answer_id": 10 ** 9 + next(_unique), "question_id": r.choice(d.questions)[0],
+                       "answer_text": "Bench", "is_correct": False, "explanation": "Benchmark"},
+         produces=("answer", "answer_id")),
+    Case("PUT /answer/update/{answer_id}", "PUT", lambda r, d: f"/answer/update/{r.choice(d.answers)[0]}",
+         lambda r, d, p: {"answer_id": 0, "question_id": 0, "answer_text": "Bench", "is_correct": False,
+                       "explanation": "Benchmark"}),
+
+    Case("GET /quiz/test/{test_id}", "GET", lambda r, d: f"/quiz/test/{r.choice(d.tests)[0]}"),
+    Case("GET /quiz/test/{test_id}/full", "GET", lambda r, d: f"/quiz/test/{r.choice(d.tests)[0]}/full"),
+    Case("GET /quiz/question/{test_id}/{question_id}", "GET",
+         lambda r, d: "/quiz/question/{1}/{0}".format(*r.choice(d.questions))),
+    Case("GET /quiz/answer/{test_id}/{question_id}/{answer_id}", "GET",
+         lambda r, d: "/quiz/answer/0/{1}/{0}".format(*r.choice(d.answers))),
+    Case("GET /quiz/answers/{test_id}/{question_id}", "GET",
+         lambda r, d: "/quiz/answers/{1}/{0}".format(*r.choice(d.questions))),
+    Case("POST /quiz/test/create", "POST", lambda r, d: "/quiz/test/create",
+         lambda r, d, p: {"course_id": r.choice(d.courses), "test_id": 10 ** 9 + next(_unique), "title": "Bench",
+                       "description": "Benchmark", "pass_percentage": 70, "time_limit": 30,
+                       "admin_id": r.choice(d.admins)},
+         produces=("test", "test_id")),
+    Case("PUT /quiz/test/update/{test_id}", "PUT", lambda r, d: "/quiz/test/update/{0}".format(*r.choice(d.tests)),
+         lambda r, d, p: {"course_id": 0, "test_id": 0, "title": "Bench", "description": "Benchmark",
+                       "pass_percentage": 70, "time_limit": 30, "admin_id": r.choice(d.admins)}),
+    Case("POST /quiz/question/create/{test_id}", "POST", lambda r, d: "/quiz/question/create/{0}".format(*r.choice(d.tests)),
+         lambda r, d, p: {"test_id": r.choice(d.tests)[0], "question_id": 10 ** 9 + next(_unique), "question": "Bench",
+                       "question_type": "multiple_choice", "marks": 1, "admin_id": r.choice(d.admins)},
+         produces=("question", "question_id")),
+    Case("PUT /quiz/question/update/{test_id}/{question_id}", "PUT",
+         lambda r, d: "/quiz/question/update/{1}/{0}".format(*r.choice(d.questions)),
+         lambda r, d, p: {"test_id": 0, "question_id": 0, "question": "Bench", "question_type": "multiple_choice",
+                       "marks": 1, "admin_id": r.choice(d.admins)}),
+    Case("POST /quiz/answer/create/{test_id}/{question_id}", "POST",
+         lambda r, d: "/quiz/answer/create/{1}/{0}".format(*r.choice(d.questions)),
+         lambda r, d, p: {"question_id": r.choice(d.questions)[0], "answer_id": 10 ** 9 + next(_unique), "answer": "Bench",
+                       "is_correct": False, "admin_id": r.choice(d.admins)},
+         produces=("quiz_answer", "answer_id")),
+    Case("PUT /quiz/answer/update/{test_id}/{question_id}/{answer_id}", "PUT",
+         lambda r, d: "/quiz/answer/update/0/{1}/{0}".format(*r.choice(d.answers)),
+         lambda r, d, p: {"question_id": 0, "answer_id": 0, "answer": "Bench", "is_correct": False,
+                       "admin_id": r.choice(d.admins)}),
+
+    Case("GET /forum/topics/{course_id}", "GET", lambda r, d: f"/forum/topics/{r.choice(d.topics)[1]}"),
+    Case("GET /forum/replies/{topic_id}", "GET", lambda r, d: f"/forum/replies/{r.choice(d.topics)[0]}"),
+    Case("POST /forum/create/topic/{course_id}", "POST", lambda r, d: f"/forum/create/topic/{r.choice(d.courses)}",
+         lambda r, d, p: _topic_body(r, d, r.choice(d.courses)), produces=("topic", "topic_id")),
+    Case("POST /forum/create/reply/{topic_id}", "POST", lambda r, d: f"/forum/create/reply/{r.choice(d.topics)[0]}",
+         lambda r, d, p: _reply_body(r, d, r.choice(d.topics)[0]), produces=("reply", "reply_id")),
+    Case("PUT /forum/update/topic/{topic_id}", "PUT", lambda r, d: "/forum/update/topic/{0}".format(*r.choice(d.topics)),
+         lambda r, d, p: _topic_body(r, d, r.choice(d.courses))),
+    Case("PUT /forum/update/reply/{reply_id}", "PUT", lambda r, d: "/forum/update/reply/{0}".format(*r.choice(d.replies)),
+         lambda r, d, p: _reply_body(r, d, r.choice(d.topics)[0])),
+
+    Case("GET /testAttempt/attempt/{student_id}/{test_id}/{attempt_id}", "GET",
+         lambda r, d: "/testAttempt/attempt/{1}/{2}/{0}".format(*r.choice(d.attempts))),
+    Case("GET /testAttempt/attempts/{student_id}/{test_id}", "GET",
+         lambda r, d: "/testAttempt/attempts/{1}/{2}".format(*r.choice(d.attempts))),
+    Case("POST /testAttempt/attempt/create/{student_id}/{test_id}", "POST",
+         lambda r, d: "/testAttempt/attempt/create/{1}/{2}".format(*r.choice(d.submittable)),
+         lambda r, d, p: _attempt_body(r, d, *map(int, p.split("/")[-2:]), completed=False),
+         produces=("attempt", ("attempt_id", "student_id", "test_id")), student=_path_student),
+    Case("PUT /testAttempt/attempt/update/{student_id}/{test_id}/{attempt_id}", "PUT",
+         lambda r, d: "/testAttempt/attempt/update/{1}/{2}/{0}".format(*r.choice(d.attempts)),
+         lambda r, d, p: _attempt_body(r, d, *map(int, p.split("/")[-3:-1]))),
+    Case("PUT /testAttempt/attempt/save/{student_id}/{test_id}/{attempt_id}", "PUT",
+         lambda r, d: "/testAttempt/attempt/save/{1}/{2}/{0}".format(*_open_attempt(r, d)), submission,
+         student=_path_student),
+    Case("POST /testAttempt/attempt/submit/{student_id}/{test_id}/{attempt_id}", "POST",
+         lambda r, d: "/testAttempt/attempt/submit/{1}/{2}/{0}".format(*_submit_attempt(r, d)), submission,
+         student=_path_student),
+    Case("POST /testAttempt/attempt/calculate_score/{student_id}/{test_id}/{attempt_id}", "POST",
+         lambda r, d: "/testAttempt/attempt/calculate_score/{1}/{2}/{0}".format(*r.choice(d.submittable)),
+         student=_path_student),
+
+    Case("DELETE /course/delete/{course_id}", "DELETE", lambda r, d: f"/course/delete/{d.take('course')}"),
+    Case("DELETE /material/delete/{material_id}", "DELETE", lambda r, d: f"/material/delete/{d.take('material')}"),
+    Case("DELETE /answer/delete/{answer_id}", "DELETE", lambda r, d: f"/answer/delete/{d.take('answer')}"),
+    Case("DELETE /quiz/answer/delete/{test_id}/{question_id}/{answer_id}", "DELETE",
+         lambda r, d: f"/quiz/answer/delete/0/0/{d.take('quiz_answer')}"),
+    Case("DELETE /quiz/question/delete/{test_id}/{question_id}", "DELETE",
+         lambda r, d: f"/quiz/question/delete/0/{d.take('question')}"),
+    Case("DELETE /quiz/test/delete/{test_id}", "DELETE", lambda r, d: f"/quiz/test/delete/{d.take('test')}"),
+    Case("DELETE /forum/delete/reply/{reply_id}", "DELETE", lambda r, d: f"/forum/delete/reply/{d.take('reply')}"),
+    Case("DELETE /forum/delete/topic/{topic_id}", "DELETE", lambda r, d: f"/forum/delete/topic/{d.take('topic')}"),
+    Case("DELETE /testAttempt/attempt/delete/{student_id}/{test_id}/{attempt_id}", "DELETE",
+         lambda r, d: "/testAttempt/attempt/delete/{1}/{2}/{0}".format(
+             *(d.take("attempt", None) or d.take("submitted", (0, 0, 0))))),
+]
+
+
+def build_requests(case, rng, data, n):
+    requests = []
+    for _ in range(n):
+        path = case.path(rng, data)
+        headers = data.student_headers(case.student(path)) if case.student else None
+        requests.append((case.method, path, case.body(rng, data, path) if case.body else None, headers))
+    return requests
+
+
+async def run_case(client, case, data, n, concurrency, seed):
+    rng = random.Random(seed)
+    warmup = build_requests(case, rng, data, max(1, n // 10))
+    requests = build_requests(case, rng, data, n)
+    queries, statuses = [], Counter()
+
+    def on_response(response):
+        statuses[response.status_code] += 1
+        queries.append(int(response.headers.get("X-DB-Queries", 0)))
+        if case.produces and response.status_code < 400:
+            pool, field = case.produces
+            body = response.json()
+            data.created[pool].append(tuple(body[f] for f in field) if isinstance(field, tuple) else body[field])
+
+    # Id yang dibuat saat warm-up tetap dipakai route delete
+    await drive(client, warmup, concurrency, on_response)
+    queries.clear()
+    statuses.clear()
+    samples, errors, wall = await drive(client, requests, concurrency, on_response)
+    result = summarize(samples)
+    result["req_per_s"] = round(len(samples) / wall, 1) if wall else 0.0
+    result["db_queries"] = round(sum(queries) / len(queries), 2) if queries else 0.0
+    result["errors"] = len(errors)
+    result["statuses"] = {str(code): count for code, count in sorted(statuses.items())}
+    return result
+
+
+async def run(app, data, requests, auth_requests, concurrency, only=None, seed=7):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    report = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Route yang mengubah data butuh token; seeder memberi semua user password "password"
+        response = await client.post("/auth/login", json={"username": data.admin_username, "password": "password"})
+        response.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        for i, case in enumerate(CASES):
+            if only and not any(part in case.name for part in only):
+                continue
+            n = auth_requests if case.requests == "auth" else requests
+            report[case.name] = await run_case(client, case, data, n, concurrency, seed + i)
+            line = report[case.name]
+            print(f"{case.name:<80} {line['req_per_s']:>9.1f}/s p50={line['p50_ms']:8.2f} "
+                  f"p95={line['p95_ms']:8.2f} p99={line['p99_ms']:8.2f} q={line['db_queries']:5.1f} "
+                  f"err={line['errors']}", flush=True)
+    return report
+
+
+def compare(baseline, current, threshold):
+    """Routes whose p95/throughput moved more than `threshold` (fraction) or that
+    now issue more statements or fail more often than in `baseline`."""
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append((name, "p95_ms", before["p95_ms"], now["p95_ms"]))
+        if before["req_per_s"] and now["req_per_s"] < before["req_per_s"] * (1 - threshold):
+            regressions.append((name, "req_per_s", before["req_per_s"], now["req_per_s"]))
+        # Jumlah statement deterministik: naik sedikit pun berarti regresi
+        if now["db_queries"] > before["db_queries"] + 0.5:
+            regressions.append((name, "db_queries", before["db_queries"], now["db_queries"]))
+        if now["errors"] > before["errors"]:
+            regressions.append((name, "errors", before["errors"], now["errors"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="sync URL (default: temp SQLite file)")
+    parser.add_argument("--no-seed", action="store_true", help="use the data already in --db")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--auth-requests", type=int, default=20, help="requests per auth route (bcrypt)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="only routes whose name contains one of these")
+    parser.add_argument("--save", help="write the report as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative change (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    url = args.db or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    if not args.no_seed:
+        from seeder import generate
+
+        generate(url, students=args.students, courses=args.courses, attempts=args.attempts)
+    engine = use_database(url)
+    with Session(engine) as session:
+        data = Dataset(session)
+
+    from main import create_app
+
+    routes = asyncio.run(run(create_app(async_db=False, rate_limit=False), data, args.requests, args.auth_requests,
+                             args.concurrency, args.only))
+    report = {
+        "meta": {
+            "dialect": engine.dialect.name, "python": platform.python_version(), "machine": platform.machine(),
+            "requests": args.requests, "concurrency": args.concurrency, "created_at": datetime.now().isoformat(),
+        },
+        "routes": routes,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+        regressions = compare(baseline, routes, args.threshold)
+        for name, metric, before, now in regressions:
+            print(f"REGRESSION {name}: {metric} {before} -> {now}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
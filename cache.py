@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL. ttl=None keeps entries until evicted."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_build(self, key, build, lock):
+        """Return the cached value or build it once; concurrent callers wait on `lock`
+        instead of all hitting the database (single flight)."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = build()
+                self.set(key, value)
+            return value
+
+    async def get_or_build_async(self, key, build, lock):
+        """Async variant of get_or_build; `build` is a coroutine function and `lock` an asyncio.Lock."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        async with lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = await build()
+                self.set(key, value)
+            return value
+
+
+class KeyedLocks:
+    """One lock per key, so building test 1 doesn't block building test 2.
+
+    Use KeyedLocks(asyncio.Lock) for coroutines: a threading.Lock held across an
+    await would block the event loop."""
+
+    def __init__(self, factory=threading.Lock):
+        self._factory = factory
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = self._factory()
+            return lock
+
+
+class Versions:
+    """Monotonic per-key version counters used to build cache keys.
+
+    Counters live in this process; cache_sync.VersionSync forwards bumps to the
+    other workers (through `publish`) so their caches are invalidated too."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.publish = None  # dipasang VersionSync.attach(): fungsi (name, key)
+        self._versions = {}
+        self._epoch = 0  # versi awal semua key yang belum pernah di-bump
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._versions.get(key, self._epoch)
+
+    def bump(self, key, publish=True):
+        with self._lock:
+            version = self._versions.get(key, self._epoch)
+            self._versions[key] = version + 1
+        if publish and self.publish is not None:
+            self.publish(self.name, key)
+        return version
+
+    def reset(self):
+        """Move every key to a version never used before (all cached entries become stale)."""
+        with self._lock:
+            self._epoch = max(self._epoch, *self._versions.values()) + 1
+            self._versions.clear()
+
+
+# Versi per test_id; naik setiap test, soal, atau jawaban diubah.
+test_versions = Versions("test")
+# Versi per course_id untuk course_snapshot; naik setiap course, materi, test, atau soal diubah.
+course_versions = Versions("course")
+# Versi katalog untuk facets.py (satu key, "facets"); naik setiap course atau materi diubah.
+catalog_versions = Versions("catalog")
+# Versi per student_id untuk dashboard.py; naik setiap enrollment, attempt, atau sertifikat student itu diubah.
+student_versions = Versions("student")
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from cache import catalog_versions, course_versions, student_versions, test_versions
+from database import SessionLocal
+from models import Cache_Invalidations
+
+logger = logging.getLogger("ureeka.cache_sync")
+
+# Versi cache (cache.Versions) ada di memori tiap worker. Setiap bump ditulis ke
+# tabel cache_invalidations dan tiap worker membaca baris baru dari worker lain
+# tiap CACHE_SYNC_INTERVAL detik, jadi answer key / snapshot yang diubah di
+# worker A paling lambat ~2x interval kemudian juga dibangun ulang di worker B.
+# CACHE_SYNC=0 mematikannya (hanya aman dengan satu worker).
+CACHE_SYNC = os.getenv("CACHE_SYNC", "1") != "0"
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", "1"))
+# Baris lebih tua dari ini dihapus; worker yang tertinggal lebih lama membuang seluruh cache-nya
+CACHE_SYNC_RETENTION = float(os.getenv("CACHE_SYNC_RETENTION", "3600"))
+# Antrean bump yang belum tertulis (mis. database putus); lebih dari ini yang terlama dibuang
+CACHE_SYNC_MAX_PENDING = 10000
+# Transaksi bisa commit tidak urut id, jadi sekian id terakhir selalu dibaca ulang
+LOOKBACK_IDS = 100
+
+
+class VersionSync:
+    """Forwards Versions.bump() between worker processes through the database.
+
+    Bumps are queued and written by the sync thread (requests don't wait for
+    the INSERT); the same thread applies other workers' bumps locally."""
+
+    def __init__(self, versions, session_factory=SessionLocal, interval=CACHE_SYNC_INTERVAL,
+                 retention=CACHE_SYNC_RETENTION):
+        self.versions = {v.name: v for v in versions}
+        self.session_factory = session_factory
+        self.interval = interval
+        self.retention = retention
+        self.origin = uuid.uuid4().hex
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_id = None
+        self._seen = set()  # id dalam jendela LOOKBACK_IDS yang sudah diproses
+        self._failing = False
+        self.applied = 0
+        self.dropped = 0
+
+    def attach(self):
+        for versions in self.versions.values():
+            versions.publish = self.publish
+
+    def publish(self, name, key):
+        with self._lock:
+            self._pending.append({"name": name, "key": json.dumps(key), "origin": self.origin,
+                                  "created_at": datetime.utcnow()})
+            if len(self._pending) > CACHE_SYNC_MAX_PENDING:
+                del self._pending[0]
+                self.dropped += 1
+        self._wake.set()
+
+    def _apply(self, name, key):
+        versions = self.versions.get(name)
+        if versions is not None:
+            versions.bump(json.loads(key), publish=False)
+            self.applied += 1
+
+    def _reset_all(self):
+        # Bump yang terlewat sudah terhapus dari tabel: anggap semua key berubah
+        for versions in self.versions.values():
+            versions.reset()
+
+    def sync(self):
+        """Write queued bumps, then apply bumps made by other workers since the last call."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        try:
+            with self.session_factory() as db:
+                if pending:
+                    db.execute(insert(Cache_Invalidations), pending)
+                    db.commit()
+                starting = self._last_id is None
+                if not starting:
+                    oldest = db.execute(select(func.min(Cache_Invalidations.invalidation_id))).scalar()
+                    if oldest is not None and oldest > self._last_id + 1:
+                        self._reset_all()
+                if starting:
+                    # Start: cache masih kosong, cukup tandai baris terakhir sebagai sudah dibaca
+                    last_id = db.execute(select(func.max(Cache_Invalidations.invalidation_id))).scalar() or 0
+                    floor = last_id - LOOKBACK_IDS
+                else:
+                    floor = self._last_id - LOOKBACK_IDS
+                rows = db.execute(
+                    select(Cache_Invalidations.invalidation_id, Cache_Invalidations.name,
+                           Cache_Invalidations.key, Cache_Invalidations.origin)
+                    .where(Cache_Invalidations.invalidation_id > floor)
+                    .order_by(Cache_Invalidations.invalidation_id)
+                ).all()
+        except Exception:
+            if not self._failing:
+                logger.exception("Cache invalidation sync failed, retrying every %ss", self.interval)
+            self._failing = True
+            with self._lock:
+                self._pending[:0] = pending
+                overflow = len(self._pending) - CACHE_SYNC_MAX_PENDING
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    self.dropped += overflow
+            return 0
+        self._failing = False
+        applied = 0
+        for invalidation_id, name, key, origin in rows:
+            if invalidation_id in self._seen:
+                continue
+            self._seen.add(invalidation_id)
+            if origin != self.origin and not starting:
+                self._apply(name, key)
+                applied += 1
+        self._last_id = max([self._last_id or 0, *self._seen])
+        self._seen = {i for i in self._seen if i > self._last_id - LOOKBACK_IDS}
+        return applied
+
+    def prune(self):
+        with self.session_factory() as db:
+            db.execute(delete(Cache_Invalidations).where(
+                Cache_Invalidations.created_at < datetime.utcnow() - timedelta(seconds=self.retention)))
+            db.commit()
+
+    def _run(self):
+        ticks = 0
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.sync()
+            ticks += 1
+            if ticks * self.interval >= 60:
+                ticks = 0
+                try:
+                    self.prune()
+                except Exception:
+                    logger.exception("Pruning cache invalidations failed")
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.attach()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-sync", daemon=True)
+        self.sync()
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sync thread and write bumps that are still queued (app shutdown)."""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=self.interval + 5)
+        with self._lock:
+            pending = bool(self._pending)
+        if pending:
+            self.sync()
+
+    def stats(self):
+        return {"enabled": self._thread is not None, "interval_s": self.interval, "pending": len(self._pending),
+                "applied": self.applied, "dropped": self.dropped, "last_id": self._last_id, "failing": self._failing}
+
+
+version_sync = VersionSync([test_versions, course_versions, catalog_versions, student_versions])
@@ -1,20 +1,37 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import SessionLocal
-from models import Course
+from auth import require_admin
+from course_snapshot import get_course_snapshot, get_course_snapshot_async, invalidate_course
+from database import get_db, get_async_db
+from facets import MATERIAL_TYPES, get_facets, get_facets_async, invalidate_facets
+from http_cache import COURSE_DETAIL_CACHE, COURSE_LIST_CACHE, conditional, content_etag, row_etag
+from models import Course, Materials
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Keyset
+from autocomplete import autocomplete
+from search_index import search_index
 from pydantic import BaseModel
 from typing import Optional
 
 course_router = APIRouter()
+# Versi async untuk katalog, dipasang main.py kalau DB_ASYNC=1
+course_async_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+COURSE_KEYSET = Keyset(Course.course_id)
+MATERIAL_TYPE_PATTERN = "^(" + "|".join(MATERIAL_TYPES) + ")$"
+
+def filter_courses(query, category_id=None, material_type=None):
+    # Filter list course; facets.py menghitung facet untuk kombinasi filter yang sama
+    if category_id is not None:
+        query = query.filter(Course.category_id == category_id)
+    if material_type is not None:
+        query = query.filter(
+            exists().where(Materials.course_id == Course.course_id, Materials.enum == material_type)
+        )
+    return query
 
 class CourseCreate(BaseModel):
     title: str
@@ -43,8 +60,26 @@ class CourseOut(BaseModel):
     class Config:
         orm_mode: True        
 
+class CategoryFacet(BaseModel):
+    category_id: int
+    name: str
+    count: int
+
+class MaterialTypeFacet(BaseModel):
+    material_type: str
+    count: int
+
+class CourseFacets(BaseModel):
+    categories: List[CategoryFacet]
+    material_types: List[MaterialTypeFacet]
+
+class CoursePage(BaseModel):
+    items: List[CourseOut]
+    next_cursor: Optional[str] = None
+    facets: Optional[CourseFacets] = None
+
 # create
-@course_router.post("/create/{admin_id}", response_model=CourseOut, status_code=status.HTTP_201_CREATED)
+@course_router.post("/create/{admin_id}", response_model=CourseOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
 def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     new_course = Course(
         title=course.title,
@@ -57,24 +92,62 @@ def create_course(course: CourseCreate, db: Session = Depends(get_db)):
     db.add(new_course)
     db.commit()
     db.refresh(new_course)
+    invalidate_course(new_course.course_id)
+    invalidate_facets()
+    search_index.course_changed(new_course)
+    autocomplete.course_changed(new_course)
     return new_course
 
-#list all course
-@course_router.get("/", response_model=List[CourseOut])
-def read_courses(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    courses = db.query(Course).offset(skip).limit(limit).all()
-    return courses
+#list all course, facets=true ikut mengembalikan facet untuk filter yang sama
+@course_router.get("/", response_model=CoursePage)
+def read_courses(request: Request, response: Response, cursor: Optional[str] = None,
+                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                 category_id: Optional[int] = None,
+                 material_type: Optional[str] = Query(None, pattern=MATERIAL_TYPE_PATTERN),
+                 facets: bool = False, db: Session = Depends(get_db)):
+    query = filter_courses(db.query(Course), category_id, material_type)
+    courses, next_cursor = COURSE_KEYSET.page(COURSE_KEYSET.apply(query, cursor, limit).all(), limit)
+    course_facets = get_facets(db, category_id, material_type) if facets else None
+    not_modified = conditional(request, response, row_etag(*courses, next_cursor, course_facets),
+                               policy=COURSE_LIST_CACHE)
+    if not_modified:
+        return not_modified
+    return {"items": courses, "next_cursor": next_cursor, "facets": course_facets}
+
+# facet sidebar katalog saja (tanpa list)
+@course_router.get("/facets", response_model=CourseFacets)
+def read_course_facets(request: Request, response: Response, category_id: Optional[int] = None,
+                       material_type: Optional[str] = Query(None, pattern=MATERIAL_TYPE_PATTERN),
+                       db: Session = Depends(get_db)):
+    course_facets = get_facets(db, category_id, material_type)
+    not_modified = conditional(request, response, row_etag(course_facets), policy=COURSE_LIST_CACHE)
+    if not_modified:
+        return not_modified
+    return course_facets
 
 #detail course
 @course_router.get("/detail/{course_id}", response_model=CourseOut)
-def read_course(course_id: int, db: Session = Depends(get_db)):
+def read_course(course_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     course = db.query(Course).filter(Course.course_id == course_id).first()
     if course is None:
         raise HTTPException(status_code=404, detail="Course not found")
+    not_modified = conditional(request, response, row_etag(course), course.updated_at or course.created_at,
+                               COURSE_DETAIL_CACHE)
+    if not_modified:
+        return not_modified
     return course
 
+# halaman course lengkap (course, kategori, materi, test, enrollment) dalam satu request
+@course_router.get("/detail/{course_id}/full")
+def read_course_full(course_id: int, request: Request, db: Session = Depends(get_db)):
+    snapshot = get_course_snapshot(db, course_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    response = Response(content=snapshot, media_type="application/json")
+    return conditional(request, response, content_etag(snapshot), policy=COURSE_DETAIL_CACHE) or response
+
 # update course
-@course_router.put("/update/{course_id}", response_model=CourseOut)
+@course_router.put("/update/{course_id}", response_model=CourseOut, dependencies=[Depends(require_admin)])
 def update_course(course_id: int, course: CourseUpdate, db: Session = Depends(get_db)):
     db_course = db.query(Course).filter(Course.course_id == course_id).first()
     if db_course is None:
@@ -88,10 +161,14 @@ def update_course(course_id: int, course: CourseUpdate, db: Session = Depends(ge
     
     db.commit()
     db.refresh(db_course)
+    invalidate_course(course_id)
+    invalidate_facets()
+    search_index.course_changed(db_course)
+    autocomplete.course_changed(db_course)
     return db_course
 
 #delete course
-@course_router.delete("/delete/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
+@course_router.delete("/delete/{course_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
 def delete_course(course_id: int, db: Session = Depends(get_db)):
     db_course = db.query(Course).filter(Course.course_id == course_id).first()
     if db_course is None:
@@ -99,4 +176,54 @@ def delete_course(course_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_course)
     db.commit()
-    return {"message": "Course deleted successfully"}
\ No newline at end of file
+    invalidate_course(course_id)
+    invalidate_facets()
+    search_index.course_deleted(course_id)
+    autocomplete.course_deleted(course_id)
+    return {"message": "Course deleted successfully"}
+
+@course_async_router.get("/", response_model=CoursePage)
+async def read_courses_async(request: Request, response: Response, cursor: Optional[str] = None,
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             category_id: Optional[int] = None,
+                             material_type: Optional[str] = Query(None, pattern=MATERIAL_TYPE_PATTERN),
+                             facets: bool = False, db: AsyncSession = Depends(get_async_db)):
+    query = filter_courses(select(Course), category_id, material_type)
+    result = await db.execute(COURSE_KEYSET.apply(query, cursor, limit))
+    courses, next_cursor = COURSE_KEYSET.page(result.scalars(), limit)
+    course_facets = await get_facets_async(db, category_id, material_type) if facets else None
+    not_modified = conditional(request, response, row_etag(*courses, next_cursor, course_facets),
+                               policy=COURSE_LIST_CACHE)
+    if not_modified:
+        return not_modified
+    return {"items": courses, "next_cursor": next_cursor, "facets": course_facets}
+
+@course_async_router.get("/facets", response_model=CourseFacets)
+async def read_course_facets_async(request: Request, response: Response, category_id: Optional[int] = None,
+                                   material_type: Optional[str] = Query(None, pattern=MATERIAL_TYPE_PATTERN),
+                                   db: AsyncSession = Depends(get_async_db)):
+    course_facets = await get_facets_async(db, category_id, material_type)
+    not_modified = conditional(request, response, row_etag(course_facets), policy=COURSE_LIST_CACHE)
+    if not_modified:
+        return not_modified
+    return course_facets
+
+@course_async_router.get("/detail/{course_id}", response_model=CourseOut)
+async def read_course_async(course_id: int, request: Request, response: Response,
+                            db: AsyncSession = Depends(get_async_db)):
+    course = await db.get(Course, course_id)
+    if course is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    not_modified = conditional(request, response, row_etag(course), course.updated_at or course.created_at,
+                               COURSE_DETAIL_CACHE)
+    if not_modified:
+        return not_modified
+    return course
+
+@course_async_router.get("/detail/{course_id}/full")
+async def read_course_full_async(course_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    snapshot = await get_course_snapshot_async(db, course_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    response = Response(content=snapshot, media_type="application/json")
+    return conditional(request, response, content_etag(snapshot), policy=COURSE_DETAIL_CACHE) or response
@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from cache import KeyedLocks, LRUCache, course_versions
+from models import Course, Enrollments, Questions, Tests
+from routing import reads_primary
+
+# Halaman course (course + kategori + materi + test + jumlah soal + jumlah
+# enrollment) dalam satu JSON yang sudah di-serialize, key = (course_id, version).
+# Version naik lewat invalidate_course() di write course/material/test/soal.
+# Belum ada route yang menulis enrollment, jadi jumlahnya ikut segar lewat TTL.
+_snapshots = LRUCache(maxsize=1024, ttl=300)
+_build_locks = KeyedLocks()
+_async_build_locks = KeyedLocks(asyncio.Lock)
+
+
+def invalidate_course(course_id):
+    if course_id is None:
+        return
+    version = course_versions.bump(course_id)
+    _snapshots.delete((course_id, version))
+
+
+def invalidate_course_of_test(db: Session, test_id):
+    invalidate_course(db.query(Tests.course_id).filter(Tests.test_id == test_id).scalar())
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+@reads_primary
+def build_course_snapshot(db: Session, course_id: int):
+    # 4 statement: course, kategori, materi, test (selectinload per relasi)
+    course = (
+        db.query(Course)
+        .options(selectinload(Course.categories), selectinload(Course.materials), selectinload(Course.tests))
+        .filter(Course.course_id == course_id)
+        .first()
+    )
+    if course is None:
+        return None
+
+    # +2 statement: jumlah soal semua test sekaligus (GROUP BY) dan jumlah enrollment
+    test_ids = [t.test_id for t in course.tests]
+    question_counts = dict(
+        db.execute(
+            select(Questions.test_id, func.count(Questions.question_id))
+            .where(Questions.test_id.in_(test_ids))
+            .group_by(Questions.test_id)
+        ).all()
+    ) if test_ids else {}
+    enrollment_count = db.execute(
+        select(func.count(Enrollments.enrollment_id)).where(Enrollments.course_id == course_id)
+    ).scalar()
+
+    category = course.categories
+    payload = {
+        "course": {
+            "course_id": course.course_id,
+            "title": course.title,
+            "description": course.description,
+            "category_id": course.category_id,
+            "created_at": _iso(course.created_at),
+            "updated_at": _iso(course.updated_at),
+            "admin_id": course.admin_id,
+        },
+        "category": {
+            "category_id": category.category_id,
+            "name": category.name,
+            "description": category.description,
+        } if category is not None else None,
+        "materials": [
+            {
+                "material_id": m.material_id,
+                "title": m.title,
+                "description": m.description,
+                "material_type": m.enum,
+                "upload_at": _iso(m.upload_at),
+            }
+            for m in sorted(course.materials, key=lambda m: m.material_id)
+        ],
+        "tests": [
+            {
+                "test_id": t.test_id,
+                "title": t.title,
+                "description": t.description,
+                "pass_percentage": t.pass_percentage,
+                "time_limit": t.time_limit,
+                "question_count": question_counts.get(t.test_id, 0),
+            }
+            for t in sorted(course.tests, key=lambda t: t.test_id)
+        ],
+        "enrollment_count": enrollment_count,
+    }
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def get_course_snapshot(db: Session, course_id: int):
+    """Return the pre-serialized course page JSON, or None if the course doesn't exist."""
+    version = course_versions.get(course_id)
+    return _snapshots.get_or_build(
+        (course_id, version),
+        lambda: build_course_snapshot(db, course_id),
+        _build_locks(course_id),
+    )
+
+
+async def get_course_snapshot_async(db: AsyncSession, course_id: int):
+    version = course_versions.get(course_id)
+
+    async def build():
+        return await db.run_sync(build_course_snapshot, course_id)
+
+    return await _snapshots.get_or_build_async((course_id, version), build, _async_build_locks(course_id))
@@ -0,0 +1,147 @@
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from cache import KeyedLocks, LRUCache, student_versions
+from models import Certificates, Course, Enrollments, Student, Tests, Tests_Attempts
+from routing import reads_primary
+
+# Dashboard student: semua course yang di-enroll (progress, selesai atau belum),
+# attempt test terakhir per course, dan status sertifikat. Selalu 3 statement,
+# berapa pun jumlah course-nya. Disimpan sebagai JSON yang sudah di-serialize,
+# key = (student_id, version); version naik lewat invalidate_student() di write
+# attempt. Belum ada route yang menulis enrollment atau sertifikat; route baru
+# untuk itu harus memanggil invalidate_student() juga. Perubahan judul course
+# ikut segar lewat TTL.
+_dashboards = LRUCache(maxsize=4096, ttl=300)
+_build_locks = KeyedLocks()
+
+
+def invalidate_student(student_id):
+    if student_id is None:
+        return
+    version = student_versions.bump(student_id)
+    _dashboards.delete((student_id, version))
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _latest_attempts(db: Session, student_id: int):
+    # Attempt terakhir per course dalam satu statement (ROW_NUMBER per course)
+    ranked = (
+        select(
+            Tests.course_id,
+            Tests.title.label("test_title"),
+            Tests_Attempts.attempt_id,
+            Tests_Attempts.test_id,
+            Tests_Attempts.started_at,
+            Tests_Attempts.completed_at,
+            Tests_Attempts.score,
+            Tests_Attempts.passed,
+            func.row_number().over(
+                partition_by=Tests.course_id,
+                order_by=(Tests_Attempts.started_at.desc(), Tests_Attempts.attempt_id.desc()),
+            ).label("position"),
+        )
+        .join(Tests, Tests.test_id == Tests_Attempts.test_id)
+        .where(Tests_Attempts.student_id == student_id)
+        .subquery()
+    )
+    rows = db.execute(select(ranked).where(ranked.c.position == 1)).all()
+    return {
+        row.course_id: {
+            "attempt_id": row.attempt_id,
+            "test_id": row.test_id,
+            "test_title": row.test_title,
+            "started_at": _iso(row.started_at),
+            "completed_at": _iso(row.completed_at),
+            "score": row.score,
+            "passed": row.passed,
+        }
+        for row in rows
+    }
+
+
+def _certificates(db: Session, student_id: int):
+    rows = db.execute(
+        select(Certificates.course_id, Certificates.certificate_number, Certificates.issued_at, Certificates.is_valid)
+        .where(Certificates.student_id == student_id)
+        .order_by(Certificates.issued_at)
+    ).all()
+    # Kalau ada lebih dari satu sertifikat untuk course yang sama, yang terbaru menang
+    return {
+        row.course_id: {
+            "certificate_number": row.certificate_number,
+            "issued_at": _iso(row.issued_at),
+            "is_valid": row.is_valid,
+        }
+        for row in rows
+    }
+
+
+@reads_primary
+def build_dashboard(db: Session, student_id: int):
+    # Student LEFT JOIN enrollment: nol baris berarti student tidak ada
+    rows = db.execute(
+        select(
+            Student.student_id,
+            Enrollments.course_id,
+            Course.title,
+            Course.category_id,
+            Enrollments.enrolled_at,
+            Enrollments.progress,
+            Enrollments.completed_at,
+            Enrollments.certificate_issued,
+        )
+        .outerjoin(Enrollments, Enrollments.student_id == Student.student_id)
+        .outerjoin(Course, Course.course_id == Enrollments.course_id)
+        .where(Student.student_id == student_id)
+        .order_by(Enrollments.enrolled_at.desc(), Enrollments.course_id)
+    ).all()
+    if not rows:
+        return None
+    enrollments = [row for row in rows if row.course_id is not None]
+
+    attempts = _latest_attempts(db, student_id) if enrollments else {}
+    certificates = _certificates(db, student_id) if enrollments else {}
+
+    courses = []
+    for row in enrollments:
+        certificate = certificates.get(row.course_id)
+        courses.append({
+            "course_id": row.course_id,
+            "title": row.title,
+            "category_id": row.category_id,
+            "enrolled_at": _iso(row.enrolled_at),
+            "progress": row.progress or 0,
+            "completed": row.completed_at is not None,
+            "completed_at": _iso(row.completed_at),
+            "latest_attempt": attempts.get(row.course_id),
+            "certificate_issued": bool(row.certificate_issued) or (certificate is not None and bool(certificate["is_valid"])),
+            "certificate": certificate,
+        })
+
+    payload = {
+        "student_id": student_id,
+        "summary": {
+            "enrolled": len(courses),
+            "completed": sum(course["completed"] for course in courses),
+            "certificates": sum(course["certificate_issued"] for course in courses),
+            "average_progress": round(sum(course["progress"] for course in courses) / len(courses), 2) if courses else 0,
+        },
+        "courses": courses,
+    }
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def get_dashboard(db: Session, student_id: int):
+    """Return the pre-serialized dashboard JSON, or None if the student doesn't exist."""
+    version = student_versions.get(student_id)
+    return _dashboards.get_or_build(
+        (student_id, version),
+        lambda: build_dashboard(db, student_id),
+        _build_locks(student_id),
+    )
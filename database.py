@@ -1,13 +1,176 @@
-from sqlalchemy import create_engine, MetaData
+import os
+import time
+
+from sqlalchemy import create_engine, exc, MetaData
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from routing import RoutingSession, make_read_routing_middleware, replicas
 
 # Konfigurasi koneksi ke MySQL
-DATABASE_URL = "mysql+mysqlconnector://root:@localhost:3306/ureekaCourse"
+DATABASE_URL = os.getenv("DATABASE_URL", "mysql+mysqlconnector://root:@localhost:3306/ureekaCourse")
+
+# Mode async (DB_ASYNC=1): handler yang sering dipanggil memakai AsyncSession
+# lewat aiomysql (atau sqlite+aiosqlite untuk test lokal)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "mysql+aiomysql://root:@localhost:3306/ureekaCourse")
+DB_ASYNC = os.getenv("DB_ASYNC", "0") == "1"
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+# Pool per proses worker. pool_size + max_overflow sebaiknya >= jumlah thread
+# Starlette (40): handler sync memegang koneksi sampai response di-serialize di
+# threadpool, jadi pool yang lebih kecil bisa deadlock sampai pool_timeout.
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 30)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 10)
+# Harus lebih kecil dari wait_timeout MySQL supaya koneksi basi tidak dipakai
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_ISOLATION_LEVEL = os.getenv("DB_ISOLATION_LEVEL") or None
+
+# Read replica (dipisah koma). Request GET/HEAD membaca dari replica secara
+# round-robin; client yang baru menulis tetap ke primary selama
+# DB_READ_YOUR_WRITES detik (0 = mati).
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_CHECK_INTERVAL = _env_int("DB_REPLICA_CHECK_INTERVAL", 10)
+DB_READ_YOUR_WRITES = _env_int("DB_READ_YOUR_WRITES", 5)
+
+
+class _PoolStatsMixin:
+    """Records how long checkouts wait for a connection and how many time out."""
+
+    waits = 0
+    wait_total = 0.0
+    wait_max = 0.0
+    timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.waits += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+
+class StatsQueuePool(_PoolStatsMixin, QueuePool):
+    pass
+
+
+class StatsAsyncQueuePool(_PoolStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url, is_async=False, **overrides):
+    options = {}
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=StatsAsyncQueuePool if is_async else StatsQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    options["pool_pre_ping"] = DB_POOL_PRE_PING
+    if DB_ISOLATION_LEVEL:
+        options["isolation_level"] = DB_ISOLATION_LEVEL
+    options.update(overrides)
+    return options
+
+
+def make_engine(url=DATABASE_URL, **overrides):
+    """Create a sync engine using the DB_POOL_* / DB_ISOLATION_LEVEL settings."""
+    return create_engine(url, **engine_options(url, **overrides))
+
+
+def make_async_engine(url=ASYNC_DATABASE_URL, **overrides):
+    return create_async_engine(url, **engine_options(url, is_async=True, **overrides))
+
+
+def pool_stats(engine):
+    """Live numbers for sizing the pool against the worker count."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    if isinstance(pool, _PoolStatsMixin):
+        stats.update(
+            checkouts=pool.waits,
+            wait_avg_ms=round(pool.wait_total / pool.waits * 1000, 3) if pool.waits else 0.0,
+            wait_max_ms=round(pool.wait_max * 1000, 3),
+            timeouts=pool.timeouts,
+        )
+    return stats
+
 
 # Buat engine SQLAlchemy
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = make_engine()
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+
+def configure_replicas(urls=DATABASE_REPLICA_URLS, check_interval=DB_REPLICA_CHECK_INTERVAL, **overrides):
+    replicas.configure([make_engine(url, **overrides) for url in urls], check_interval)
+    return replicas
+
+
+read_routing_middleware = make_read_routing_middleware(DB_READ_YOUR_WRITES)
+
+
+# Dependency session bersama untuk semua router. Jumlah statement dan waktu DB
+# per request dihitung lewat event engine di query_stats.py.
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+if DATABASE_REPLICA_URLS:
+    configure_replicas()
+
+# Engine async baru dibuat kalau mode async aktif, supaya aiomysql tidak wajib terpasang
+async_engine = None
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def init_async_engine(url=ASYNC_DATABASE_URL, **kwargs):
+    global async_engine
+    async_engine = make_async_engine(url, **kwargs)
+    AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+
+if DB_ASYNC:
+    init_async_engine()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 # Metadata untuk tabel
 metadata = MetaData()
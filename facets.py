@@ -0,0 +1,78 @@
+import asyncio
+
+from sqlalchemy import case, distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from cache import KeyedLocks, LRUCache, catalog_versions
+from models import Categories, Course, Materials
+from routing import reads_primary
+
+# Facet katalog: jumlah course per kategori dan per tipe materi. Satu GROUP BY
+# per kategori dengan satu kolom per tipe materi (pivot), jadi tabel itu sudah
+# memuat semua kombinasi filter:
+#   kategori tanpa filter tipe  -> kolom total
+#   kategori dengan filter tipe -> kolom tipe itu
+#   tipe dengan filter kategori -> baris kategori itu
+#   tipe tanpa filter kategori  -> jumlah per kolom (satu course = satu kategori)
+# Facet tidak dihitung dengan filternya sendiri, supaya pilihan lain tetap
+# terlihat di sidebar. Cache satu entry, key = versi katalog yang naik lewat
+# invalidate_facets() di write course/materi.
+MATERIAL_TYPES = tuple(Materials.enum.type.enums)
+
+_facets = LRUCache(maxsize=4, ttl=300)
+_build_locks = KeyedLocks()
+_async_build_locks = KeyedLocks(asyncio.Lock)
+
+
+def invalidate_facets():
+    version = catalog_versions.bump("facets")
+    _facets.delete(version)
+
+
+@reads_primary
+def build_facet_table(db: Session):
+    """[(category_id, name, total, {material_type: count})] from one statement."""
+    per_type = [
+        func.count(distinct(case((Materials.enum == material_type, Course.course_id))))
+        for material_type in MATERIAL_TYPES
+    ]
+    rows = db.execute(
+        select(Categories.category_id, Categories.name, func.count(distinct(Course.course_id)), *per_type)
+        .outerjoin(Course, Course.category_id == Categories.category_id)
+        .outerjoin(Materials, Materials.course_id == Course.course_id)
+        .group_by(Categories.category_id, Categories.name)
+        .order_by(Categories.name)
+    ).all()
+    return [
+        (category_id, name, total, dict(zip(MATERIAL_TYPES, counts)))
+        for category_id, name, total, *counts in rows
+    ]
+
+
+def _facets_from(table, category_id=None, material_type=None):
+    categories = [
+        {"category_id": cid, "name": name, "count": by_type[material_type] if material_type else total}
+        for cid, name, total, by_type in table
+    ]
+    rows = [by_type for cid, _, _, by_type in table if category_id is None or cid == category_id]
+    material_types = [
+        {"material_type": t, "count": sum(by_type[t] for by_type in rows)} for t in MATERIAL_TYPES
+    ]
+    return {"categories": categories, "material_types": material_types}
+
+
+def get_facets(db: Session, category_id=None, material_type=None):
+    version = catalog_versions.get("facets")
+    table = _facets.get_or_build(version, lambda: build_facet_table(db), _build_locks("facets"))
+    return _facets_from(table, category_id, material_type)
+
+
+async def get_facets_async(db: AsyncSession, category_id=None, material_type=None):
+    version = catalog_versions.get("facets")
+
+    async def build():
+        return await db.run_sync(build_facet_table)
+
+    table = await _facets.get_or_build_async(version, build, _async_build_locks("facets"))
+    return _facets_from(table, category_id, material_type)
@@ -1,20 +1,26 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import SessionLocal
+from auth import CurrentUser, get_current_user
+from database import get_db, get_async_db
+from http_cache import FORUM_TOPICS_CACHE, conditional, row_etag
 from models import Forum_Replies, Forum_Topics
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Keyset
 from pydantic import BaseModel, Field
 
 forum_router = APIRouter()
+# Versi async untuk forum, dipasang main.py kalau DB_ASYNC=1
+forum_async_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Urutan mengikuti index (course_id, is_pinned, created_at) dan (topic_id, created_at)
+TOPIC_ORDER = (Forum_Topics.is_pinned.desc(), Forum_Topics.created_at.desc(), Forum_Topics.topic_id.desc())
+REPLY_ORDER = (Forum_Replies.created_at, Forum_Replies.reply_id)
+TOPIC_KEYSET = Keyset(*TOPIC_ORDER)
+REPLY_KEYSET = Keyset(*REPLY_ORDER)
 
 class ForumTopicCreate(BaseModel):
     course_id: int = Field(..., description="Course ID harus ada")
@@ -66,8 +72,9 @@ class ForumReplyUpdate(BaseModel):
 class ForumReplyOut(BaseModel):
     reply_id: int
     topic_id: int
-    student_id: int
-    admin_id: int
+    # Reply ditulis student atau admin, jadi salah satunya kosong
+    student_id: Optional[int] = None
+    admin_id: Optional[int] = None
     content: str
     created_at: datetime
     upvotes: int
@@ -75,8 +82,30 @@ class ForumReplyOut(BaseModel):
     class Config:
         orm_mode: True
 
+class ForumTopicPage(BaseModel):
+    items: List[ForumTopicOut]
+    next_cursor: Optional[str] = None
+
+class ForumReplyPage(BaseModel):
+    items: List[ForumReplyOut]
+    next_cursor: Optional[str] = None
+
+# Student hanya menulis atas namanya sendiri dan hanya mengubah/menghapus miliknya; admin boleh semua
+def check_author(user: CurrentUser, student_id: Optional[int]):
+    if user.role == "admin":
+        return
+    if user.role != "student" or student_id is None or user.user_id != student_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this student")
+
+def owned(row, user: CurrentUser, detail: str):
+    if row is None:
+        raise HTTPException(status_code=404, detail=detail)
+    check_author(user, row.student_id)
+    return row
+
 @forum_router.post("/create/topic/{course_id}", response_model=ForumTopicOut, status_code=status.HTTP_201_CREATED)
-def create_forum_topic(topic: ForumTopicCreate, db: Session = Depends(get_db)):
+def create_forum_topic(topic: ForumTopicCreate, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    check_author(user, topic.student_id)
 
     new_topic = Forum_Topics(
         course_id=topic.course_id,
@@ -93,7 +122,8 @@ def create_forum_topic(topic: ForumTopicCreate, db: Session = Depends(get_db)):
     return new_topic
 
 @forum_router.post("/create/reply/{topic_id}", response_model=ForumReplyOut, status_code=status.HTTP_201_CREATED)
-def create_forum_reply(reply: ForumReplyCreate, db: Session = Depends(get_db)):
+def create_forum_reply(reply: ForumReplyCreate, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    check_author(user, reply.student_id)
 
     new_reply = Forum_Replies(
         topic_id=reply.topic_id,
@@ -108,22 +138,32 @@ def create_forum_reply(reply: ForumReplyCreate, db: Session = Depends(get_db)):
     db.refresh(new_reply)
     return new_reply
 
-@forum_router.get("/topics/{course_id}", response_model=List[ForumTopicOut])
-def get_forum_topics(course_id: int, db: Session = Depends(get_db)):
+@forum_router.get("/topics/{course_id}", response_model=ForumTopicPage)
+def get_forum_topics(course_id: int, request: Request, response: Response, cursor: Optional[str] = None,
+                     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
 
-    topics = db.query(Forum_Topics).filter(Forum_Topics.course_id == course_id).all()
-    return topics
+    query = db.query(Forum_Topics).filter(Forum_Topics.course_id == course_id)
+    topics, next_cursor = TOPIC_KEYSET.page(TOPIC_KEYSET.apply(query, cursor, limit).all(), limit)
+    not_modified = conditional(request, response, row_etag(*topics, next_cursor), policy=FORUM_TOPICS_CACHE)
+    if not_modified:
+        return not_modified
+    return {"items": topics, "next_cursor": next_cursor}
 
-@forum_router.get("/replies/{topic_id}", response_model=List[ForumReplyOut])
-def get_forum_replies(topic_id: int, db: Session = Depends(get_db)):
+@forum_router.get("/replies/{topic_id}", response_model=ForumReplyPage)
+def get_forum_replies(topic_id: int, cursor: Optional[str] = None,
+                      limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
 
-    replies = db.query(Forum_Replies).filter(Forum_Replies.topic_id == topic_id).all()
-    return replies
+    query = db.query(Forum_Replies).filter(Forum_Replies.topic_id == topic_id)
+    replies, next_cursor = REPLY_KEYSET.page(REPLY_KEYSET.apply(query, cursor, limit).all(), limit)
+    return {"items": replies, "next_cursor": next_cursor}
 
 @forum_router.put("/update/topic/{topic_id}", response_model=ForumTopicOut)
-def update_forum_topic(topic_id: int, topic: ForumTopicUpdate, db: Session = Depends(get_db)):
+def update_forum_topic(topic_id: int, topic: ForumTopicUpdate, db: Session = Depends(get_db),
+                       user: CurrentUser = Depends(get_current_user)):
 
-    topic_to_update = db.query(Forum_Topics).filter(Forum_Topics.topic_id == topic_id).first()
+    topic_to_update = owned(db.query(Forum_Topics).filter(Forum_Topics.topic_id == topic_id).first(), user,
+                            "Topic not found")
+    check_author(user, topic.student_id)
     topic_to_update.course_id = topic.course_id
     topic_to_update.student_id = topic.student_id
     topic_to_update.title = topic.title
@@ -136,9 +176,12 @@ def update_forum_topic(topic_id: int, topic: ForumTopicUpdate, db: Session = Dep
     return topic_to_update
 
 @forum_router.put("/update/reply/{reply_id}", response_model=ForumReplyOut)
-def update_forum_reply(reply_id: int, reply: ForumReplyUpdate, db: Session = Depends(get_db)):
+def update_forum_reply(reply_id: int, reply: ForumReplyUpdate, db: Session = Depends(get_db),
+                       user: CurrentUser = Depends(get_current_user)):
 
-    reply_to_update = db.query(Forum_Replies).filter(Forum_Replies.reply_id == reply_id).first()
+    reply_to_update = owned(db.query(Forum_Replies).filter(Forum_Replies.reply_id == reply_id).first(), user,
+                            "Reply not found")
+    check_author(user, reply.student_id)
     reply_to_update.topic_id = reply.topic_id
     reply_to_update.student_id = reply.student_id
     reply_to_update.admin_id = reply.admin_id
@@ -150,17 +193,49 @@ def update_forum_reply(reply_id: int, reply: ForumReplyUpdate, db: Session = Dep
     return reply_to_update
 
 @forum_router.delete("/delete/topic/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_forum_topic(topic_id: int, db: Session = Depends(get_db)):
+def delete_forum_topic(topic_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
 
-    topic_to_delete = db.query(Forum_Topics).filter(Forum_Topics.topic_id == topic_id).first()
+    topic_to_delete = owned(db.query(Forum_Topics).filter(Forum_Topics.topic_id == topic_id).first(), user,
+                            "Topic not found")
     db.delete(topic_to_delete)
     db.commit()
     return {"message": "Topic deleted successfully"}
 
 @forum_router.delete("/delete/reply/{reply_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_forum_reply(reply_id: int, db: Session = Depends(get_db)):
+def delete_forum_reply(reply_id: int, db: Session = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
 
-    reply_to_delete = db.query(Forum_Replies).filter(Forum_Replies.reply_id == reply_id).first()
+    reply_to_delete = owned(db.query(Forum_Replies).filter(Forum_Replies.reply_id == reply_id).first(), user,
+                            "Reply not found")
     db.delete(reply_to_delete)
     db.commit()
     return {"message": "Reply deleted successfully"}
+
+@forum_async_router.post("/create/reply/{topic_id}", response_model=ForumReplyOut, status_code=status.HTTP_201_CREATED)
+async def create_forum_reply_async(reply: ForumReplyCreate, db: AsyncSession = Depends(get_async_db),
+                                   user: CurrentUser = Depends(get_current_user)):
+    check_author(user, reply.student_id)
+    new_reply = Forum_Replies(**reply.dict())
+    db.add(new_reply)
+    await db.commit()
+    return new_reply
+
+@forum_async_router.get("/topics/{course_id}", response_model=ForumTopicPage)
+async def get_forum_topics_async(course_id: int, request: Request, response: Response, cursor: Optional[str] = None,
+                                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                 db: AsyncSession = Depends(get_async_db)):
+    statement = select(Forum_Topics).where(Forum_Topics.course_id == course_id)
+    result = await db.execute(TOPIC_KEYSET.apply(statement, cursor, limit))
+    topics, next_cursor = TOPIC_KEYSET.page(result.scalars(), limit)
+    not_modified = conditional(request, response, row_etag(*topics, next_cursor), policy=FORUM_TOPICS_CACHE)
+    if not_modified:
+        return not_modified
+    return {"items": topics, "next_cursor": next_cursor}
+
+@forum_async_router.get("/replies/{topic_id}", response_model=ForumReplyPage)
+async def get_forum_replies_async(topic_id: int, cursor: Optional[str] = None,
+                                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                  db: AsyncSession = Depends(get_async_db)):
+    statement = select(Forum_Replies).where(Forum_Replies.topic_id == topic_id)
+    result = await db.execute(REPLY_KEYSET.apply(statement, cursor, limit))
+    replies, next_cursor = REPLY_KEYSET.page(result.scalars(), limit)
+    return {"items": replies, "next_cursor": next_cursor}
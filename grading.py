@@ -0,0 +1,91 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from answer_key import get_answer_key, get_answer_key_async
+from models import Student_Answers, Tests_Attempts
+
+
+class GradingError(Exception):
+    pass
+
+
+def score_answers(key, rows):
+    """Score (student_answer_id, question_id, answer_id, point_awarded) rows against an AnswerKey.
+
+    Returns (earned, total, awards) where awards maps student_answer_id -> points."""
+    if not rows:
+        raise GradingError("No answers found for this attempt")
+
+    question_ok = {}
+    essay_points = {}
+    awards = {}
+
+    for student_answer_id, question_id, answer_id, point_awarded in rows:
+        question = key.questions.get(question_id)
+        if question is None:
+            continue
+        if question.question_type == "essay":
+            # Essay dinilai manual, pakai point_awarded yang sudah ada
+            essay_points[question_id] = essay_points.get(question_id, 0) + (point_awarded or 0)
+            continue
+        # Soal dapat poin penuh kalau semua jawaban yang dipilih benar
+        ok = answer_id in question.correct
+        question_ok[question_id] = question_ok.get(question_id, True) and ok
+        awards[student_answer_id] = question.points if ok else 0
+
+    earned = 0
+    for question_id, question in key.questions.items():
+        if question_id in essay_points:
+            earned += min(essay_points[question_id], question.points)
+        elif question_ok.get(question_id):
+            earned += question.points
+    total = sum(question.points for question in key.questions.values())
+    return earned, total, awards
+
+
+def _attempt_answers(attempt_id):
+    return select(
+        Student_Answers.student_answer_id,
+        Student_Answers.question_id,
+        Student_Answers.answer_id,
+        Student_Answers.point_awarded,
+    ).where(Student_Answers.attempt_id == attempt_id)
+
+
+def _award_mappings(awards):
+    return [{"student_answer_id": sa_id, "point_awarded": pts} for sa_id, pts in awards.items()]
+
+
+def _apply_score(attempt, key, earned, total):
+    attempt.score = round(earned / total * 100) if total > 0 else 0
+    attempt.passed = attempt.score >= key.pass_percentage
+    return attempt
+
+
+def grade_attempt(db: Session, attempt: Tests_Attempts) -> Tests_Attempts:
+    """Score an attempt weighted by Questions.points and compare it to Tests.pass_percentage.
+
+    The answer key comes from answer_key's cache, so a warm grade reads only the
+    attempt's Student_Answers. Does not commit; the caller owns the transaction."""
+    key = get_answer_key(db, attempt.test_id)
+    if key is None or not key.questions:
+        raise GradingError("Test has no questions")
+
+    rows = db.execute(_attempt_answers(attempt.attempt_id)).all()
+    earned, total, awards = score_answers(key, rows)
+    if awards:
+        db.execute(update(Student_Answers), _award_mappings(awards))
+    return _apply_score(attempt, key, earned, total)
+
+
+async def grade_attempt_async(db: AsyncSession, attempt: Tests_Attempts) -> Tests_Attempts:
+    key = await get_answer_key_async(db, attempt.test_id)
+    if key is None or not key.questions:
+        raise GradingError("Test has no questions")
+
+    rows = (await db.execute(_attempt_answers(attempt.attempt_id))).all()
+    earned, total, awards = score_answers(key, rows)
+    if awards:
+        await db.execute(update(Student_Answers), _award_mappings(awards))
+    return _apply_score(attempt, key, earned, total)
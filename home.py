@@ -1,31 +1,19 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
 
-from database import SessionLocal
-from models import Course 
-from pydantic import BaseModel, Field
+from auth import require_student_or_admin
+from dashboard import get_dashboard
+from database import get_db
+from http_cache import DASHBOARD_CACHE, conditional, content_etag
 
 home_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
-class CourseResponse(BaseModel):
-    id: int
-    name: str
-    description: Optional[str] = None
-    start_date: Optional[datetime] = None
-    end_date: Optional[datetime] = None
-
-@home_router.get("/home/{student_id}", response_model=List[CourseResponse])
-def get_student_courses(student_id: int, db: Session = Depends(get_db)):
-    courses = db.query(Course).filter(Course.student_id == student_id).all()
-    if not courses:
-        raise HTTPException(status_code=404, detail="Courses not found for this student")
-    return courses
\ No newline at end of file
+# Dashboard student: course yang di-enroll + progress, attempt terakhir, sertifikat
+# Hanya student itu sendiri (atau admin) yang boleh melihat dashboard-nya
+@home_router.get("/home/{student_id}", dependencies=[Depends(require_student_or_admin)])
+def get_student_courses(student_id: int, request: Request, db: Session = Depends(get_db)):
+    dashboard = get_dashboard(db, student_id)
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    response = Response(content=dashboard, media_type="application/json")
+    return conditional(request, response, content_etag(dashboard), policy=DASHBOARD_CACHE) or response
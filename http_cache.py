@@ -0,0 +1,85 @@
+import hashlib
+import os
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+
+# Conditional GET: response membawa ETag (hash isi baris) dan, untuk detail,
+# Last-Modified. Client yang mengirim If-None-Match / If-Modified-Since yang
+# masih cocok dapat 304 tanpa body, jadi response_model dan JSON tidak dibuat.
+# ETag dihitung dari isi baris, bukan counter per proses, supaya sama di semua
+# worker. Cache-Control per route bisa diganti lewat env, mis.
+#   CACHE_CONTROL_COURSE_LIST="public, max-age=300"
+
+
+def cache_control(name, default):
+    return os.getenv(f"CACHE_CONTROL_{name.upper()}", default)
+
+
+COURSE_LIST_CACHE = cache_control("course_list", "public, max-age=60, stale-while-revalidate=300")
+COURSE_DETAIL_CACHE = cache_control("course_detail", "public, max-age=60, stale-while-revalidate=300")
+MATERIAL_DETAIL_CACHE = cache_control("material_detail", "public, max-age=300, stale-while-revalidate=600")
+# Forum cepat berubah: selalu revalidasi, tapi 304 tetap menghemat body
+FORUM_TOPICS_CACHE = cache_control("forum_topics", "no-cache")
+# Data per student: jangan disimpan cache bersama, tapi 304 tetap boleh
+DASHBOARD_CACHE = cache_control("dashboard", "private, no-cache")
+
+
+def row_etag(*parts):
+    """Weak ETag over ORM rows (all column values) and plain values."""
+    digest = hashlib.sha1()
+    for part in parts:
+        table = getattr(part, "__table__", None)
+        values = [getattr(part, column.key) for column in table.columns] if table is not None else part
+        digest.update(repr(values).encode())
+    return f'W/"{digest.hexdigest()[:20]}"'
+
+
+def content_etag(body: bytes):
+    """Weak ETag for a pre-serialized body."""
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def http_date(value):
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # Perbandingan weak: W/"x" dan "x" dianggap sama
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def _not_modified_since(header, last_modified):
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def conditional(request, response: Response, etag, last_modified=None, policy=None):
+    """Sets the validators on `response`. Returns a 304 Response when the client's
+    copy is still current (the handler returns it as is), otherwise None."""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if policy:
+        headers["Cache-Control"] = policy
+
+    # If-None-Match menang atas If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
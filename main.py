@@ -1,44 +1,109 @@
 from fastapi import FastAPI
 from auth import auth_router as auth_router
-from course import course_router as course_router
+from course import course_router as course_router, course_async_router
 from material import material_router as material_router
 from answer import answer_router as answer_router
-from quiz import quiz_router as quiz_router
-from forum import forum_router as forum_router
-from testAttempt import testAttempt_router as testAttempt_router
+from quiz import quiz_router as quiz_router, quiz_async_router
+from forum import forum_router as forum_router, forum_async_router
+from testAttempt import testAttempt_router as testAttempt_router, testAttempt_async_router
 from home import home_router as home_router
+from search import search_router
+import database
+from activity import activity_buffer
+from autocomplete import autocomplete
+from cache_sync import CACHE_SYNC, version_sync
+from database import DB_ASYNC, pool_stats
+from password_pool import import_pool, password_pool
+from query_stats import query_stats_middleware
+from rate_limit import RATE_LIMIT_ENABLED, RateLimiter, make_rate_limit_middleware
 
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI()
+def create_app(async_db: bool = DB_ASYNC, rate_limit: bool = RATE_LIMIT_ENABLED) -> FastAPI:
+    app = FastAPI()
 
-@app.get("/")
-def read_root():
-    return {"message": "Hello Guys. Welcome to the API"}
+    @app.get("/")
+    def read_root():
+        return {"message": "Hello Guys. Welcome to the API"}
 
-# @app.get("/items/{item_id}")
-# def read_item(item_id: int, q: str = None):
-#     return {"item_id": item_id, "query": q}
+    # Statistik pool koneksi (checked out, overflow, waktu tunggu) untuk sizing worker
+    @app.get("/health/db", tags=["Health"])
+    def db_pool_stats():
+        stats = {"sync": pool_stats(database.engine)}
+        if database.async_engine is not None:
+            stats["async"] = pool_stats(database.async_engine)
+        if database.replicas:
+            stats["replicas"] = [pool_stats(e) for e in database.replicas.engines]
+        return stats
 
+    @app.get("/health/auth", tags=["Health"])
+    def auth_pool_stats():
+        return {**password_pool.stats(), "import": import_pool.stats()}
 
-# Routing > (buat jadiin satu pas beda file gitu) 
-# app.include_router(auth_router, prefix="/auth")
-# app.include_router(course_router, prefix="/course")
-# app.include_router(material_router, prefix="/material")
-# app.include_router(answer_router, prefix="/answer")
-# app.include_router(quiz_router, prefix="/quiz")
-# app.include_router(forum_router, prefix="/forum")
-# app.include_router(testAttempt_router, prefix="/testAttempt")
+    @app.get("/health/activity", tags=["Health"])
+    def activity_stats():
+        return activity_buffer.stats()
 
-app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
-app.include_router(home_router, prefix="/home", tags=["Home"])
-app.include_router(course_router, prefix="/course", tags=["Courses"])
-app.include_router(material_router, prefix="/material", tags=["Materials"])
-app.include_router(answer_router, prefix="/answer", tags=["Answers"])
-app.include_router(quiz_router, prefix="/quiz", tags=["Quizzes"])
-app.include_router(forum_router, prefix="/forum", tags=["Forum"])
-app.include_router(testAttempt_router, prefix="/testAttempt", tags=["Test Attempts"])
+    @app.get("/health/cache", tags=["Health"])
+    def cache_sync_stats():
+        return version_sync.stats()
+
+    # Index autocomplete dimuat di background supaya startup tidak menunggu database
+    app.add_event_handler("startup", autocomplete.start)
+    # Invalidasi cache diteruskan ke worker lain lewat tabel cache_invalidations
+    if CACHE_SYNC:
+        app.add_event_handler("startup", version_sync.start)
+        app.add_event_handler("shutdown", version_sync.stop)
+    app.add_event_handler("shutdown", password_pool.shutdown)
+    app.add_event_handler("shutdown", import_pool.shutdown)
+    # Timestamp aktivitas yang masih di buffer ditulis sebelum proses berhenti
+    app.add_event_handler("shutdown", activity_buffer.stop)
+
+    # @app.get("/items/{item_id}")
+    # def read_item(item_id: int, q: str = None):
+    #     return {"item_id": item_id, "query": q}
+
+
+    # Routing > (buat jadiin satu pas beda file gitu) 
+    # app.include_router(auth_router, prefix="/auth")
+    # app.include_router(course_router, prefix="/course")
+    # app.include_router(material_router, prefix="/material")
+    # app.include_router(answer_router, prefix="/answer")
+    # app.include_router(quiz_router, prefix="/quiz")
+    # app.include_router(forum_router, prefix="/forum")
+    # app.include_router(testAttempt_router, prefix="/testAttempt")
+
+    # Mode async: router async didaftarkan duluan supaya route yang sama
+    # ditangani versi async, sisanya tetap jatuh ke handler sync
+    if async_db:
+        app.include_router(course_async_router, prefix="/course", tags=["Courses"], include_in_schema=False)
+        app.include_router(quiz_async_router, prefix="/quiz", tags=["Quizzes"], include_in_schema=False)
+        app.include_router(forum_async_router, prefix="/forum", tags=["Forum"], include_in_schema=False)
+        app.include_router(testAttempt_async_router, prefix="/testAttempt", tags=["Test Attempts"], include_in_schema=False)
+
+    app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
+    app.include_router(home_router, prefix="/home", tags=["Home"])
+    app.include_router(course_router, prefix="/course", tags=["Courses"])
+    app.include_router(material_router, prefix="/material", tags=["Materials"])
+    app.include_router(answer_router, prefix="/answer", tags=["Answers"])
+    app.include_router(quiz_router, prefix="/quiz", tags=["Quizzes"])
+    app.include_router(forum_router, prefix="/forum", tags=["Forum"])
+    app.include_router(testAttempt_router, prefix="/testAttempt", tags=["Test Attempts"])
+    app.include_router(search_router, prefix="/search", tags=["Search"])
+
+    # Request read-only diarahkan ke read replica (kalau DATABASE_REPLICA_URLS diisi)
+    app.middleware("http")(database.read_routing_middleware)
+    # Header X-DB-Queries / X-DB-Time-ms + log per request
+    app.middleware("http")(query_stats_middleware)
+    # Paling luar: request yang kena limit ditolak sebelum menyentuh DB
+    if rate_limit:
+        app.middleware("http")(make_rate_limit_middleware(RateLimiter()))
+
+    return app
+
+
+app = create_app()
 
 
 
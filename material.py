@@ -1,20 +1,21 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import SessionLocal
+from auth import require_admin
+from course_snapshot import invalidate_course
+from database import get_db
+from facets import invalidate_facets
+from http_cache import MATERIAL_DETAIL_CACHE, conditional, row_etag
 from models import Materials, Course
-from pydantic import BaseModel, Field
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Keyset
+from pydantic import AliasChoices, BaseModel, Field
+from search_index import search_index
 
 material_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+MATERIAL_KEYSET = Keyset(Materials.material_id)
 
 class MaterialCreate(BaseModel):
     course_id: int = Field(..., description="Course ID harus ada")
@@ -37,14 +38,19 @@ class MaterialOut(BaseModel):
     course_id: int
     title: str
     description: str
-    material_type: str
+    # Kolom di model bernama `enum`
+    material_type: str = Field(validation_alias=AliasChoices("material_type", "enum"))
     upload_at: datetime
     admin_id: int
 
     class Config:
         orm_mode: True
 
-@material_router.post("/create/{course_id}", response_model=MaterialOut, status_code=status.HTTP_201_CREATED)
+class MaterialPage(BaseModel):
+    items: List[MaterialOut]
+    next_cursor: Optional[str] = None
+
+@material_router.post("/create/{course_id}", response_model=MaterialOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
 def create_material(material: MaterialCreate, db: Session = Depends(get_db)):
 
     course = db.query(Course).filter(Course.course_id == material.course_id).first()
@@ -55,47 +61,60 @@ def create_material(material: MaterialCreate, db: Session = Depends(get_db)):
         course_id=material.course_id,
         title=material.title,
         description=material.description,
-        material_type=material.material_type,
+        enum=material.material_type,
         upload_at=material.upload_at,
         admin_id=material.admin_id
     )
     db.add(new_material)
     db.commit()
     db.refresh(new_material)
+    invalidate_course(new_material.course_id)
+    invalidate_facets()
+    search_index.material_changed(new_material)
     return new_material
 
 
-@material_router.get("/", response_model=List[MaterialOut])
-def read_materials(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    materials = db.query(Materials).offset(skip).limit(limit).all()
-    return materials
+@material_router.get("/", response_model=MaterialPage)
+def read_materials(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                   db: Session = Depends(get_db)):
+    rows = MATERIAL_KEYSET.apply(db.query(Materials), cursor, limit).all()
+    materials, next_cursor = MATERIAL_KEYSET.page(rows, limit)
+    return {"items": materials, "next_cursor": next_cursor}
 
 #detail
 @material_router.get("/detail/{material_id}", response_model=MaterialOut)
-def read_material(material_id: int, db: Session = Depends(get_db)):
+def read_material(material_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     material = db.query(Materials).filter(Materials.material_id == material_id).first()
     if material is None:
         raise HTTPException(status_code=404, detail="Material not found")
+    not_modified = conditional(request, response, row_etag(material), material.upload_at, MATERIAL_DETAIL_CACHE)
+    if not_modified:
+        return not_modified
     return material
 
-@material_router.put("/update/{material_id}", response_model=MaterialOut)
+@material_router.put("/update/{material_id}", response_model=MaterialOut, dependencies=[Depends(require_admin)])
 def update_material(material_id: int, material: MaterialUpdate, db: Session = Depends(get_db)):
     db_material = db.query(Materials).filter(Materials.material_id == material_id).first()
     if db_material is None:
         raise HTTPException(status_code=404, detail="Material not found")
     
+    old_course_id = db_material.course_id
     db_material.course_id = material.course_id
     db_material.title = material.title
     db_material.description = material.description
-    db_material.material_type = material.material_type
+    db_material.enum = material.material_type
     db_material.upload_at = material.upload_at
     db_material.admin_id = material.admin_id
     
     db.commit()
     db.refresh(db_material)
+    invalidate_course(old_course_id)
+    invalidate_course(db_material.course_id)
+    invalidate_facets()
+    search_index.material_changed(db_material)
     return db_material
 
-@material_router.delete("/delete/{material_id}", status_code=status.HTTP_204_NO_CONTENT)
+@material_router.delete("/delete/{material_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(require_admin)])
 def delete_material(material_id: int, db: Session = Depends(get_db)):
     db_material = db.query(Materials).filter(Materials.material_id == material_id).first()
     if db_material is None:
@@ -103,4 +122,7 @@ def delete_material(material_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_material)
     db.commit()
+    invalidate_course(db_material.course_id)
+    invalidate_facets()
+    search_index.material_deleted(material_id)
     return {"message": "Material deleted successfully"}
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import (CheckConstraint, Column, Integer, String, Boolean, ForeignKey, Float, Text, Enum, Date, TIMESTAMP, DECIMAL, DateTime, BigInteger)
+from sqlalchemy import (CheckConstraint, Column, Integer, String, Boolean, ForeignKey, Float, Text, Enum, Date, TIMESTAMP, DECIMAL, DateTime, BigInteger, Index)
 from sqlalchemy.orm import relationship, declarative_base
 
 from database import Base
@@ -30,6 +30,8 @@ class Student(Base):
     join_date = Column(Date, nullable=False)
     created_at = Column(TIMESTAMP, nullable=False)
     last_login = Column(TIMESTAMP)
+    # Diisi batch oleh activity.ActivityBuffer, bukan per request
+    last_active = Column(TIMESTAMP)
     is_active = Column(Boolean, default=True)
     
     enrollments = relationship("Enrollments", back_populates="student")
@@ -57,6 +59,11 @@ class Course(Base):
     certificates = relationship("Certificates", back_populates="courses")
     forum_topics = relationship("Forum_Topics", back_populates="courses")
 
+    __table_args__ = (
+        # Untuk search (MySQL saja); SQLite memakai inverted index di memori
+        Index('ft_courses_title_description', 'title', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
 class Categories(Base):
     __tablename__ = "categories"
     category_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -79,6 +86,12 @@ class Materials(Base):
     courses = relationship("Course", back_populates="materials")
     admin = relationship("Admin", back_populates="materials")
 
+    __table_args__ = (
+        Index('ft_materials_title_description', 'title', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Filter material_type di list course dan join facet cukup dari index ini
+        Index('ix_materials_course_type', 'course_id', 'enum'),
+    )
+
 
 class Enrollments(Base):
     __tablename__ = "enrollments"
@@ -95,6 +108,7 @@ class Enrollments(Base):
 
     __table_args__ = (
         CheckConstraint('progress >= 0 AND progress <= 100', name='check_progress_range'),
+        Index('uq_enrollments_student_course', 'student_id', 'course_id', unique=True),
     )
 
 class Tests(Base):
@@ -110,7 +124,7 @@ class Tests(Base):
     
     courses = relationship("Course", back_populates="tests")
     admin = relationship("Admin", back_populates="tests")
-    questions = relationship("Questions", back_populates="tests")
+    questions = relationship("Questions", back_populates="tests", order_by="Questions.sequence")
     tests_attempts = relationship("Tests_Attempts", back_populates="tests")
 
 class Questions(Base):
@@ -126,6 +140,10 @@ class Questions(Base):
     answers = relationship("Answers", back_populates="questions")
     student_answers = relationship("Student_Answers", back_populates="questions")
 
+    __table_args__ = (
+        Index('ix_questions_test_sequence', 'test_id', 'sequence'),
+    )
+
 class Answers(Base):
     __tablename__ = "answers"
     answer_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -137,6 +155,10 @@ class Answers(Base):
     questions = relationship("Questions", back_populates="answers")
     student_answers = relationship("Student_Answers", back_populates="answers")
 
+    __table_args__ = (
+        Index('ix_answers_question_correct', 'question_id', 'is_correct'),
+    )
+
 class Certificates(Base):
     __tablename__ = "certificates"
     certificate_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -164,6 +186,10 @@ class Forum_Topics(Base):
     student = relationship("Student", back_populates="forum_topics")
     forum_replies = relationship("Forum_Replies", back_populates="topic")
 
+    __table_args__ = (
+        Index('ix_forum_topics_course_pinned_created', 'course_id', 'is_pinned', 'created_at'),
+    )
+
 
 class Forum_Replies(Base):
     __tablename__ = "forum_replies"
@@ -178,6 +204,10 @@ class Forum_Replies(Base):
     topic = relationship("Forum_Topics", back_populates="forum_replies")
     student = relationship("Student", back_populates="forum_replies")
 
+    __table_args__ = (
+        Index('ix_forum_replies_topic_created', 'topic_id', 'created_at'),
+    )
+
 class Tests_Attempts(Base):
     __tablename__ = "test_attempts"
     attempt_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -193,6 +223,10 @@ class Tests_Attempts(Base):
     tests = relationship("Tests", back_populates="tests_attempts")
     student_answers = relationship("Student_Answers", back_populates="tests_attempt")
 
+    __table_args__ = (
+        Index('ix_test_attempts_student_test', 'student_id', 'test_id'),
+    )
+
 class Student_Answers(Base):
     __tablename__ = "student_answers"
     student_answer_id = Column(Integer, primary_key=True, autoincrement=True)
@@ -206,4 +240,21 @@ class Student_Answers(Base):
     # student = relationship("Student", back_populates="student_answers")  
     questions = relationship("Questions", back_populates="student_answers")
     answers = relationship("Answers", back_populates="student_answers")
-    tests_attempt = relationship("Tests_Attempts", back_populates="student_answers")
\ No newline at end of file
+    tests_attempt = relationship("Tests_Attempts", back_populates="student_answers")
+
+    __table_args__ = (
+        Index('ix_student_answers_attempt_question', 'attempt_id', 'question_id'),
+    )
+
+class Cache_Invalidations(Base):
+    # Log invalidasi cache antar worker (cache_sync.py); baris lama dihapus berkala
+    __tablename__ = "cache_invalidations"
+    invalidation_id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(32), nullable=False)
+    key = Column(String(100), nullable=False)
+    origin = Column(String(32), nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        Index('ix_cache_invalidations_created', 'created_at'),
+    )
@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, literal, or_
+from sqlalchemy.sql import operators
+
+# Keyset pagination: halaman berikutnya dimulai dari baris terakhir halaman
+# sebelumnya (WHERE (sort key, pk) > cursor), bukan OFFSET, jadi halaman ke-N
+# sama murahnya dengan halaman pertama selama ada index untuk urutannya.
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_value(column, value):
+    """Cursor value as the column's Python type; TypeError if it doesn't fit, so a
+    tampered cursor is a 400 instead of a database error."""
+    if value is None:
+        if column.nullable:
+            return None
+        raise TypeError
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise TypeError
+        return datetime.fromisoformat(value)
+    # bool adalah subclass int di Python, jadi dicek terpisah
+    if isinstance(value, bool) != (python_type is bool):
+        raise TypeError
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, python_type):
+        raise TypeError
+    return value
+
+
+class Keyset:
+    """Ordering for a list endpoint. Columns are given like order_by (use .desc()
+    for descending) and must end with the primary key so the order is total."""
+
+    def __init__(self, *order):
+        self.order = order
+        self.columns = []
+        for clause in order:
+            descending = getattr(clause, "modifier", None) is operators.desc_op
+            self.columns.append((clause.element if descending else clause, descending))
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError
+            return [_cursor_value(column, value) for (column, _), value in zip(self.columns, values)]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    def after(self, values):
+        """(a, b, c) > (x, y, z) in the keyset's order, written out as OR/AND so
+        MySQL can use the index range (row comparisons often can't)."""
+        condition = None
+        for (column, descending), value in reversed(list(zip(self.columns, values))):
+            # literal(): SQLAlchemy menolak "< True" kalau dibandingkan dengan bool Python langsung
+            value = literal(value, column.type)
+            beyond = column < value if descending else column > value
+            condition = beyond if condition is None else or_(beyond, and_(column == value, condition))
+        return condition
+
+    def apply(self, query, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """Order, filter past `cursor` and fetch one extra row to know whether there
+        is a next page. Works for both Query and select()."""
+        if cursor:
+            query = query.filter(self.after(self.decode(cursor)))
+        return query.order_by(*self.order).limit(limit + 1)
+
+    def page(self, rows, limit):
+        """(items, next_cursor) from the rows fetched by apply()."""
+        rows = list(rows)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor([getattr(last, column.key) for column, _ in self.columns])
@@ -0,0 +1,225 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+# Hash bcrypt ~250 ms CPU. Dikerjakan di process pool terpisah dengan antrean
+# terbatas supaya badai login tidak menghabiskan threadpool endpoint lain.
+# AUTH_HASH_WORKERS=0 menjalankan bcrypt langsung di thread pemanggil (tanpa pool).
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+AUTH_HASH_QUEUE = int(os.getenv("AUTH_HASH_QUEUE", str(max(1, AUTH_HASH_WORKERS) * 4)))
+AUTH_HASH_TIMEOUT = float(os.getenv("AUTH_HASH_TIMEOUT", "10"))
+# Bulk import punya pool sendiri yang boleh memakai semua core. Workernya berjalan
+# dengan prioritas lebih rendah (nice) supaya login tetap didahulukan oleh OS.
+AUTH_IMPORT_WORKERS = int(os.getenv("AUTH_IMPORT_WORKERS", str((os.cpu_count() or 1) if AUTH_HASH_WORKERS else 0)))
+AUTH_IMPORT_NICE = int(os.getenv("AUTH_IMPORT_NICE", "10"))
+IMPORT_HASH_CHUNK = 16
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Fungsi top-level supaya bisa di-pickle ke worker process
+def hash_password(password):
+    return pwd_context.hash(password)
+
+
+def check_password(plain_password, hashed_password):
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def hash_passwords(passwords):
+    return [pwd_context.hash(p) for p in passwords]
+
+
+def _lower_priority(increment):
+    if hasattr(os, "nice"):
+        os.nice(increment)
+
+
+class HashPoolBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Password hashing is saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class HashPool:
+    """Bounded bcrypt executor: at most `workers` hashes run and `max_queue` wait;
+    anything beyond that fails fast with HashPoolBusy."""
+
+    def __init__(self, workers=AUTH_HASH_WORKERS, max_queue=AUTH_HASH_QUEUE, timeout=AUTH_HASH_TIMEOUT, nice=0):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.nice = nice
+        self.configure(workers, max_queue, timeout)
+
+    def configure(self, workers, max_queue, timeout=AUTH_HASH_TIMEOUT):
+        self.shutdown()
+        self.workers = workers
+        # max_queue=None: tanpa batas (perilaku lama, hanya untuk benchmark)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.rejected = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._avg_seconds = 0.25
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: worker tidak ikut mewarisi thread dan koneksi DB proses utama
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_lower_priority if self.nice else None, initargs=(self.nice,) if self.nice else (),
+                )
+            return self._executor
+
+    def _retry_after(self):
+        return max(1, math.ceil(self.in_flight * self._avg_seconds / max(1, self.workers)))
+
+    def _admit(self, wait=False):
+        # wait=True (import): tidak ditolak, tapi tetap terhitung di in_flight
+        with self._lock:
+            # Tanpa pool (workers=0) hash tetap dihitung sebagai satu "worker"
+            if not wait and self.max_queue is not None and self.in_flight >= max(1, self.workers) + self.max_queue:
+                self.rejected += 1
+                raise HashPoolBusy(self._retry_after())
+            self.in_flight += 1
+
+    def _release(self, seconds, cancelled=False):
+        with self._lock:
+            self.in_flight -= 1
+            if cancelled:
+                self.cancelled += 1
+                return
+            self.completed += 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * seconds
+
+    def _submit(self, fn, *args):
+        # Dipanggil setelah _admit()
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            self._release(time.perf_counter() - start, cancelled=True)
+            self.shutdown()
+            raise HashPoolBusy(1)
+        # Slot dilepas saat hash benar-benar selesai (atau batal), bukan saat pemanggil
+        # berhenti menunggu, jadi in_flight tetap menghitung hash yang masih antre
+        future.add_done_callback(lambda f: self._release(time.perf_counter() - start, f.cancelled()))
+        return future
+
+    def _inline(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def run(self, fn, *args):
+        self._admit()
+        if not self.workers:
+            return self._inline(fn, *args)
+        future = self._submit(fn, *args)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashPoolBusy(self._retry_after())
+        except BrokenProcessPool:
+            # Worker mati (OOM/kill): buang pool, request berikutnya membuat pool baru
+            self.shutdown()
+            raise HashPoolBusy(1)
+
+    async def run_async(self, fn, *args):
+        """Like run(), but the caller awaits the pool future instead of blocking a
+        threadpool thread while the hash waits in the queue and runs."""
+        self._admit()
+        if not self.workers:
+            return await asyncio.to_thread(self._inline, fn, *args)
+        future = self._submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashPoolBusy(self._retry_after())
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HashPoolBusy(1)
+
+    def hash(self, password):
+        return self.run(hash_password, password)
+
+    def verify(self, plain_password, hashed_password):
+        return self.run(check_password, plain_password, hashed_password)
+
+    async def hash_async(self, password):
+        return await self.run_async(hash_password, password)
+
+    async def verify_async(self, plain_password, hashed_password):
+        return await self.run_async(check_password, plain_password, hashed_password)
+
+    def hash_many(self, passwords):
+        """Hash a batch (bulk import) in chunks of IMPORT_HASH_CHUNK, keeping every
+        worker busy: two jobs per worker are outstanding at a time."""
+        passwords = list(passwords)
+        if not self.workers:
+            return hash_passwords(passwords)
+        chunks = [passwords[i:i + IMPORT_HASH_CHUNK] for i in range(0, len(passwords), IMPORT_HASH_CHUNK)]
+        results = [None] * len(chunks)
+        concurrency = self.workers * 2
+        futures = {}
+        submitted = 0
+        try:
+            while submitted < len(chunks) or futures:
+                while submitted < len(chunks) and len(futures) < concurrency:
+                    self._admit(wait=True)
+                    start = time.perf_counter()
+                    try:
+                        future = self._get_executor().submit(hash_passwords, chunks[submitted])
+                    except BaseException:
+                        self._release(time.perf_counter() - start, cancelled=True)
+                        raise
+                    future.add_done_callback(
+                        lambda f, start=start: self._release((time.perf_counter() - start) / IMPORT_HASH_CHUNK, f.cancelled()))
+                    futures[future] = submitted
+                    submitted += 1
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures.pop(future)] = future.result()
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HashPoolBusy(1)
+        finally:
+            for future in futures:
+                future.cancel()
+        return [hashed for chunk in results for hashed in chunk]
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "avg_ms": round(self._avg_seconds * 1000, 1),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = HashPool()
+# Import tidak pernah ditolak (max_queue=None), hanya menunggu giliran
+import_pool = HashPool(workers=AUTH_IMPORT_WORKERS, max_queue=None, nice=AUTH_IMPORT_NICE)
+
@@ -0,0 +1,121 @@
+import logging
+import os
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("ureeka.db")
+
+_current = ContextVar("query_stats", default=None)
+
+# Detektor N+1 untuk test/dev: DB_NPLUS1=warn|raise, aktif kalau SELECT yang
+# bentuknya sama (SQL identik, parameter beda) muncul lebih dari
+# DB_NPLUS1_THRESHOLD kali dalam satu request
+NPLUS1_MODE = os.getenv("DB_NPLUS1", "off")
+NPLUS1_THRESHOLD = int(os.getenv("DB_NPLUS1_THRESHOLD", "5"))
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "mode", "threshold", "shapes")
+
+    def __init__(self, mode=NPLUS1_MODE, threshold=NPLUS1_THRESHOLD):
+        self.count = 0
+        self.seconds = 0.0
+        self.mode = mode
+        self.threshold = threshold
+        self.shapes = {} if mode in ("warn", "raise") else None
+
+
+def current_stats():
+    return _current.get()
+
+
+def _call_site():
+    # Frame terakhir dari kode project (bukan SQLAlchemy/FastAPI/file ini)
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if frame.filename.startswith(_PROJECT_DIR) and "site-packages" not in frame.filename:
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+
+def _track_shape(stats, statement):
+    if statement.lstrip()[:6].upper() != "SELECT":
+        return
+    seen = stats.shapes.get(statement, 0) + 1
+    stats.shapes[statement] = seen
+    if seen != stats.threshold + 1:
+        return
+    message = (
+        f"Possible N+1: same SELECT ran {seen} times in one request "
+        f"(threshold {stats.threshold}) at {_call_site()}\n{statement}"
+    )
+    if stats.mode == "raise":
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+# Listener di class Engine supaya primary, replica, dan engine async (sync_engine) ikut terhitung
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    if stats.shapes is not None and not executemany:
+        _track_shape(stats, statement)
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if starts:
+        stats.seconds += time.perf_counter() - starts.pop()
+    stats.count += 1
+
+
+@contextmanager
+def detect_n_plus_one(threshold=NPLUS1_THRESHOLD, mode="raise"):
+    """Track statements outside a request, e.g. around a function under test:
+
+        with detect_n_plus_one(threshold=3):
+            calculate_score(attempt_id, db)
+    """
+    stats = QueryStats(mode, threshold)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+async def query_stats_middleware(request, call_next):
+    """Adds X-DB-Queries / X-DB-Time-ms to every response and logs them per request."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+    db_ms = stats.seconds * 1000
+    response.headers["X-DB-Queries"] = str(stats.count)
+    response.headers["X-DB-Time-ms"] = f"{db_ms:.2f}"
+    logger.info(
+        "%s %s %s queries=%d db_ms=%.2f total_ms=%.2f",
+        request.method, request.url.path, response.status_code, stats.count, db_ms, total_ms,
+    )
+    return response
@@ -1,20 +1,22 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import SessionLocal
+from auth import require_admin
+from database import get_db, get_async_db
 from models import Tests, Questions, Answers
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Keyset
+from course_snapshot import invalidate_course, invalidate_course_of_test
+from test_snapshot import get_snapshot, get_snapshot_async, invalidate_question, invalidate_test
 from pydantic import BaseModel, Field
 
 quiz_router = APIRouter()
+# Versi async untuk pengiriman soal, dipasang main.py kalau DB_ASYNC=1
+quiz_async_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+ANSWER_KEYSET = Keyset(Answers.answer_id)
 
 class TestCreate(BaseModel):
     course_id: int = Field(..., description="Course ID harus ada")
@@ -97,12 +99,18 @@ class AnswerOut(BaseModel):
     class Config:
         orm_mode: True 
 
-@quiz_router.post("/test/create", response_model=TestOut)
+class AnswerPage(BaseModel):
+    items: List[AnswerOut]
+    next_cursor: Optional[str] = None
+
+@quiz_router.post("/test/create", response_model=TestOut, dependencies=[Depends(require_admin)])
 def create_test(test: TestCreate, db: Session = Depends(get_db)):
     new_test = Tests(course_id=test.course_id, test_id=test.test_id, title=test.title, description=test.description, pass_percentage=test.pass_percentage, time_limit=test.time_limit, admin_id=test.admin_id)
     db.add(new_test)
     db.commit()
     db.refresh(new_test)
+    invalidate_test(new_test.test_id)
+    invalidate_course(new_test.course_id)
     return new_test
 
 @quiz_router.get("/test/{test_id}", response_model=TestOut)
@@ -112,12 +120,20 @@ def get_test(test_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
     return test
 
-@quiz_router.put("/test/update/{test_id}", response_model=TestOut)
+@quiz_router.get("/test/{test_id}/full")
+def get_test_full(test_id: int, db: Session = Depends(get_db)):
+    snapshot = get_snapshot(db, test_id)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
+    return Response(content=snapshot, media_type="application/json")
+
+@quiz_router.put("/test/update/{test_id}", response_model=TestOut, dependencies=[Depends(require_admin)])
 def update_test(test_id: int, test: TestUpdate, db: Session = Depends(get_db)):
     db_test = db.query(Tests).filter(Tests.test_id == test_id).first()
     if not db_test:
         raise HTTPException(status_code=404, detail="Test not found")
     
+    old_course_id = db_test.course_id
     db_test.course_id = test.course_id
     db_test.title = test.title
     db_test.description = test.description
@@ -127,23 +143,30 @@ def update_test(test_id: int, test: TestUpdate, db: Session = Depends(get_db)):
     
     db.commit()
     db.refresh(db_test)
+    invalidate_test(test_id)
+    invalidate_course(old_course_id)
+    invalidate_course(db_test.course_id)
     return db_test
 
-@quiz_router.delete("/test/delete/{test_id}", response_model=TestOut)
+@quiz_router.delete("/test/delete/{test_id}", response_model=TestOut, dependencies=[Depends(require_admin)])
 def delete_test(test_id: int, db: Session = Depends(get_db)):
     test = db.query(Tests).filter(Tests.test_id == test_id).first()
     if test is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
     db.delete(test)
     db.commit()
+    invalidate_test(test_id)
+    invalidate_course(test.course_id)
     return test
 
-@quiz_router.post("/question/create/{test_id}", response_model=QuestionOut)
+@quiz_router.post("/question/create/{test_id}", response_model=QuestionOut, dependencies=[Depends(require_admin)])
 def create_question(test_id: int, question: QuestionCreate, db: Session = Depends(get_db)):
     new_question = Questions(test_id=question.test_id, question_id=question.question_id, question=question.question, question_type=question.question_type, marks=question.marks, admin_id=question.admin_id)
     db.add(new_question)
     db.commit()
     db.refresh(new_question)
+    invalidate_test(new_question.test_id)
+    invalidate_course_of_test(db, new_question.test_id)
     return new_question
 
 @quiz_router.get("/question/{test_id}/{question_id}", response_model=QuestionOut)
@@ -153,33 +176,41 @@ def get_question(test_id: int, question_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
     return question
 
-@quiz_router.put("/question/update/{test_id}/{question_id}", response_model=QuestionOut)
+@quiz_router.put("/question/update/{test_id}/{question_id}", response_model=QuestionOut, dependencies=[Depends(require_admin)])
 def update_question(question_id: int, question: QuestionUpdate, db: Session = Depends(get_db)):
     db_question = db.query(Questions).filter(Questions.question_id == question_id).first()
     if not db_question:
         raise HTTPException(status_code=404, detail="Question not found")
     
+    old_test_id = db_question.test_id
     db_question.test_id = question.test_id
     db_question.text = question.text
     db.commit()
     db.refresh(db_question)
+    invalidate_test(old_test_id)
+    invalidate_test(db_question.test_id)
+    invalidate_course_of_test(db, old_test_id)
+    invalidate_course_of_test(db, db_question.test_id)
     return db_question
 
-@quiz_router.delete("/question/delete/{test_id}/{question_id}", response_model=QuestionOut)
+@quiz_router.delete("/question/delete/{test_id}/{question_id}", response_model=QuestionOut, dependencies=[Depends(require_admin)])
 def delete_question(test_id: int, question_id: int, db: Session = Depends(get_db)):
     question = db.query(Questions).filter(Questions.test_id == test_id, Questions.question_id == question_id).first()
     if question is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Question not found")
     db.delete(question)
     db.commit()
+    invalidate_test(test_id)
+    invalidate_course_of_test(db, test_id)
     return question
 
-@quiz_router.post("/answer/create/{test_id}/{question_id}", response_model=AnswerOut)
+@quiz_router.post("/answer/create/{test_id}/{question_id}", response_model=AnswerOut, dependencies=[Depends(require_admin)])
 def create_answer(test_id: int, question_id: int, answer: AnswerCreate, db: Session = Depends(get_db)):
     new_answer = Answers(question_id=answer.question_id, answer_id=answer.answer_id, answer=answer.answer, is_correct=answer.is_correct, admin_id=answer.admin_id)
     db.add(new_answer)
     db.commit()
     db.refresh(new_answer)
+    invalidate_question(db, new_answer.question_id)
     return new_answer
 
 @quiz_router.get("/answer/{test_id}/{question_id}/{answer_id}", response_model=AnswerOut)
@@ -189,30 +220,52 @@ def get_answer(test_id: int, question_id: int, answer_id: int, db: Session = Dep
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Answer not found")
     return answer
 
-@quiz_router.put("/answer/update/{test_id}/{question_id}/{answer_id}", response_model=AnswerOut)
-def update_answer(answer_id: int, answer: AnswerUpdate, db: Session = Depends(get_db)):
+@quiz_router.put("/answer/update/{test_id}/{question_id}/{answer_id}", response_model=AnswerOut, dependencies=[Depends(require_admin)])
+def update_answer(test_id: int, answer_id: int, answer: AnswerUpdate, db: Session = Depends(get_db)):
     db_answer = db.query(Answers).filter(Answers.answer_id == answer_id).first()
     if not db_answer:
         raise HTTPException(status_code=404, detail="Answer not found")
     
+    # Jawaban bisa pindah soal: snapshot soal lama dan baru sama-sama basi
+    old_question_id = db_answer.question_id
     db_answer.question_id = answer.question_id
     db_answer.text = answer.text
     db_answer.is_correct = answer.is_correct
     
     db.commit()
     db.refresh(db_answer)
+    invalidate_question(db, old_question_id)
+    if db_answer.question_id != old_question_id:
+        invalidate_question(db, db_answer.question_id)
     return db_answer
 
-@quiz_router.delete("/answer/delete/{test_id}/{question_id}/{answer_id}", response_model=AnswerOut)
+@quiz_router.delete("/answer/delete/{test_id}/{question_id}/{answer_id}", response_model=AnswerOut, dependencies=[Depends(require_admin)])
 def delete_answer(test_id: int, question_id: int, answer_id: int, db: Session = Depends(get_db)):
     answer = db.query(Answers).filter(Answers.question_id == question_id, Answers.answer_id == answer_id).first()
     if answer is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Answer not found")
     db.delete(answer)
     db.commit()
+    invalidate_question(db, question_id)
     return answer
 
-@quiz_router.get("/answers/{test_id}/{question_id}", response_model=List[AnswerOut])
-def get_answers(test_id: int, question_id: int, db: Session = Depends(get_db)):
-    answers = db.query(Answers).filter(Answers.question_id == question_id).all()
-    return answers
\ No newline at end of file
+@quiz_router.get("/answers/{test_id}/{question_id}", response_model=AnswerPage)
+def get_answers(test_id: int, question_id: int, cursor: Optional[str] = None,
+                limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    query = db.query(Answers).filter(Answers.question_id == question_id)
+    answers, next_cursor = ANSWER_KEYSET.page(ANSWER_KEYSET.apply(query, cursor, limit).all(), limit)
+    return {"items": answers, "next_cursor": next_cursor}
+
+@quiz_async_router.get("/test/{test_id}", response_model=TestOut)
+async def get_test_async(test_id: int, db: AsyncSession = Depends(get_async_db)):
+    test = await db.get(Tests, test_id)
+    if test is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
+    return test
+
+@quiz_async_router.get("/test/{test_id}/full")
+async def get_test_full_async(test_id: int, db: AsyncSession = Depends(get_async_db)):
+    snapshot = await get_snapshot_async(db, test_id)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
+    return Response(content=snapshot, media_type="application/json")
@@ -0,0 +1,196 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from fastapi.responses import JSONResponse
+
+from routing import SAFE_METHODS
+
+# Token bucket per (policy, client). Client = user dari bearer token kalau ada,
+# selain itu IP. Konfigurasi lewat env seperti database.py:
+#   RATE_LIMIT_ENABLED=1                   nyalakan limiter (default mati)
+#   RATE_LIMIT_STORAGE_URL=redis://host/0  bucket dibagi antar worker (butuh paket redis)
+#   RATE_LIMIT_LOGIN=10/minute, RATE_LIMIT_REGISTER, RATE_LIMIT_WRITE, RATE_LIMIT_READ
+#   RATE_LIMIT_TRUST_FORWARDED=1           pakai X-Forwarded-For (di belakang proxy)
+# Default mati: di belakang proxy tanpa RATE_LIMIT_TRUST_FORWARDED semua user
+# anonim berbagi satu bucket (IP proxy), jadi login bisa terkunci untuk semua orang.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "0").lower() in ("1", "true", "yes", "on")
+
+RatePolicy = namedtuple("RatePolicy", "name limit period")
+
+logger = logging.getLogger("ureeka.rate_limit")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str):
+    """"50/minute" -> (50, 60)."""
+    count, _, unit = rate.partition("/")
+    return int(count), _PERIODS[unit.strip().rstrip("s")]
+
+
+def policy(name, default):
+    return RatePolicy(name, *parse_rate(os.getenv(f"RATE_LIMIT_{name.upper()}", default)))
+
+
+# (methods, prefix path, policy); yang pertama cocok dipakai, policy None = tidak dibatasi
+DEFAULT_POLICIES = [
+    (("POST",), "/auth/login", policy("login", "10/minute")),
+    (("POST",), "/auth/register", policy("register", "5/minute")),
+    (None, "/health", None),
+    (SAFE_METHODS, "/", policy("read", "600/minute")),
+    (None, "/", policy("write", "120/minute")),
+]
+
+
+class MemoryStore:
+    """Buckets in one OrderedDict: O(1) per hit, idle buckets (already full again)
+    are dropped from the least recently used end."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at, expires_at]
+        self._lock = threading.Lock()
+
+    async def hit(self, key, limit, period):
+        """Take one token. Returns (allowed, remaining, retry_after_seconds)."""
+        now = time.monotonic()
+        rate = limit / period
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(limit), now, 0.0]
+            else:
+                bucket[0] = min(limit, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            bucket[2] = now + (limit - bucket[0]) / rate
+            self._sweep(now)
+            retry_after = 0 if allowed else (1 - bucket[0]) / rate
+            return allowed, int(bucket[0]), retry_after
+
+    def _sweep(self, now):
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket[2] > now and len(buckets) <= self.maxsize:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisStore:
+    """Shared buckets for several workers/hosts; same token bucket, run atomically in Redis."""
+
+    SCRIPT = """
+    local limit = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local rate = limit / period
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or limit
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(limit, tokens + (now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil((limit - tokens) / rate * 1000) + 1000)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix="ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL=redis://... needs the redis package (pip install redis)")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def hit(self, key, limit, period):
+        allowed, tokens = await self._script(keys=[self.prefix + key], args=[limit, period])
+        tokens = float(tokens)
+        retry_after = 0 if allowed else (1 - tokens) * period / limit
+        return bool(allowed), int(tokens), retry_after
+
+
+def make_store(url=RATE_LIMIT_STORAGE_URL):
+    if url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL: {url}")
+
+
+class RateLimiter:
+    def __init__(self, policies=None, store=None, trust_forwarded=RATE_LIMIT_TRUST_FORWARDED):
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.store = store if store is not None else make_store()
+        self.trust_forwarded = trust_forwarded
+        self._warned_forwarded = False
+
+    def policy_for(self, method, path):
+        for methods, prefix, rate_policy in self.policies:
+            if (methods is None or method in methods) and path.startswith(prefix):
+                return rate_policy
+        return None
+
+    def client_key(self, request):
+        authorization = request.headers.get("authorization", "")
+        if authorization[:7].lower() == "bearer ":
+            from auth import decode_token
+
+            # decode_token memakai LRU token yang sudah diverifikasi, jadi murah
+            claims = decode_token(authorization[7:])
+            if claims:
+                return f"user:{claims[1]}:{claims[0]}"
+        if "x-forwarded-for" in request.headers:
+            if self.trust_forwarded:
+                return "ip:" + request.headers["x-forwarded-for"].split(",")[0].strip()
+            if not self._warned_forwarded:
+                self._warned_forwarded = True
+                logger.error("Request came through a proxy (X-Forwarded-For) but RATE_LIMIT_TRUST_FORWARDED is off: "
+                             "anonymous clients share the proxy's bucket. Set RATE_LIMIT_TRUST_FORWARDED=1 "
+                             "if the proxy sets the header, or disable the limiter.")
+        return "ip:" + (request.client.host if request.client else "unknown")
+
+    async def check(self, request):
+        """(policy, allowed, remaining, retry_after), or None when the route isn't limited."""
+        rate_policy = self.policy_for(request.method, request.url.path)
+        if rate_policy is None:
+            return None
+        key = f"{rate_policy.name}:{self.client_key(request)}"
+        return (rate_policy, *await self.store.hit(key, rate_policy.limit, rate_policy.period))
+
+
+def make_rate_limit_middleware(limiter: RateLimiter):
+    """HTTP middleware: 429 + Retry-After when the client's bucket for the route is empty."""
+
+    async def rate_limit(request, call_next):
+        result = await limiter.check(request)
+        if result is None:
+            return await call_next(request)
+        rate_policy, allowed, remaining, retry_after = result
+        headers = {"X-RateLimit-Limit": str(rate_policy.limit), "X-RateLimit-Remaining": str(remaining)}
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+            return JSONResponse({"detail": "Too many requests"}, status_code=429, headers=headers)
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    return rate_limit
@@ -0,0 +1,154 @@
+import functools
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+# True selama request read-only (GET/HEAD) yang boleh dibaca dari replica
+_use_replica = ContextVar("use_replica", default=False)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+RYW_COOKIE = "ryw_until"
+
+
+class ReplicaSet:
+    """Round-robin over healthy replica engines, re-checked in the background."""
+
+    def __init__(self, engines=(), check_interval=10):
+        self._lock = threading.Lock()
+        self.configure(engines, check_interval)
+
+    def configure(self, engines, check_interval=10):
+        for engine in getattr(self, "engines", ()):
+            if event.contains(engine, "handle_error", self._on_error):
+                event.remove(engine, "handle_error", self._on_error)
+        self.engines = list(engines)
+        self.check_interval = check_interval
+        self._healthy = list(self.engines)
+        self._cycle = itertools.cycle(self._healthy) if self._healthy else None
+        self._last_check = time.monotonic()
+        self._checking = False
+        for engine in self.engines:
+            # Replica yang putus langsung dikeluarkan sampai health check berikutnya
+            event.listen(engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect and context.engine is not None:
+            self.mark_down(context.engine)
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def _set_healthy(self, healthy):
+        with self._lock:
+            if healthy != self._healthy:
+                self._healthy = healthy
+                self._cycle = itertools.cycle(healthy) if healthy else None
+
+    def check(self):
+        healthy = []
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+                healthy.append(engine)
+            except Exception:
+                pass
+        self._set_healthy(healthy)
+        self._last_check = time.monotonic()
+        self._checking = False
+        return healthy
+
+    def mark_down(self, engine):
+        self._set_healthy([e for e in self._healthy if e is not engine])
+
+    def _maybe_check(self):
+        if self._checking or time.monotonic() - self._last_check < self.check_interval:
+            return
+        self._checking = True
+        threading.Thread(target=self.check, name="replica-health", daemon=True).start()
+
+    def pick(self):
+        """Next healthy replica, or None when every replica is down."""
+        self._maybe_check()
+        with self._lock:
+            return next(self._cycle) if self._cycle else None
+
+
+replicas = ReplicaSet()
+
+
+def reads_primary(build):
+    """Decorator for cache builders keyed by a version (snapshots, answer key,
+    ...): they run right after an invalidation and their result is kept for the
+    whole TTL, so they must not read a lagging replica."""
+
+    @functools.wraps(build)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(False)
+        try:
+            return build(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+def _is_read(clause):
+    # Hanya SELECT murni yang boleh ke replica; text() dicek dari awal SQL-nya,
+    # SELECT ... FOR UPDATE dan statement lain (DML, DDL, raw SQL) ke primary
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == "SELECT"
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """Sends SELECTs of read-only requests to a replica and everything else to
+    the session's own bind (the primary). Once a session writes it stays on the
+    primary, so it reads its own changes. A session keeps the first replica it
+    picked, so all reads of one request see the same snapshot."""
+
+    _wrote = False
+    _replica = None
+
+    def get_bind(self, mapper=None, **kw):
+        clause = kw.get("clause")
+        if self._flushing or (clause is not None and not _is_read(clause)):
+            self._wrote = True
+        if self._wrote or clause is None or not _use_replica.get() or not replicas:
+            return super().get_bind(mapper, **kw)
+        if self._replica is None:
+            self._replica = replicas.pick()
+        return self._replica or super().get_bind(mapper, **kw)
+
+    def close(self):
+        self._replica = None
+        self._wrote = False
+        super().close()
+
+
+def make_read_routing_middleware(read_your_writes=5):
+    """HTTP middleware: read-only requests go to replicas, unless the client wrote
+    within the last `read_your_writes` seconds (tracked with a cookie)."""
+
+    async def route_reads(request, call_next):
+        recent_write = False
+        if read_your_writes:
+            try:
+                recent_write = float(request.cookies.get(RYW_COOKIE, 0)) > time.time()
+            except ValueError:
+                pass
+        token = _use_replica.set(request.method in SAFE_METHODS and not recent_write)
+        try:
+            response = await call_next(request)
+        finally:
+            _use_replica.reset(token)
+        if read_your_writes and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(RYW_COOKIE, str(time.time() + read_your_writes), max_age=read_your_writes, httponly=True)
+        return response
+
+    return route_reads
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from autocomplete import autocomplete
+from database import get_db
+from pydantic import BaseModel
+from search_index import search
+
+search_router = APIRouter()
+
+class SearchHit(BaseModel):
+    kind: str
+    id: int
+    course_id: Optional[int] = None
+    category_id: Optional[int] = None
+    title: str
+    score: float
+
+class SearchResults(BaseModel):
+    query: str
+    items: List[SearchHit]
+
+class Suggestion(BaseModel):
+    id: int
+    label: str
+    popularity: int
+
+class Suggestions(BaseModel):
+    query: str
+    courses: List[Suggestion]
+    categories: List[Suggestion]
+
+# ?q=python&category_id=1&kind=material, hasil diurutkan dari yang paling relevan
+@search_router.get("/", response_model=SearchResults)
+def search_catalog(q: str = Query(..., min_length=2, max_length=200), category_id: Optional[int] = None,
+                   kind: Optional[str] = Query(None, pattern="^(course|material)$"),
+                   limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    hits = search(db, q, category_id=category_id, kind=kind, limit=limit)
+    return {"query": q, "items": [hit._asdict() for hit in hits]}
+
+# Type-ahead judul course dan nama kategori, dilayani dari index di memori
+@search_router.get("/autocomplete", response_model=Suggestions)
+def autocomplete_catalog(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(5, ge=1, le=20)):
+    results = autocomplete.lookup(q, limit)
+    return {
+        "query": q,
+        "courses": [{"id": i, "label": label, "popularity": n} for i, label, n in results["courses"]],
+        "categories": [{"id": i, "label": label, "popularity": n} for i, label, n in results["categories"]],
+    }
@@ -0,0 +1,298 @@
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter, namedtuple
+
+from sqlalchemy import desc, literal, select, union_all
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+
+from models import Course, Materials
+from routing import reads_primary
+
+# Search course dan materi (title + description).
+#   SEARCH_BACKEND=auto      FULLTEXT kalau database-nya MySQL, selain itu index di memori
+#   SEARCH_BACKEND=fulltext  selalu MATCH ... AGAINST (butuh migrasi c3e8f1a2d4b6)
+#   SEARCH_BACKEND=memory    selalu inverted index di memori
+# Index memori dibangun saat search pertama dan di-update oleh router course/material;
+# tiap proses punya index sendiri, jadi dengan banyak worker pakai MySQL FULLTEXT.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+
+Hit = namedtuple("Hit", "kind id course_id category_id title score")
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the to with "
+    "dan di ke dari yang untuk dengan pada ini itu atau dalam".split()
+)
+# BM25; kata di judul dihitung TITLE_WEIGHT kali
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3
+# Query dengan total posting di atas ini memakai threshold algorithm atas posting
+# yang diurutkan per bobot, jadi kata umum tidak membuat semua dokumennya diskor
+EXHAUSTIVE_POSTINGS = 2000
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _term_counts(title, description):
+    counts = Counter(tokenize(description))
+    for token in tokenize(title):
+        counts[token] += TITLE_WEIGHT
+    return counts
+
+
+class _State:
+    """postings: token -> {doc: BM25 term weight tanpa idf}, doc = (kind, id).
+    Bobot dinormalisasi dengan panjang rata-rata saat dokumen diindex; load()
+    berikutnya menghitung ulang semuanya."""
+
+    def __init__(self):
+        self.postings = {}
+        self.ranked = {}  # token -> [(doc, weight)] urut bobot turun, dibuat saat dibutuhkan
+        self.docs = {}  # doc -> (course_id, title, length, tokens)
+        self.course_category = {}
+        self.total_length = 0
+
+    def add(self, doc, course_id, title, counts, avg_length=None):
+        self.remove(doc)
+        length = sum(counts.values())
+        if avg_length is None:
+            avg_length = (self.total_length + length) / (len(self.docs) + 1)
+        norm = K1 * (1 - B + B * length / max(avg_length, 1))
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[doc] = tf * (K1 + 1) / (tf + norm)
+            self.ranked.pop(token, None)
+        self.docs[doc] = (course_id, title, length, tuple(counts))
+        self.total_length += length
+
+    def remove(self, doc):
+        entry = self.docs.pop(doc, None)
+        if entry is None:
+            return
+        self.total_length -= entry[2]
+        for token in entry[3]:
+            self.ranked.pop(token, None)
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc, None)
+                if not posting:
+                    del self.postings[token]
+
+    def ranked_posting(self, token):
+        ranked = self.ranked.get(token)
+        if ranked is None:
+            ranked = self.ranked[token] = sorted(self.postings[token].items(), key=lambda item: -item[1])
+        return ranked
+
+    def apply(self, op, *args):
+        if op == "course":
+            course_id, category_id, title, description = args
+            self.course_category[course_id] = category_id
+            self.add(("course", course_id), course_id, title, _term_counts(title, description))
+        elif op == "material":
+            material_id, course_id, title, description = args
+            self.add(("material", material_id), course_id, title, _term_counts(title, description))
+        elif op == "delete_course":
+            self.course_category.pop(args[0], None)
+            self.remove(("course", args[0]))
+        elif op == "delete_material":
+            self.remove(("material", args[0]))
+
+
+class MemorySearchIndex:
+    def __init__(self):
+        self._state = _State()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._backlog = None  # list selama load() berjalan
+
+    def _apply(self, op, *args):
+        with self._lock:
+            if self._backlog is not None:
+                self._backlog.append((op, args))
+            elif self._loaded:
+                self._state.apply(op, *args)
+            # Belum di-load: load() nanti membaca perubahan ini dari database
+
+    def course_changed(self, course):
+        self._apply("course", course.course_id, course.category_id, course.title, course.description)
+
+    def course_deleted(self, course_id):
+        self._apply("delete_course", course_id)
+
+    def material_changed(self, material):
+        self._apply("material", material.material_id, material.course_id, material.title, material.description)
+
+    def material_deleted(self, material_id):
+        self._apply("delete_material", material_id)
+
+    @reads_primary
+    def load(self, db: Session):
+        """(Re)build from the database. Writes made while loading are replayed on
+        the new index before it replaces the old one."""
+        with self._load_lock:
+            with self._lock:
+                self._backlog = []
+            try:
+                state = _State()
+                rows = []
+                courses = db.execute(
+                    select(Course.course_id, Course.category_id, Course.title, Course.description)
+                ).yield_per(5000)
+                for course_id, category_id, title, description in courses:
+                    state.course_category[course_id] = category_id
+                    rows.append((("course", course_id), course_id, title, _term_counts(title, description)))
+                materials = db.execute(
+                    select(Materials.material_id, Materials.course_id, Materials.title, Materials.description)
+                ).yield_per(5000)
+                for material_id, course_id, title, description in materials:
+                    rows.append((("material", material_id), course_id, title, _term_counts(title, description)))
+                avg_length = sum(sum(counts.values()) for *_, counts in rows) / max(len(rows), 1)
+                for doc, course_id, title, counts in rows:
+                    state.add(doc, course_id, title, counts, avg_length)
+            except BaseException:
+                with self._lock:
+                    self._backlog = None
+                raise
+            with self._lock:
+                for op, args in self._backlog:
+                    state.apply(op, *args)
+                self._backlog = None
+                self._state = state
+                self._loaded = True
+
+    def search(self, db: Session, q, category_id=None, kind=None, limit=20):
+        if not self._loaded:
+            self.load(db)
+        terms = set(tokenize(q))
+        with self._lock:
+            state = self._state
+            n = len(state.docs)
+            lists = []
+            for term in terms:
+                posting = state.postings.get(term)
+                if posting:
+                    lists.append((term, posting, math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))))
+
+            def matches(doc):
+                if kind is not None and doc[0] != kind:
+                    return False
+                return category_id is None or state.course_category.get(state.docs[doc][0]) == category_id
+
+            # Dokumen yang memuat semua kata didahulukan (irisan key dict murah), baru
+            # sisanya diisi dari dokumen yang memuat sebagian kata
+            best, exclude = [], set()
+            if len(lists) > 1:
+                postings = sorted((posting for _, posting, _ in lists), key=len)
+                exclude = postings[0].keys() & postings[1].keys()
+                for posting in postings[2:]:
+                    exclude &= posting.keys()
+                best = heapq.nlargest(limit, (
+                    (sum(idf * posting[doc] for _, posting, idf in lists), doc) for doc in exclude if matches(doc)
+                ))
+            if len(best) < limit:
+                top = self._score_all if sum(len(p) for _, p, _ in lists) <= EXHAUSTIVE_POSTINGS else self._threshold_top
+                best += top(state, lists, matches, limit - len(best), exclude)
+            hits = []
+            for score, (doc_kind, doc_id) in best:
+                course_id, title = state.docs[(doc_kind, doc_id)][:2]
+                hits.append(Hit(doc_kind, doc_id, course_id, state.course_category.get(course_id), title, round(score, 4)))
+        return hits
+
+    @staticmethod
+    def _score_all(state, lists, matches, limit, exclude):
+        scores = {}
+        for _, posting, idf in lists:
+            get = scores.get
+            for doc, weight in posting.items():
+                scores[doc] = get(doc, 0.0) + idf * weight
+        return heapq.nlargest(limit, (
+            (score, doc) for doc, score in scores.items() if doc not in exclude and matches(doc)
+        ))
+
+    @staticmethod
+    def _threshold_top(state, lists, matches, limit, exclude):
+        """Fagin's threshold algorithm: walk every term's postings from the highest
+        weight down, score each new document fully, and stop once the k-th best
+        score beats the best possible score of any document not seen yet."""
+        ranked = [(state.ranked_posting(term), idf) for term, _, idf in lists]
+        heap, seen = [], set(exclude)
+        position = 0
+        while True:
+            threshold = 0.0
+            exhausted = True
+            for postings, idf in ranked:
+                if position >= len(postings):
+                    continue
+                exhausted = False
+                doc, weight = postings[position]
+                threshold += idf * weight
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                if not matches(doc):
+                    continue
+                score = sum(idf * posting.get(doc, 0.0) for _, posting, idf in lists)
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, doc))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, doc))
+            if exhausted or (len(heap) == limit and heap[0][0] >= threshold):
+                break
+            position += 1
+        return sorted(heap, reverse=True)
+
+    def stats(self):
+        return {"backend": "memory", "loaded": self._loaded, "documents": len(self._state.docs),
+                "terms": len(self._state.postings)}
+
+
+def fulltext_search(db: Session, q, category_id=None, kind=None, limit=20):
+    """MATCH ... AGAINST over the FULLTEXT indexes (natural language mode)."""
+    parts = []
+    if kind in (None, "course"):
+        score = match(Course.title, Course.description, against=q)
+        statement = select(
+            literal("course").label("kind"), Course.course_id.label("id"), Course.course_id.label("course_id"),
+            Course.category_id, Course.title, score.label("score"),
+        ).where(score)
+        if category_id is not None:
+            statement = statement.where(Course.category_id == category_id)
+        parts.append(statement)
+    if kind in (None, "material"):
+        score = match(Materials.title, Materials.description, against=q)
+        statement = (
+            select(
+                literal("material").label("kind"), Materials.material_id.label("id"), Materials.course_id,
+                Course.category_id, Materials.title, score.label("score"),
+            )
+            .join(Course, Course.course_id == Materials.course_id)
+            .where(score)
+        )
+        if category_id is not None:
+            statement = statement.where(Course.category_id == category_id)
+        parts.append(statement)
+    statement = (parts[0] if len(parts) == 1 else union_all(*parts)).order_by(desc("score")).limit(limit)
+    return [Hit(*row) for row in db.execute(statement)]
+
+
+search_index = MemorySearchIndex()
+
+
+def use_fulltext(db: Session):
+    if SEARCH_BACKEND == "auto":
+        return db.get_bind().dialect.name == "mysql"
+    return SEARCH_BACKEND == "fulltext"
+
+
+def search(db: Session, q, category_id=None, kind=None, limit=20):
+    if use_fulltext(db):
+        return fulltext_search(db, q, category_id, kind, limit)
+    return search_index.search(db, q, category_id, kind, limit)
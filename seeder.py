@@ -1,20 +1,20 @@
-from datetime import datetime
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
-from database import Base
+from database import Base, engine, make_engine
 from models import Admin, Student, Course, Categories, Enrollments, Materials, Tests, Questions, Answers, Certificates, Forum_Topics, Forum_Replies,Tests_Attempts, Student_Answers
 
-DATABASE_URL = "mysql+mysqlconnector://root:@localhost:3306/ureekaCourse"
-
-
-# Create the database engine
-engine = create_engine(DATABASE_URL)
-
-# Create all tables
-Base.metadata.create_all(engine)
 
 # Seed data
 def seed_data():
+    # Create all tables
+    Base.metadata.create_all(engine)
+
     # Create a new session
     with Session(bind=engine) as session:
             try:
@@ -78,6 +78,353 @@ def seed_data():
                 session.close()
 
 
+
+# ---------------------------------------------------------------------------
+# Generator data sintetis untuk capacity planning:
+#   python seeder.py --students 200000 --courses 2000 --attempts 2000000 --seed 42
+# Semua primary key diberikan sendiri (mulai dari MAX(id)+1), jadi insert
+# bisa dikirim per chunk tanpa perlu membaca balik id dari database.
+# ---------------------------------------------------------------------------
+
+CATEGORY_NAMES = [
+    "Programming", "Databases", "Data Science", "Web Development", "Mobile Development",
+    "Networking", "Security", "Cloud", "Design", "Mathematics", "Business", "Languages",
+]
+# Kosakata judul/deskripsi materi supaya search punya teks yang realistis
+TOPIC_TERMS = [
+    "python", "java", "javascript", "sql", "joins", "indexes", "transactions", "normalization", "loops",
+    "functions", "recursion", "classes", "inheritance", "testing", "debugging", "git", "docker", "kubernetes",
+    "linux", "networking", "tcp", "http", "rest", "api", "authentication", "encryption", "hashing", "firewalls",
+    "statistics", "regression", "probability", "pandas", "numpy", "visualization", "clustering", "neural",
+    "react", "css", "html", "flutter", "android", "kotlin", "swift", "figma", "typography", "accounting",
+    "marketing", "calculus", "algebra", "geometry", "grammar", "vocabulary", "cloud", "serverless", "caching",
+]
+MATERIAL_TYPES = (["pdf", "video", "slides", "text"], [35, 35, 20, 10])
+QUESTION_TYPES = (["multiple_choice", "true_false", "essay"], [80, 15, 5])
+START = datetime(2023, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+
+class Generator:
+    def __init__(self, session, seed=42, chunk_size=5000, log=print):
+        self.session = session
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.log = log
+        self.counts = {}
+        # Hash bcrypt mahal, jadi semua student sintetis memakai password "password"
+        from password_pool import hash_password
+        self.password_hash = hash_password("password")
+
+    def _next_id(self, model):
+        pk = model.__table__.primary_key.columns.values()[0]
+        return (self.session.execute(select(func.max(pk))).scalar() or 0) + 1
+
+    def _insert(self, model, rows, after_chunk=None):
+        # after_chunk: menulis baris anak setelah induknya masuk, dalam commit yang sama
+        table = model.__table__
+        started = time.perf_counter()
+        total = 0
+        for chunk in iter(lambda: list(itertools.islice(rows, self.chunk_size)), []):
+            self.session.execute(table.insert(), chunk)
+            if after_chunk:
+                after_chunk()
+            self.session.commit()
+            total += len(chunk)
+        self.counts[table.name] = self.counts.get(table.name, 0) + total
+        self.log(f"{table.name:<16} {self.counts[table.name]:>10} rows  {time.perf_counter() - started:8.1f}s")
+        return total
+
+    def _time(self, after=START):
+        remaining = max(1, int((START + timedelta(seconds=SPAN_SECONDS) - after).total_seconds()))
+        return after + timedelta(seconds=self.rng.randrange(remaining))
+
+    def _zipf_weights(self, n, s=1.1):
+        # Popularitas course mengikuti Zipf: sedikit course sangat ramai
+        weights = [1 / (rank ** s) for rank in range(1, n + 1)]
+        self.rng.shuffle(weights)
+        return list(itertools.accumulate(weights))
+
+    def _pick(self, ids, cum_weights):
+        return ids[bisect.bisect(cum_weights, self.rng.random() * cum_weights[-1])]
+
+    def run(self, students, courses, attempts, admins=None, categories=12, materials_per_course=8,
+            tests_per_course=2, questions_per_test=10, enrollments_per_student=3, topics_per_course=5,
+            replies_per_topic=5):
+        rng = self.rng
+        admins = admins or max(2, courses // 50)
+
+        admin0 = self._next_id(Admin)
+        admin_ids = list(range(admin0, admin0 + admins))
+        self._insert(Admin, ({
+            "admin_id": a, "username": f"admin{a}", "email": f"admin{a}@example.com",
+            "password_hash": self.password_hash, "first_name": "Admin", "last_name": str(a),
+            "created_at": START, "is_active": True,
+        } for a in admin_ids))
+
+        student0 = self._next_id(Student)
+        student_ids = list(range(student0, student0 + students))
+
+        def student_rows():
+            for sid in student_ids:
+                joined = self._time()
+                yield {
+                    "student_id": sid, "username": f"student{sid}", "email": f"student{sid}@example.com",
+                    "password_hash": self.password_hash, "first_name": "Student", "last_name": str(sid),
+                    "join_date": joined.date(), "created_at": joined,
+                    "last_login": self._time(joined) if rng.random() < 0.8 else None, "is_active": rng.random() < 0.97,
+                }
+        self._insert(Student, student_rows())
+
+        category0 = self._next_id(Categories)
+        category_ids = list(range(category0, category0 + categories))
+        self._insert(Categories, ({
+            "category_id": c,
+            "name": CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + (f" {i // len(CATEGORY_NAMES) + 1}" if i >= len(CATEGORY_NAMES) else "")
+                    + (f" #{c}" if category0 > 1 else ""),
+            "description": "Generated category",
+        } for i, c in enumerate(category_ids)))
+
+        course0 = self._next_id(Course)
+        course_ids = list(range(course0, course0 + courses))
+        course_created = {}
+
+        def course_rows():
+            for cid in course_ids:
+                created = self._time()
+                course_created[cid] = created
+                yield {
+                    "course_id": cid, "title": f"Course {cid}: {rng.choice(CATEGORY_NAMES)} {rng.choice(['Basics', 'Advanced', 'Bootcamp', 'in Practice', 'Fundamentals'])}",
+                    "description": f"Generated course {cid} covering {', '.join(rng.sample(TOPIC_TERMS, 3))}",
+                    "category_id": rng.choice(category_ids),
+                    "created_at": created, "updated_at": self._time(created) if rng.random() < 0.6 else None,
+                    "admin_id": rng.choice(admin_ids),
+                }
+        self._insert(Course, course_rows())
+        popularity = self._zipf_weights(courses)
+
+        def material_rows():
+            material_id = self._next_id(Materials)
+            for cid in course_ids:
+                for _ in range(rng.randint(1, 2 * materials_per_course - 1)):
+                    yield {
+                        "material_id": material_id, "course_id": cid,
+                        "title": f"Material {material_id}: {' and '.join(rng.sample(TOPIC_TERMS, 2)).title()}",
+                        "description": f"Generated material {material_id} on {' '.join(rng.choices(TOPIC_TERMS, k=6))}",
+                        "enum": rng.choices(*MATERIAL_TYPES)[0], "upload_at": self._time(course_created[cid]),
+                        "admin_id": rng.choice(admin_ids),
+                    }
+                    material_id += 1
+        self._insert(Materials, material_rows())
+
+        # Test, soal, dan kunci jawaban; kunci disimpan untuk membuat jawaban student
+        tests_by_course = {}
+        test_meta = {}
+
+        def test_rows():
+            test_id = self._next_id(Tests)
+            for cid in course_ids:
+                tests_by_course[cid] = []
+                for _ in range(rng.randint(1, 2 * tests_per_course - 1)):
+                    pass_percentage = rng.choice([60, 70, 75, 80])
+                    tests_by_course[cid].append(test_id)
+                    test_meta[test_id] = (pass_percentage, [])
+                    yield {
+                        "test_id": test_id, "course_id": cid, "title": f"Test {test_id}",
+                        "description": f"Generated test {test_id}", "pass_percentage": pass_percentage,
+                        "time_limit": rng.choice([15, 30, 45, 60]), "created_at": self._time(course_created[cid]),
+                        "admin_id": rng.choice(admin_ids),
+                    }
+                    test_id += 1
+        self._insert(Tests, test_rows())
+
+        answer_rows = []
+
+        def question_rows():
+            question_id = self._next_id(Questions)
+            answer_id = self._next_id(Answers)
+            for test_id, (_, questions) in test_meta.items():
+                for sequence in range(1, questions_per_test + 1):
+                    question_type = rng.choices(*QUESTION_TYPES)[0]
+                    points = rng.randint(1, 5)
+                    options = {"multiple_choice": 4, "true_false": 2, "essay": 0}[question_type]
+                    option_ids = list(range(answer_id, answer_id + options))
+                    correct = rng.choice(option_ids) if option_ids else None
+                    for oid in option_ids:
+                        answer_rows.append({
+                            "answer_id": oid, "question_id": question_id, "answer_text": f"Option {oid}",
+                            "is_correct": oid == correct, "explanation": "Correct" if oid == correct else "Incorrect",
+                        })
+                    answer_id += options
+                    questions.append((question_id, question_type, points, correct, option_ids))
+                    yield {
+                        "question_id": question_id, "test_id": test_id, "question_text": f"Question {question_id}",
+                        "question_type": question_type, "points": points, "sequence": sequence,
+                    }
+                    question_id += 1
+        self._insert(Questions, question_rows())
+        self._insert(Answers, iter(answer_rows))
+        del answer_rows
+
+        # Enrollment: jumlah course per student ~ geometrik, course dipilih menurut popularitas
+        enrollments = []
+        certificates = []
+
+        def enrollment_rows():
+            enrollment_id = self._next_id(Enrollments)
+            p = 1 / max(1, enrollments_per_student)
+            for sid in student_ids:
+                wanted = min(courses, 1 + int(rng.expovariate(p)))
+                chosen = set()
+                while len(chosen) < wanted:
+                    chosen.add(self._pick(course_ids, popularity))
+                for cid in chosen:
+                    enrolled = self._time(course_created[cid])
+                    completed = rng.random() < 0.3
+                    issued = completed and rng.random() < 0.7
+                    completed_at = self._time(enrolled) if completed else None
+                    enrollments.append((sid, cid, enrolled))
+                    if issued:
+                        certificates.append((sid, cid, completed_at))
+                    yield {
+                        "enrollment_id": enrollment_id, "student_id": sid, "course_id": cid, "enrolled_at": enrolled,
+                        "progress": 100.0 if completed else round(rng.uniform(0, 99), 1),
+                        "completed_at": completed_at, "certificate_issued": issued,
+                    }
+                    enrollment_id += 1
+        self._insert(Enrollments, enrollment_rows())
+
+        certificate0 = self._next_id(Certificates)
+        self._insert(Certificates, ({
+            "certificate_id": certificate0 + i, "student_id": sid, "course_id": cid,
+            "certificate_number": f"CERT-{certificate0 + i:010d}", "issued_at": issued_at, "is_valid": rng.random() < 0.99,
+        } for i, (sid, cid, issued_at) in enumerate(certificates)))
+        del certificates
+
+        # Attempt + jawaban: kemampuan student ~ Beta(5,2), skor dihitung dari jawabannya
+        ability = {}
+        student_answer_rows = []
+
+        def attempt_rows():
+            attempt_id = self._next_id(Tests_Attempts)
+            student_answer_id = self._next_id(Student_Answers)
+            for _ in range(attempts if enrollments else 0):
+                sid, cid, enrolled = rng.choice(enrollments)
+                test_id = rng.choice(tests_by_course[cid])
+                pass_percentage, questions = test_meta[test_id]
+                skill = ability.setdefault(sid, rng.betavariate(5, 2))
+                earned = total = 0
+                for question_id, question_type, points, correct, option_ids in questions:
+                    total += points
+                    right = rng.random() < skill
+                    if question_type == "essay":
+                        awarded = round(points * skill) if right else 0
+                        answer_id, essay = None, "Generated essay answer"
+                    else:
+                        awarded = points if right else 0
+                        answer_id = correct if right else rng.choice([o for o in option_ids if o != correct])
+                        essay = None
+                    earned += awarded
+                    student_answer_rows.append({
+                        "student_answer_id": student_answer_id, "attempt_id": attempt_id, "question_id": question_id,
+                        "answer_id": answer_id, "essay_answer": essay, "point_awarded": awarded,
+                    })
+                    student_answer_id += 1
+                started = self._time(enrolled)
+                total_time = rng.randint(120, 3600)
+                score = round(earned / total * 100) if total else 0
+                yield {
+                    "attempt_id": attempt_id, "student_id": sid, "test_id": test_id, "started_at": started,
+                    "completed_at": started + timedelta(seconds=total_time), "score": score,
+                    "passed": score >= pass_percentage, "total_time": total_time,
+                }
+                attempt_id += 1
+
+        # Jawaban ditulis per chunk attempt (setelah attempt-nya) supaya memori tetap kecil
+        def flush_answers():
+            if student_answer_rows:
+                self.session.execute(Student_Answers.__table__.insert(), student_answer_rows)
+                self.counts["student_answers"] = self.counts.get("student_answers", 0) + len(student_answer_rows)
+                student_answer_rows.clear()
+        self._insert(Tests_Attempts, attempt_rows(), after_chunk=flush_answers)
+        self._insert(Student_Answers, iter(student_answer_rows))
+
+        def topic_rows():
+            topic_id = self._next_id(Forum_Topics)
+            for _ in range(courses * topics_per_course if enrollments else 0):
+                sid, cid, enrolled = rng.choice(enrollments)
+                created = self._time(enrolled)
+                yield {
+                    "topic_id": topic_id, "course_id": cid, "student_id": sid, "title": f"Topic {topic_id}",
+                    "content": f"Generated topic {topic_id}", "created_at": created,
+                    "is_pinned": rng.random() < 0.05, "is_closed": rng.random() < 0.1,
+                }
+                topics.append((topic_id, created))
+                topic_id += 1
+        topics = []
+        self._insert(Forum_Topics, topic_rows())
+
+        def reply_rows():
+            p = 1 / max(1, replies_per_topic)
+            for topic_id, created in topics:
+                for _ in range(int(rng.expovariate(p))):
+                    from_admin = rng.random() < 0.1
+                    yield {
+                        "topic_id": topic_id, "student_id": None if from_admin else rng.choice(student_ids),
+                        "admin_id": rng.choice(admin_ids) if from_admin else None,
+                        "content": "Generated reply", "created_at": self._time(created),
+                        "upvotes": int(rng.paretovariate(2)) - 1,
+                    }
+        self._insert(Forum_Replies, reply_rows())
+        return self.counts
+
+
+def generate(url=None, seed=42, chunk_size=5000, **sizes):
+    target = make_engine(url) if url else engine
+    Base.metadata.create_all(target)
+    # Satu koneksi untuk seluruh run: PRAGMA dan SET di bawah berlaku per koneksi,
+    # sedangkan Session yang terikat ke engine bisa mengambil koneksi lain dari pool
+    # setelah commit per chunk
+    with target.connect() as connection, Session(bind=connection) as session:
+        if target.dialect.name == "sqlite":
+            # Bulk load lokal: durability tidak penting untuk dataset perf
+            session.execute(text("PRAGMA synchronous=OFF"))
+            session.execute(text("PRAGMA journal_mode=MEMORY"))
+        elif target.dialect.name == "mysql":
+            # Semua id dan relasi dibuat konsisten oleh generator
+            session.execute(text("SET foreign_key_checks=0, unique_checks=0"))
+        return Generator(session, seed=seed, chunk_size=chunk_size).run(**sizes)
+
+
 # Run the seeder
 if __name__ == "__main__":
-    seed_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the database. Without size options the small demo data is inserted.")
+    parser.add_argument("--db", help="database URL (default: DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--students", type=int)
+    parser.add_argument("--courses", type=int)
+    parser.add_argument("--attempts", type=int)
+    parser.add_argument("--admins", type=int)
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--materials-per-course", type=int, default=8)
+    parser.add_argument("--tests-per-course", type=int, default=2)
+    parser.add_argument("--questions-per-test", type=int, default=10)
+    parser.add_argument("--enrollments-per-student", type=int, default=3)
+    parser.add_argument("--topics-per-course", type=int, default=5)
+    parser.add_argument("--replies-per-topic", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.students is None and args.courses is None and args.attempts is None:
+        seed_data()
+    else:
+        started = time.perf_counter()
+        generate(
+            url=args.db, seed=args.seed, chunk_size=args.chunk_size,
+            students=args.students or 1000, courses=args.courses or 50, attempts=args.attempts or 0,
+            admins=args.admins, categories=args.categories, materials_per_course=args.materials_per_course,
+            tests_per_course=args.tests_per_course, questions_per_test=args.questions_per_test,
+            enrollments_per_student=args.enrollments_per_student, topics_per_course=args.topics_per_course,
+            replies_per_topic=args.replies_per_topic,
+        )
+        print(f"Done in {time.perf_counter() - started:.1f}s")
\ No newline at end of file
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from models import Student
+from password_pool import import_pool
+
+REQUIRED_FIELDS = ("username", "email", "first_name", "last_name")
+CHUNK_SIZE = 1000
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def parse_rows(body: bytes, content_type: str = ""):
+    """CSV (with a header row) or NDJSON -> list of dicts. The format comes from the
+    content type, otherwise from the first character of the body."""
+    text = body.decode("utf-8-sig")
+    if "json" in content_type or ("csv" not in content_type and text.lstrip()[:1] == "{"):
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ImportFormatError(f"Line {number} is not valid JSON: {e}")
+            rows.append(row if isinstance(row, dict) else {})
+        return rows
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "username" not in reader.fieldnames:
+        raise ImportFormatError("CSV needs a header row with username,email,first_name,last_name,password")
+    return list(reader)
+
+
+def _clean(row):
+    """Normalized row, or an error message."""
+    row = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+    # NDJSON bisa berisi angka/list/objek; hanya string yang diterima
+    not_text = [field for field in (*REQUIRED_FIELDS, "password", "password_hash")
+                if row.get(field) is not None and not isinstance(row[field], str)]
+    if not_text:
+        return None, f"{', '.join(not_text)} must be text"
+    if "@" not in row["email"]:
+        return None, "Invalid email"
+    row["email"] = row["email"].lower()
+    # password_hash dipakai apa adanya (migrasi dari sistem lain), harus bcrypt
+    if row.get("password_hash"):
+        if not row["password_hash"].startswith(("$2a$", "$2b$", "$2y$")):
+            return None, "password_hash must be a bcrypt hash"
+    elif not row.get("password"):
+        return None, "Missing password"
+    return row, None
+
+
+def _existing(db, usernames, emails):
+    """Usernames and emails already in the database, one query per chunk."""
+    taken_usernames, taken_emails = set(), set()
+    for start in range(0, max(len(usernames), len(emails)), CHUNK_SIZE):
+        chunk_usernames = usernames[start:start + CHUNK_SIZE]
+        chunk_emails = emails[start:start + CHUNK_SIZE]
+        for username, email in db.execute(
+            select(Student.username, Student.email).where(
+                or_(Student.username.in_(chunk_usernames), Student.email.in_(chunk_emails))
+            )
+        ):
+            taken_usernames.add(username)
+            taken_emails.add(email.lower())
+    return taken_usernames, taken_emails
+
+
+def _duplicate(index, row):
+    return {"row": index + 1, "status": "duplicate", "username": row["username"],
+            "detail": "Username or email already registered"}
+
+
+def _insert(db, chunk):
+    """Insert a chunk in its own savepoint. If a username/email was registered since
+    _existing() ran, retry row by row; returns the usernames that were rejected."""
+    try:
+        with db.begin_nested():
+            db.execute(insert(Student), chunk)
+        return set()
+    except IntegrityError:
+        pass
+    rejected = set()
+    for record in chunk:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Student), [record])
+        except IntegrityError:
+            rejected.add(record["username"])
+    return rejected
+
+
+def import_students(db, rows):
+    """Validate, de-duplicate, hash and insert `rows`; returns one result per row.
+    Ends the session's transaction before hashing (no connection or locks are
+    held during bcrypt); the inserts are left for the caller to commit."""
+    results = [None] * len(rows)
+    valid = []
+    for index, raw in enumerate(rows):
+        row, error = _clean(raw)
+        if error:
+            username = raw.get("username")
+            results[index] = {"row": index + 1, "status": "invalid",
+                              "username": username if isinstance(username, str) else None, "detail": error}
+        else:
+            valid.append((index, row))
+
+    taken_usernames, taken_emails = _existing(
+        db, [row["username"] for _, row in valid], [row["email"] for _, row in valid]
+    )
+    accepted = []
+    for index, row in valid:
+        if row["username"] in taken_usernames or row["email"] in taken_emails:
+            results[index] = _duplicate(index, row)
+            continue
+        # Duplikat di dalam file yang sama juga ditolak
+        taken_usernames.add(row["username"])
+        taken_emails.add(row["email"])
+        accepted.append((index, row))
+
+    # Baru dibaca, belum ada yang ditulis: lepas koneksi selama hashing
+    db.rollback()
+    to_hash = [row["password"] for _, row in accepted if not row.get("password_hash")]
+    hashes = iter(import_pool.hash_many(to_hash))
+    now = datetime.utcnow()
+    records = [{
+        "username": row["username"],
+        "email": row["email"],
+        "password_hash": row.get("password_hash") or next(hashes),
+        "first_name": row["first_name"],
+        "last_name": row["last_name"],
+        "created_at": now,
+        "join_date": now,
+        "is_active": True,
+    } for _, row in accepted]
+
+    ids, rejected = {}, set()
+    for start in range(0, len(records), CHUNK_SIZE):
+        chunk = records[start:start + CHUNK_SIZE]
+        rejected |= _insert(db, chunk)
+        ids.update(db.execute(
+            select(Student.username, Student.student_id).where(
+                Student.username.in_([r["username"] for r in chunk if r["username"] not in rejected]))
+        ).all())
+
+    for index, row in accepted:
+        if row["username"] in rejected:
+            results[index] = _duplicate(index, row)
+        else:
+            results[index] = {"row": index + 1, "status": "created", "username": row["username"],
+                              "student_id": ids.get(row["username"])}
+    return results
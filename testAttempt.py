@@ -1,29 +1,32 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from database import SessionLocal
+from auth import require_admin, require_student, require_student_or_admin
+from database import get_db, get_async_db
+from answer_key import get_answer_key, get_answer_key_async
+from dashboard import invalidate_student
+from grading import GradingError, grade_attempt, grade_attempt_async
 from models import Answers, Tests_Attempts, Student_Answers, Tests
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Keyset
 from pydantic import BaseModel, Field
 
 testAttempt_router = APIRouter()
+# Versi async untuk endpoint yang ramai saat ujian, dipasang main.py kalau DB_ASYNC=1
+testAttempt_async_router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# attempt_id ikut di index (student_id, test_id), jadi urutannya tanpa sort tambahan
+ATTEMPT_KEYSET = Keyset(Tests_Attempts.attempt_id)
 
+# Attempt baru selalu terbuka: completed_at, score, passed dan total_time hanya
+# diisi oleh submit (dinilai server), field lain di body diabaikan
 class TestAttemptCreate(BaseModel):
     test_id: int = Field(..., description="Test ID harus ada")
     student_id: int = Field(..., description="Student ID harus ada")
     started_at: datetime
-    completed_at: datetime
-    score: int
-    passed: bool
-    total_time: int
 
 class TestAttemptUpdate(BaseModel):
     test_id: int
@@ -39,55 +42,164 @@ class TestAttemptOut(BaseModel):
     test_id: int
     student_id: int
     started_at: datetime
-    completed_at: datetime
-    score: int
-    passed: bool
-    total_time: int
+    completed_at: Optional[datetime] = None
+    score: Optional[int] = None
+    passed: Optional[bool] = None
+    total_time: Optional[int] = None
 
     class Config:
         orm_mode: True
 
-@testAttempt_router.post("/attempt/create/{student_id}/{test_id}", response_model=TestAttemptOut)
+class TestAttemptPage(BaseModel):
+    items: List[TestAttemptOut]
+    next_cursor: Optional[str] = None
+
+class StudentAnswerSubmit(BaseModel):
+    question_id: int
+    answer_id: Optional[int] = None
+    essay_answer: Optional[str] = None
+
+class AttemptSubmission(BaseModel):
+    answers: List[StudentAnswerSubmit] = Field(..., description="Semua jawaban untuk attempt ini")
+    completed_at: Optional[datetime] = None
+
+class AutosaveOut(BaseModel):
+    attempt_id: int
+    saved: int
+
+def validate_submission(key, answers: List[StudentAnswerSubmit]):
+    # Soal dan pilihan jawaban diambil dari answer key yang sudah di-cache
+    questions = key.questions if key else {}
+
+    seen = set()
+    for ans in answers:
+        question = questions.get(ans.question_id)
+        if question is None:
+            raise HTTPException(status_code=400, detail=f"Question {ans.question_id} is not part of this test")
+        if question.question_type == "essay":
+            if ans.essay_answer is None:
+                raise HTTPException(status_code=400, detail=f"Question {ans.question_id} needs an essay answer")
+        elif ans.answer_id not in question.options:
+            raise HTTPException(status_code=400, detail=f"Answer {ans.answer_id} is not an option for question {ans.question_id}")
+        pair = (ans.question_id, ans.answer_id)
+        if pair in seen:
+            raise HTTPException(status_code=400, detail=f"Duplicate answer for question {ans.question_id}")
+        seen.add(pair)
+
+def check_attempt(attempt, student_id: int, test_id: int):
+    # Akses dicek terhadap student_id di path, jadi attempt harus milik path itu
+    if not attempt:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+    if attempt.student_id != student_id or attempt.test_id != test_id:
+        raise HTTPException(status_code=400, detail="Mismatch between URL and attempt")
+
+def check_submission(attempt, student_id: int, test_id: int, submission: AttemptSubmission):
+    check_attempt(attempt, student_id, test_id)
+    if not submission.answers:
+        raise HTTPException(status_code=400, detail="No answers submitted")
+
+def check_open(attempt):
+    # Jawaban attempt yang sudah dinilai tidak boleh diganti lagi
+    if attempt.completed_at is not None:
+        raise HTTPException(status_code=409, detail="Attempt already submitted")
+
+def locked_attempt(attempt_id: int):
+    # Save dan submit sama-sama mengunci baris attempt (FOR UPDATE) lalu mengecek
+    # completed_at sambil memegang kunci, jadi yang kedua menunggu dan melihat hasil yang pertama
+    return select(Tests_Attempts).where(Tests_Attempts.attempt_id == attempt_id).with_for_update()
+
+def submission_rows(attempt_id: int, submission: AttemptSubmission):
+    return [
+        {
+            "attempt_id": attempt_id,
+            "question_id": ans.question_id,
+            "answer_id": ans.answer_id,
+            "essay_answer": ans.essay_answer,
+        }
+        for ans in submission.answers
+    ]
+
+def naive_utc(value: datetime):
+    # Kolom TIMESTAMP disimpan tanpa zona waktu (UTC); "...+07:00" dari client diubah ke UTC dulu
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def mark_completed(attempt, submission: AttemptSubmission):
+    completed_at = naive_utc(submission.completed_at) or datetime.utcnow()
+    started_at = naive_utc(attempt.started_at)
+    if completed_at < started_at:
+        raise HTTPException(status_code=400, detail="completed_at is before the attempt started")
+    attempt.completed_at = completed_at
+    attempt.total_time = int((completed_at - started_at).total_seconds())
+
+@testAttempt_router.post("/attempt/create/{student_id}/{test_id}", response_model=TestAttemptOut, dependencies=[Depends(require_student)])
 def create_attempt(student_id: int, test_id: int, attempt: TestAttemptCreate, db: Session = Depends(get_db)):
     if student_id != attempt.student_id or test_id != attempt.test_id:
         raise HTTPException(status_code=400, detail="Mismatch between URL and request body")
     
-    new_attempt = Tests_Attempts(**attempt.dict())
+    new_attempt = Tests_Attempts(test_id=attempt.test_id, student_id=attempt.student_id,
+                                 started_at=naive_utc(attempt.started_at))
     db.add(new_attempt)
     db.commit()
     db.refresh(new_attempt)
+    invalidate_student(new_attempt.student_id)
     
-    return calculate_score(new_attempt.attempt_id, db)
+    # Attempt baru belum punya jawaban; dinilai saat submit
+    return new_attempt
 
-@testAttempt_router.post("/attempt/calculate_score/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut)
-def calculate_score(attempt_id: int, db: Session = Depends(get_db)):
+@testAttempt_router.post("/attempt/calculate_score/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut, dependencies=[Depends(require_student_or_admin)])
+def calculate_score(student_id: int, test_id: int, attempt_id: int, db: Session = Depends(get_db)):
     attempt = db.query(Tests_Attempts).filter_by(attempt_id=attempt_id).first()
-    if not attempt:
-        raise HTTPException(status_code=404, detail="Attempt not found")
+    check_attempt(attempt, student_id, test_id)
     
-    student_answers = db.query(Student_Answers).filter_by(
-        student_id=attempt.student_id, test_id=attempt.test_id
-    ).all()
-    
-    if not student_answers:
-        raise HTTPException(status_code=400, detail="No answers found for this attempt")
-    
-    correct_count = sum(
-        1 for ans in student_answers if db.query(Answers)
-        .filter_by(question_id=ans.question_id, is_correct=True, answer_id=ans.answer_id)
-        .first()
-    )
-    
-    total_questions = len(student_answers)
-    attempt.score = (correct_count / total_questions) * 100 if total_questions > 0 else 0
-    attempt.passed = attempt.score >= 60
+    try:
+        grade_attempt(db, attempt)
+    except GradingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     db.commit()
     db.refresh(attempt)
+    invalidate_student(attempt.student_id)
     return attempt
 
 
 
+@testAttempt_router.put("/attempt/save/{student_id}/{test_id}/{attempt_id}", response_model=AutosaveOut, dependencies=[Depends(require_student)])
+def save_answers(student_id: int, test_id: int, attempt_id: int, submission: AttemptSubmission, db: Session = Depends(get_db)):
+    attempt = db.scalars(locked_attempt(attempt_id)).first()
+    check_submission(attempt, student_id, test_id, submission)
+    check_open(attempt)
+    validate_submission(get_answer_key(db, test_id), submission.answers)
+
+    # Autosave: jawaban diganti tanpa dinilai, penilaian baru saat submit
+    db.execute(delete(Student_Answers).where(Student_Answers.attempt_id == attempt_id))
+    db.execute(insert(Student_Answers), submission_rows(attempt_id, submission))
+    db.commit()
+    return {"attempt_id": attempt_id, "saved": len(submission.answers)}
+
+@testAttempt_router.post("/attempt/submit/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut, dependencies=[Depends(require_student)])
+def submit_answers(student_id: int, test_id: int, attempt_id: int, submission: AttemptSubmission, db: Session = Depends(get_db)):
+    attempt = db.scalars(locked_attempt(attempt_id)).first()
+    check_submission(attempt, student_id, test_id, submission)
+    check_open(attempt)
+    validate_submission(get_answer_key(db, test_id), submission.answers)
+    mark_completed(attempt, submission)
+
+    # Jawaban hasil autosave diganti jawaban final, semua dalam satu transaksi
+    db.execute(delete(Student_Answers).where(Student_Answers.attempt_id == attempt_id))
+    db.execute(insert(Student_Answers), submission_rows(attempt_id, submission))
+    try:
+        grade_attempt(db, attempt)
+    except GradingError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    db.commit()
+    db.refresh(attempt)
+    invalidate_student(attempt.student_id)
+    return attempt
+
 @testAttempt_router.get("/attempt/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut)
 def get_attempt(attempt_id: int, db: Session = Depends(get_db)):
     attempt = db.query(Tests_Attempts).filter_by(attempt_id=attempt_id).first()
@@ -95,31 +207,71 @@ def get_attempt(attempt_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Attempt not found")
     return attempt
 
-@testAttempt_router.put("/attempt/update/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut)
-def update_attempt(attempt_id: int, attempt_update: TestAttemptUpdate, db: Session = Depends(get_db)):
+# Update dan delete mengubah nilai langsung, jadi hanya admin
+@testAttempt_router.put("/attempt/update/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut, dependencies=[Depends(require_admin)])
+def update_attempt(student_id: int, test_id: int, attempt_id: int, attempt_update: TestAttemptUpdate, db: Session = Depends(get_db)):
     attempt = db.query(Tests_Attempts).filter_by(attempt_id=attempt_id).first()
-    if not attempt:
-        raise HTTPException(status_code=404, detail="Attempt not found")
+    check_attempt(attempt, student_id, test_id)
     
+    old_student_id = attempt.student_id
     for key, value in attempt_update.dict().items():
         setattr(attempt, key, value)
     
     db.commit()
     db.refresh(attempt)
+    invalidate_student(old_student_id)
+    invalidate_student(attempt.student_id)
     return attempt
 
-@testAttempt_router.delete("/attempt/delete/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut)
-def delete_attempt(attempt_id: int, db: Session = Depends(get_db)):
+@testAttempt_router.delete("/attempt/delete/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut, dependencies=[Depends(require_admin)])
+def delete_attempt(student_id: int, test_id: int, attempt_id: int, db: Session = Depends(get_db)):
     attempt = db.query(Tests_Attempts).filter_by(attempt_id=attempt_id).first()
-    if not attempt:
-        raise HTTPException(status_code=404, detail="Attempt not found")
+    check_attempt(attempt, student_id, test_id)
     
     db.delete(attempt)
     db.commit()
+    invalidate_student(student_id)
     return attempt
 
-@testAttempt_router.get("/attempts/{student_id}/{test_id}", response_model=List[TestAttemptOut])
-def get_attempts(student_id: int, test_id: int, db: Session = Depends(get_db)):
-    return db.query(Tests_Attempts).filter_by(student_id=student_id, test_id=test_id).all()
+@testAttempt_router.get("/attempts/{student_id}/{test_id}", response_model=TestAttemptPage)
+def get_attempts(student_id: int, test_id: int, cursor: Optional[str] = None,
+                 limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), db: Session = Depends(get_db)):
+    query = db.query(Tests_Attempts).filter_by(student_id=student_id, test_id=test_id)
+    attempts, next_cursor = ATTEMPT_KEYSET.page(ATTEMPT_KEYSET.apply(query, cursor, limit).all(), limit)
+    return {"items": attempts, "next_cursor": next_cursor}
+
+@testAttempt_async_router.post("/attempt/submit/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut, dependencies=[Depends(require_student)])
+async def submit_answers_async(student_id: int, test_id: int, attempt_id: int, submission: AttemptSubmission, db: AsyncSession = Depends(get_async_db)):
+    attempt = (await db.scalars(locked_attempt(attempt_id))).first()
+    check_submission(attempt, student_id, test_id, submission)
+    check_open(attempt)
+    validate_submission(await get_answer_key_async(db, test_id), submission.answers)
+    mark_completed(attempt, submission)
 
+    await db.execute(delete(Student_Answers).where(Student_Answers.attempt_id == attempt_id))
+    await db.execute(insert(Student_Answers), submission_rows(attempt_id, submission))
+    try:
+        await grade_attempt_async(db, attempt)
+    except GradingError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await db.commit()
+    invalidate_student(student_id)
+    return attempt
+
+@testAttempt_async_router.get("/attempt/{student_id}/{test_id}/{attempt_id}", response_model=TestAttemptOut)
+async def get_attempt_async(attempt_id: int, db: AsyncSession = Depends(get_async_db)):
+    attempt = await db.get(Tests_Attempts, attempt_id)
+    if not attempt:
+        raise HTTPException(status_code=404, detail="Attempt not found")
+    return attempt
 
+@testAttempt_async_router.get("/attempts/{student_id}/{test_id}", response_model=TestAttemptPage)
+async def get_attempts_async(student_id: int, test_id: int, cursor: Optional[str] = None,
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             db: AsyncSession = Depends(get_async_db)):
+    statement = select(Tests_Attempts).where(Tests_Attempts.student_id == student_id, Tests_Attempts.test_id == test_id)
+    result = await db.execute(ATTEMPT_KEYSET.apply(statement, cursor, limit))
+    attempts, next_cursor = ATTEMPT_KEYSET.page(result.scalars(), limit)
+    return {"items": attempts, "next_cursor": next_cursor}
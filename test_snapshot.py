@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from cache import KeyedLocks, LRUCache, test_versions
+from models import Questions, Tests
+from routing import reads_primary
+
+# Snapshot test yang sudah di-serialize, key = (test_id, version).
+# Version naik setiap kali test/soal/jawaban diubah, jadi build yang sedang
+# berjalan saat ada edit tidak akan pernah dipakai lagi. Answer key
+# (answer_key.py) memakai versi yang sama.
+_snapshots = LRUCache(maxsize=256, ttl=600)
+_build_locks = KeyedLocks()
+_async_build_locks = KeyedLocks(asyncio.Lock)
+
+
+def invalidate_test(test_id):
+    if test_id is None:
+        return
+    version = test_versions.bump(test_id)
+    _snapshots.delete((test_id, version))
+
+
+def invalidate_question(db: Session, question_id):
+    test_id = db.query(Questions.test_id).filter(Questions.question_id == question_id).scalar()
+    invalidate_test(test_id)
+
+
+@reads_primary
+def build_snapshot(db: Session, test_id: int):
+    test = (
+        db.query(Tests)
+        .options(selectinload(Tests.questions).selectinload(Questions.answers))
+        .filter(Tests.test_id == test_id)
+        .first()
+    )
+    if test is None:
+        return None
+
+    # is_correct dan explanation sengaja tidak ikut dikirim ke student
+    payload = {
+        "test": {
+            "test_id": test.test_id,
+            "course_id": test.course_id,
+            "title": test.title,
+            "description": test.description,
+            "pass_percentage": test.pass_percentage,
+            "time_limit": test.time_limit,
+        },
+        "questions": [
+            {
+                "question_id": q.question_id,
+                "question_text": q.question_text,
+                "question_type": q.question_type,
+                "points": q.points,
+                "sequence": q.sequence,
+                "answers": [
+                    {"answer_id": a.answer_id, "answer_text": a.answer_text}
+                    for a in sorted(q.answers, key=lambda a: a.answer_id)
+                ],
+            }
+            for q in sorted(test.questions, key=lambda q: (q.sequence, q.question_id))
+        ],
+    }
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def get_snapshot(db: Session, test_id: int):
+    """Return the pre-serialized delivery JSON for a test, or None if it doesn't exist."""
+    version = test_versions.get(test_id)
+    return _snapshots.get_or_build(
+        (test_id, version),
+        lambda: build_snapshot(db, test_id),
+        _build_locks(test_id),
+    )
+
+
+async def get_snapshot_async(db: AsyncSession, test_id: int):
+    version = test_versions.get(test_id)
+
+    async def build():
+        return await db.run_sync(build_snapshot, test_id)
+
+    return await _snapshots.get_or_build_async((test_id, version), build, _async_build_locks(test_id))
@@ -0,0 +1,68 @@
+import os
+import sys
+
+# Dibaca saat modul aplikasi di-import, jadi harus diisi sebelum import apa pun:
+# SELECT yang sama berulang dalam satu request membuat request gagal (NPlusOneError)
+os.environ.setdefault("DB_NPLUS1", "raise")
+# bcrypt langsung di thread test, tanpa process pool
+os.environ.setdefault("AUTH_HASH_WORKERS", "0")
+os.environ.setdefault("CACHE_SYNC", "0")
+
+# Modul aplikasi ada di root repo (tanpa package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import select
+
+
+@pytest.fixture(scope="session")
+def engine(tmp_path_factory):
+    """Seeded SQLite database shared by the API tests (password of every user: "password")."""
+    from benchmarks.common import use_database
+    from seeder import generate
+
+    url = f"sqlite:///{tmp_path_factory.mktemp('db') / 'ureeka.db'}"
+    generate(url, students=20, courses=6, attempts=40)
+    return use_database(url)
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+
+    from main import create_app
+
+    with TestClient(create_app(async_db=False, rate_limit=False)) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def login(client):
+    tokens = {}
+
+    def login(username, password="password"):
+        if username not in tokens:
+            response = client.post("/auth/login", json={"username": username, "password": password})
+            assert response.status_code == 200, response.text
+            tokens[username] = response.json()["access_token"]
+        return {"Authorization": f"Bearer {tokens[username]}"}
+
+    return login
+
+
+@pytest.fixture(scope="session")
+def admin(login):
+    return login("admin1")
+
+
+@pytest.fixture(scope="session")
+def students(engine):
+    """[(student_id, username)] of active students."""
+    from models import Student
+
+    with engine.connect() as conn:
+        return conn.execute(
+            select(Student.student_id, Student.username)
+            .where(Student.is_active.is_not(False))
+            .order_by(Student.student_id)
+        ).all()
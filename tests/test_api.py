@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import select, text
+
+from models import Course, Forum_Topics, Materials, Tests, Tests_Attempts
+from query_stats import NPlusOneError, detect_n_plus_one
+
+
+@pytest.fixture(scope="module")
+def ids(engine):
+    with engine.connect() as conn:
+        first = lambda *columns: conn.execute(select(*columns).order_by(columns[0]).limit(1)).one()
+        return {
+            "course": first(Course.course_id)[0],
+            "material": first(Materials.material_id)[0],
+            "test": first(Tests.test_id)[0],
+            "topic": first(Forum_Topics.topic_id, Forum_Topics.course_id),
+            "attempt": first(Tests_Attempts.attempt_id, Tests_Attempts.student_id, Tests_Attempts.test_id),
+        }
+
+
+# Endpoint baca yang paling sering dipanggil; DB_NPLUS1=raise (conftest) membuat
+# request gagal kalau handler menjalankan SELECT yang sama berulang kali
+HOT_PATHS = [
+    "/course/",
+    "/course/?facets=true",
+    "/course/facets",
+    "/course/detail/{course}",
+    "/course/detail/{course}/full",
+    "/material/",
+    "/material/detail/{material}",
+    "/quiz/test/{test}",
+    "/quiz/test/{test}/full",
+    "/forum/topics/{topic[1]}",
+    "/forum/replies/{topic[0]}",
+    "/testAttempt/attempt/{attempt[1]}/{attempt[2]}/{attempt[0]}",
+    "/testAttempt/attempts/{attempt[1]}/{attempt[2]}",
+    "/search/?q=python",
+    "/search/autocomplete?q=py",
+]
+
+
+@pytest.mark.parametrize("path", HOT_PATHS)
+def test_hot_endpoint_has_no_n_plus_one(client, ids, path):
+    response = client.get(path.format(**ids))
+    assert response.status_code == 200, response.text
+
+
+def test_dashboard_has_no_n_plus_one(client, login, students):
+    student_id, username = students[0]
+    response = client.get(f"/home/home/{student_id}", headers=login(username))
+    assert response.status_code == 200, response.text
+    assert response.json()["student_id"] == student_id
+
+
+def test_detector_raises_on_repeated_select(engine):
+    with engine.connect() as conn, pytest.raises(NPlusOneError, match="same SELECT ran 4 times"):
+        with detect_n_plus_one(threshold=3):
+            for course_id in range(4):
+                conn.execute(text("SELECT title FROM courses WHERE course_id = :id"), {"id": course_id})
@@ -0,0 +1,73 @@
+COURSE = {"title": "Auth test", "description": "d", "category_id": 1, "created_at": "2025-01-01T00:00:00",
+          "admin_id": 1}
+
+
+def test_login_rejects_wrong_password(client, students):
+    response = client.post("/auth/login", json={"username": students[0][1], "password": "wrong"})
+    assert response.status_code == 400
+
+
+def test_writes_need_a_token(client):
+    assert client.post("/course/create/1", json=COURSE).status_code == 401
+
+
+def test_admin_writes_reject_students(client, login, admin, students):
+    assert client.post("/course/create/1", json=COURSE, headers=login(students[0][1])).status_code == 403
+    assert client.post("/course/create/1", json=COURSE, headers=admin).status_code == 201
+
+
+def test_students_only_reach_their_own_data(client, login, admin, students):
+    (own_id, username), (other_id, _) = students[:2]
+    headers = login(username)
+    assert client.get(f"/home/home/{own_id}", headers=headers).status_code == 200
+    assert client.get(f"/home/home/{other_id}", headers=headers).status_code == 403
+    assert client.get(f"/home/home/{other_id}", headers=admin).status_code == 200
+    attempt = {"student_id": other_id, "test_id": 1, "started_at": "2025-01-01T00:00:00"}
+    assert client.post(f"/testAttempt/attempt/create/{other_id}/1", json=attempt, headers=headers).status_code == 403
+
+
+def test_forum_posts_belong_to_their_author(client, login, admin, students):
+    (own_id, username), (other_id, other) = students[:2]
+    topic = {"course_id": 1, "student_id": own_id, "title": "t", "content": "c",
+             "created_at": "2025-01-01T00:00:00", "is_pinned": False, "is_closed": False}
+    assert client.post("/forum/create/topic/1", json={**topic, "student_id": other_id},
+                       headers=login(username)).status_code == 403
+    created = client.post("/forum/create/topic/1", json=topic, headers=login(username))
+    assert created.status_code == 201
+    topic_id = created.json()["topic_id"]
+
+    # Student lain tidak boleh mengubah atau menghapus topic ini
+    update = {**topic, "title": "hijacked", "student_id": other_id}
+    assert client.put(f"/forum/update/topic/{topic_id}", json=update, headers=login(other)).status_code == 403
+    assert client.delete(f"/forum/delete/topic/{topic_id}", headers=login(other)).status_code == 403
+    # Pemiliknya juga tidak bisa memindahkan topic ke student lain
+    assert client.put(f"/forum/update/topic/{topic_id}", json=update, headers=login(username)).status_code == 403
+    assert client.delete(f"/forum/delete/topic/{topic_id}", headers=admin).status_code == 204
+    assert client.delete(f"/forum/delete/topic/{topic_id}", headers=admin).status_code == 404
+
+
+def test_failed_login_verifies_one_candidate(client, students, monkeypatch):
+    from password_pool import password_pool
+    calls = []
+    verify = password_pool.verify_async
+
+    async def counting(*args):
+        calls.append(args)
+        return await verify(*args)
+
+    monkeypatch.setattr(password_pool, "verify_async", counting)
+    assert client.post("/auth/login", json={"username": students[0][1], "password": "wrong"}).status_code == 400
+    assert client.post("/auth/login", json={"username": "admin1", "password": "wrong"}).status_code == 400
+    assert len(calls) == 2
+
+
+def test_import_reports_non_text_fields_per_row(client, admin):
+    rows = [
+        '{"username": "imported1", "email": "imported1@example.com", "first_name": "I", "last_name": "One", "password": "pw"}',
+        '{"username": "imported2", "email": 12345, "first_name": "I", "last_name": "Two", "password": "pw"}',
+        '{"username": null, "email": "imported3@example.com", "first_name": "I", "last_name": "Three", "password": "pw"}',
+        '{"username": 7, "email": "imported4@example.com", "first_name": "I", "last_name": "Four", "password": "pw"}',
+    ]
+    response = client.post("/auth/import", content="\n".join(rows), headers={**admin, "content-type": "application/x-ndjson"})
+    assert response.status_code == 200, response.text
+    assert [row["status"] for row in response.json()["rows"]] == ["created", "invalid", "invalid", "invalid"]
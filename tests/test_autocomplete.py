@@ -0,0 +1,15 @@
+from autocomplete import SCAN_LIMIT, PrefixIndex
+
+
+def test_upserts_rank_like_a_fresh_build():
+    items = [(i, f"Course {i}", 5) for i in range(SCAN_LIMIT * 2)]
+    index = PrefixIndex()
+    index.build(items)
+    # Popularitas sama: id lebih kecil di depan, sama seperti _rank saat build
+    for entry_id in (901, 900, 902):
+        index.upsert(entry_id, f"Course {entry_id}", 10)
+
+    fresh = PrefixIndex()
+    fresh.build(items + [(entry_id, f"Course {entry_id}", 10) for entry_id in (900, 901, 902)])
+    assert index.lookup("course", 5) == fresh.lookup("course", 5)
+    assert [entry_id for entry_id, _, _ in index.lookup("course", 4)] == [900, 901, 902, 0]
@@ -0,0 +1,30 @@
+from sqlalchemy import select
+
+from models import Course, Tests
+
+
+def test_course_update_rebuilds_snapshot(client, engine, admin):
+    with engine.connect() as conn:
+        course_id, category_id = conn.execute(select(Course.course_id, Course.category_id).limit(1)).one()
+    assert client.get(f"/course/detail/{course_id}/full").status_code == 200
+
+    body = {"title": "Renamed course", "description": "d", "category_id": category_id,
+            "updated_at": "2025-06-01T00:00:00", "admin_id": 1}
+    assert client.put(f"/course/update/{course_id}", json=body, headers=admin).status_code == 200
+    assert client.get(f"/course/detail/{course_id}/full").json()["course"]["title"] == "Renamed course"
+
+
+def test_new_attempt_shows_on_dashboard(client, engine, login, students):
+    student_id, username = students[1]
+    headers = login(username)
+    before = client.get(f"/home/home/{student_id}", headers=headers).json()
+    enrolled = [course["course_id"] for course in before["courses"]]
+    with engine.connect() as conn:
+        test_id = conn.execute(select(Tests.test_id).where(Tests.course_id.in_(enrolled)).limit(1)).scalar()
+    assert test_id is not None
+
+    body = {"student_id": student_id, "test_id": test_id, "started_at": "2030-01-01T00:00:00"}
+    attempt = client.post(f"/testAttempt/attempt/create/{student_id}/{test_id}", json=body, headers=headers).json()
+    after = client.get(f"/home/home/{student_id}", headers=headers).json()
+    latest = {course["course_id"]: course["latest_attempt"] for course in after["courses"]}
+    assert attempt["attempt_id"] in {a["attempt_id"] for a in latest.values() if a}
@@ -0,0 +1,73 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from cache import Versions
+from cache_sync import VersionSync
+from models import Base, Cache_Invalidations
+
+
+def _workers(tmp_path, count=2):
+    # Dua "worker" = dua set Versions terpisah yang berbagi satu database
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(engine, tables=[Cache_Invalidations.__table__])
+    Session = sessionmaker(bind=engine)
+    workers = []
+    for _ in range(count):
+        versions = Versions("test")
+        sync = VersionSync([versions], session_factory=Session)
+        sync.attach()
+        sync.sync()
+        workers.append((versions, sync))
+    return workers
+
+
+def test_bump_reaches_other_worker(tmp_path):
+    (a, sync_a), (b, sync_b) = _workers(tmp_path)
+    a.bump(5)
+    assert a.get(5) == 1 and b.get(5) == 0
+    sync_a.sync()
+    assert sync_b.sync() == 1
+    assert b.get(5) == 1
+    # Bump sendiri tidak diterapkan dua kali
+    assert sync_a.sync() == 0
+    assert a.get(5) == 1
+
+
+def test_rows_committed_out_of_order_are_not_skipped(tmp_path):
+    (a, sync_a), (b, sync_b) = _workers(tmp_path)
+    a.bump(0)
+    sync_a.sync()
+    sync_b.sync()
+    a.bump(1)
+    a.bump(2)
+    sync_a.sync()
+    with sync_a.session_factory() as db:
+        # Baris dengan id lebih kecil yang baru terlihat setelah id yang lebih besar
+        late = db.query(Cache_Invalidations).filter(Cache_Invalidations.key == "1").one()
+        db.delete(late)
+        db.commit()
+        saved = {"invalidation_id": late.invalidation_id, "name": late.name, "key": late.key,
+                 "origin": late.origin, "created_at": late.created_at}
+    sync_b.sync()
+    assert (b.get(1), b.get(2)) == (0, 1)
+    with sync_a.session_factory() as db:
+        db.add(Cache_Invalidations(**saved))
+        db.commit()
+    sync_b.sync()
+    assert b.get(1) == 1
+
+
+def test_pruned_history_resets_every_key(tmp_path):
+    (a, sync_a), (b, sync_b) = _workers(tmp_path)
+    b.bump(9, publish=False)
+    before = (b.get(7), b.get(9))
+    a.bump(1)
+    a.bump(2)
+    sync_a.sync()
+    with sync_a.session_factory() as db:
+        # Baris pertama sudah di-prune sebelum worker b sempat membacanya
+        first = db.query(Cache_Invalidations).order_by(Cache_Invalidations.invalidation_id).first()
+        db.delete(first)
+        db.commit()
+    sync_b.sync()
+    assert b.get(7) > before[0] and b.get(9) > before[1]
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import select
+
+from answer_key import AnswerKey, QuestionKey
+from grading import GradingError, score_answers
+from models import Answers, Questions
+
+
+def _key():
+    return AnswerKey(1, 60, {
+        10: QuestionKey(1, "multiple_choice", frozenset({100}), frozenset({100, 101})),
+        11: QuestionKey(3, "multiple_choice", frozenset({110}), frozenset({110, 111})),
+        12: QuestionKey(2, "essay", frozenset(), frozenset()),
+    })
+
+
+def test_score_is_weighted_by_points():
+    rows = [(1, 10, 100, None), (2, 11, 111, None), (3, 12, None, 1)]
+    earned, total, awards = score_answers(_key(), rows)
+    # Essay memakai point_awarded yang diisi manual
+    assert (earned, total) == (2, 6)
+    assert awards == {1: 1, 2: 0}
+
+
+def test_question_needs_every_selected_answer_correct():
+    rows = [(1, 11, 110, None), (2, 11, 111, None)]
+    earned, _, awards = score_answers(_key(), rows)
+    assert earned == 0
+    assert awards == {1: 3, 2: 0}
+
+
+def test_no_answers_is_an_error():
+    with pytest.raises(GradingError):
+        score_answers(_key(), [])
+
+
+def _choice_test(engine):
+    """(test_id, {question_id: (correct_answer_id, wrong_answer_id)}) for a test without essays."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Questions.test_id, Questions.question_id, Questions.question_type, Answers.answer_id,
+                   Answers.is_correct)
+            .join(Answers, Answers.question_id == Questions.question_id)
+            .order_by(Questions.test_id, Questions.question_id)
+        ).all()
+    tests, essays = {}, set()
+    for test_id, question_id, question_type, answer_id, is_correct in rows:
+        if question_type == "essay":
+            essays.add(test_id)
+        options = tests.setdefault(test_id, {}).setdefault(question_id, [None, None])
+        options[0 if is_correct else 1] = options[0 if is_correct else 1] or answer_id
+    for test_id, questions in tests.items():
+        if test_id not in essays and all(None not in options for options in questions.values()):
+            return test_id, questions
+    pytest.skip("seeded data has no multiple choice test")
+
+
+def test_submit_grades_the_attempt(client, engine, login, students):
+    student_id, username = students[0]
+    headers = login(username)
+    test_id, questions = _choice_test(engine)
+    attempt = client.post(f"/testAttempt/attempt/create/{student_id}/{test_id}", headers=headers,
+                          json={"student_id": student_id, "test_id": test_id, "started_at": "2025-01-01T00:00:00",
+                                "completed_at": "2025-01-01T00:01:00", "score": 100, "passed": True})
+    assert attempt.status_code == 200, attempt.text
+    # Nilai dari client diabaikan, attempt baru selalu terbuka
+    assert attempt.json()["completed_at"] is None and attempt.json()["score"] is None
+    path = "/testAttempt/attempt/{}/" + f"{student_id}/{test_id}/{attempt.json()['attempt_id']}"
+
+    wrong = {"answers": [{"question_id": q, "answer_id": wrong} for q, (_, wrong) in questions.items()]}
+    assert client.put(path.format("save"), json=wrong, headers=headers).status_code == 200
+
+    right = {"answers": [{"question_id": q, "answer_id": right} for q, (right, _) in questions.items()],
+             "completed_at": "2025-01-01T00:10:00"}
+    graded = client.post(path.format("submit"), json=right, headers=headers)
+    assert graded.status_code == 200, graded.text
+    assert graded.json()["score"] == 100 and graded.json()["passed"] is True
+    assert graded.json()["total_time"] == 600
+
+    # Autosave yang terlambat atau submit ulang tidak boleh menimpa jawaban yang sudah dinilai
+    assert client.put(path.format("save"), json=wrong, headers=headers).status_code == 409
+    assert client.post(path.format("submit"), json=wrong, headers=headers).status_code == 409
+
+
+def test_submit_normalizes_completed_at(client, engine, login, students):
+    student_id, username = students[2]
+    headers = login(username)
+    test_id, questions = _choice_test(engine)
+    body = {"student_id": student_id, "test_id": test_id, "started_at": "2025-01-01T00:00:00"}
+    attempt_id = client.post(f"/testAttempt/attempt/create/{student_id}/{test_id}", json=body,
+                             headers=headers).json()["attempt_id"]
+    path = f"/testAttempt/attempt/submit/{student_id}/{test_id}/{attempt_id}"
+    answers = [{"question_id": q, "answer_id": right} for q, (right, _) in questions.items()]
+
+    early = client.post(path, json={"answers": answers, "completed_at": "2024-12-31T23:00:00"}, headers=headers)
+    assert early.status_code == 400
+    # 07:10 WIB = 00:10 UTC
+    graded = client.post(path, json={"answers": answers, "completed_at": "2025-01-01T07:10:00+07:00"}, headers=headers)
+    assert graded.status_code == 200, graded.text
+    assert graded.json()["total_time"] == 600
+    assert graded.json()["completed_at"] == "2025-01-01T00:10:00"
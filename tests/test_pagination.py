@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import select
+
+from models import Course, Forum_Topics
+from pagination import Keyset, encode_cursor
+
+
+def test_pages_cover_every_course_once(client, engine):
+    with engine.connect() as conn:
+        expected = conn.execute(select(Course.course_id).order_by(Course.course_id)).scalars().all()
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/course/", params=params).json()
+        seen += [course["course_id"] for course in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_cursor_round_trip():
+    keyset = Keyset(Course.created_at.desc(), Course.course_id)
+    cursor = encode_cursor(["2025-01-02T03:04:05", 7])
+    values = keyset.decode(cursor)
+    assert values[0].year == 2025 and values[1] == 7
+
+
+@pytest.mark.parametrize("values", [[1, 2], ["1"], [True], [None], [1.5], [{"id": 1}]])
+def test_invalid_cursor_is_a_400(client, values):
+    assert client.get("/course/", params={"cursor": encode_cursor(values)}).status_code == 400
+
+
+def test_unreadable_cursor_is_a_400(client):
+    assert client.get("/course/", params={"cursor": "not-a-cursor"}).status_code == 400
+    cursor = encode_cursor([True, "yesterday", 1])
+    assert client.get("/forum/topics/1", params={"cursor": cursor}).status_code == 400
+
+
+def test_forum_cursor_mixes_bool_datetime_and_id(client, engine):
+    with engine.connect() as conn:
+        course_id = conn.execute(select(Forum_Topics.course_id).limit(1)).scalar()
+    first = client.get(f"/forum/topics/{course_id}", params={"limit": 1}).json()
+    assert first["next_cursor"] is not None
+    second = client.get(f"/forum/topics/{course_id}", params={"limit": 1, "cursor": first["next_cursor"]})
+    assert second.status_code == 200
+    assert second.json()["items"][0]["topic_id"] != first["items"][0]["topic_id"]
@@ -0,0 +1,24 @@
+import logging
+
+from starlette.requests import Request
+
+from rate_limit import MemoryStore, RateLimiter
+
+
+def _request(forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": headers,
+                    "client": ("10.0.0.1", 1234)})
+
+
+def test_forwarded_for_only_used_when_trusted():
+    limiter = RateLimiter(store=MemoryStore(), trust_forwarded=True)
+    assert limiter.client_key(_request("203.0.113.9, 10.0.0.1")) == "ip:203.0.113.9"
+
+
+def test_untrusted_proxy_is_reported_once(caplog):
+    limiter = RateLimiter(store=MemoryStore(), trust_forwarded=False)
+    with caplog.at_level(logging.ERROR, logger="ureeka.rate_limit"):
+        assert limiter.client_key(_request("203.0.113.9")) == "ip:10.0.0.1"
+        assert limiter.client_key(_request("203.0.113.10")) == "ip:10.0.0.1"
+    assert len([r for r in caplog.records if "RATE_LIMIT_TRUST_FORWARDED" in r.getMessage()]) == 1
@@ -0,0 +1,110 @@
+from sqlalchemy import column, create_engine, event, select, table, text
+from sqlalchemy.orm import sessionmaker
+
+import routing
+from routing import ReplicaSet, RoutingSession, reads_primary
+
+
+def _database(path, value):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, value TEXT)"))
+        conn.execute(text("INSERT INTO item VALUES (1, :value)"), {"value": value})
+    return engine
+
+
+def _setup(tmp_path, monkeypatch, replica_count=1):
+    # Primary dan replica = file SQLite terpisah; replica "tertinggal" (isi berbeda)
+    primary = _database(tmp_path / "primary.db", "primary")
+    engines = [_database(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(replica_count)]
+    replicas = ReplicaSet(engines, check_interval=3600)
+    monkeypatch.setattr(routing, "replicas", replicas)
+    return sessionmaker(class_=RoutingSession, bind=primary), replicas
+
+
+def _read(db):
+    return db.execute(text("SELECT value FROM item WHERE id = 1")).scalar()
+
+
+def test_reads_go_to_replica_only_in_read_only_requests(tmp_path, monkeypatch):
+    Session, _ = _setup(tmp_path, monkeypatch)
+    with Session() as db:
+        assert _read(db) == "primary"
+    token = routing._use_replica.set(True)
+    try:
+        with Session() as db:
+            assert _read(db) == "replica0"
+    finally:
+        routing._use_replica.reset(token)
+
+
+def _value(engine):
+    with engine.connect() as conn:
+        return _read(conn)
+
+
+def test_raw_writes_go_to_primary(tmp_path, monkeypatch):
+    Session, replicas = _setup(tmp_path, monkeypatch)
+    token = routing._use_replica.set(True)
+    try:
+        with Session() as db:
+            db.execute(text("UPDATE item SET value = 'written' WHERE id = 1"))
+            # Session tetap di primary setelah menulis, jadi membaca tulisannya sendiri
+            assert _read(db) == "written"
+            db.commit()
+        assert _value(Session.kw["bind"]) == "written"
+        assert _value(replicas.engines[0]) == "replica0"
+    finally:
+        routing._use_replica.reset(token)
+
+
+def test_select_for_update_goes_to_primary(tmp_path, monkeypatch):
+    Session, _ = _setup(tmp_path, monkeypatch)
+    item = table("item", column("id"), column("value"))
+    token = routing._use_replica.set(True)
+    try:
+        with Session() as db:
+            assert db.execute(select(item.c.value).with_for_update()).scalar() == "primary"
+    finally:
+        routing._use_replica.reset(token)
+
+
+def test_cache_builders_read_the_primary(tmp_path, monkeypatch):
+    Session, _ = _setup(tmp_path, monkeypatch)
+
+    @reads_primary
+    def build(db):
+        return _read(db)
+
+    token = routing._use_replica.set(True)
+    try:
+        with Session() as db:
+            assert build(db) == "primary"
+            # Setelah builder selesai, request kembali membaca replica
+            assert _read(db) == "replica0"
+    finally:
+        routing._use_replica.reset(token)
+
+
+def test_one_replica_per_session(tmp_path, monkeypatch):
+    Session, _ = _setup(tmp_path, monkeypatch, replica_count=2)
+    token = routing._use_replica.set(True)
+    try:
+        with Session() as db:
+            seen = {_read(db) for _ in range(6)}
+        assert len(seen) == 1
+        with Session() as db:
+            # Session berikutnya lanjut round-robin ke replica lain
+            assert _read(db) not in seen
+    finally:
+        routing._use_replica.reset(token)
+
+
+def test_configure_does_not_stack_error_listeners(tmp_path):
+    engine = _database(tmp_path / "replica.db", "replica")
+    replicas = ReplicaSet([engine])
+    replicas.configure([engine])
+    replicas.configure([engine])
+    assert len(list(engine.dialect.dispatch.handle_error)) == 1
+    replicas.configure([])
+    assert not event.contains(engine, "handle_error", replicas._on_error)